@@ -0,0 +1,90 @@
+"""
+Seed a local SQLite database and time the portal's code paths against it. Results are JSON so
+runs can be kept and compared over time.
+
+    python -m benchmarks                                    # default dataset, report to stdout
+    python -m benchmarks --students 300 --out bench.json    # bigger classes, report to a file
+    python -m benchmarks --only progress roster             # only cases with these prefixes
+    python -m benchmarks --smtp                             # really send through toolkits.email.mail
+"""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from benchmarks.seed import seed, DEFAULT_SIZES
+
+FLAGS = {
+    '--instructors': 'instructors',
+    '--classes': 'classes_per_instructor',
+    '--students': 'students_per_class',
+    '--questions': 'questions',
+    '--assignments': 'assignments_per_class',
+    '--assignment-questions': 'questions_per_assignment',
+    '--runs': 'background_runs',
+}
+
+
+def _arg(argv, flag, default=None):
+    return argv[argv.index(flag) + 1] if flag in argv else default
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    sizes = {key: int(_arg(argv, flag)) for flag, key in FLAGS.items() if flag in argv}
+    path = _arg(argv, '--db', os.path.join(tempfile.gettempdir(), 'iq_benchmark.db'))
+    out = _arg(argv, '--out')
+    repeat = int(_arg(argv, '--repeat')) if '--repeat' in argv else None
+    only = argv[argv.index('--only') + 1:] if '--only' in argv else None
+
+    # Every toolkits.db call reads IQ_DB_AUTH, so point the app at the seeded file before importing it
+    os.environ['IQ_DB_AUTH'] = f"sqlite:///{path}"
+    os.environ.setdefault('IQ_LINK_SECRET', 'benchmark-secret')
+
+    start = time.perf_counter()
+    dataset = seed(path, sizes, random_seed=int(_arg(argv, '--seed', 0)), indexes='--no-indexes' not in argv)
+    seed_seconds = time.perf_counter() - start
+
+    # The seeded rows bypass the write paths, so fill the summary counters once
+    from toolkits import summaries
+    summaries.rebuild()
+
+    from benchmarks import suite
+    send = suite._no_send
+    if '--smtp' in argv:
+        from toolkits.email.mail import send_email
+        send = send_email
+    results = suite.run(dataset['target'], repeat, only, int(_arg(argv, '--roster', 50)), send)
+
+    report = {
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'database': os.environ['IQ_DB_AUTH'],
+        'dataset': {'sizes': dict(DEFAULT_SIZES, **sizes), 'rows': dataset['rows'],
+                    'seed_seconds': round(seed_seconds, 2)},
+        'results': results,
+    }
+    text = json.dumps(report, indent=2, default=str)
+    if out:
+        with open(out, 'w') as f:
+            f.write(text)
+        print(f"wrote {out}")
+    else:
+        print(text)
+    return 1 if any('error' in r for r in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+"""
+benchmarks/seed.py
+
+Synthetic portal database in a local SQLite file. Activity is skewed the way real classes are:
+a few students submit most of the runs, some never start, popular questions show up in many
+assignments, and harder questions take more attempts and are accepted less often.
+"""
+
+import itertools
+import os
+import random
+import sqlite3
+from datetime import datetime, timedelta
+from toolkits.dialect import translate
+from toolkits.schema import MIGRATIONS
+
+CODING_TYPES = ['sql', 'python', 'algorithms']
+TEXT_TYPES = ['product', 'statistics', 'case']
+ACCEPT_RATE = {1: 0.85, 2: 0.6, 3: 0.35}
+
+DEFAULT_SIZES = {
+    'instructors': 5,
+    'classes_per_instructor': 3,
+    'students_per_class': 60,
+    'questions': 500,
+    'assignments_per_class': 4,
+    'questions_per_assignment': 8,
+    'background_runs': 40,
+}
+
+# Tables the portal reads but does not own. Its own tables come from toolkits.schema.MIGRATIONS.
+SCHEMA = """
+CREATE TABLE users (
+    id INTEGER PRIMARY KEY,
+    email TEXT NOT NULL,
+    first_name TEXT,
+    last_name TEXT,
+    username TEXT,
+    is_confirmed INTEGER DEFAULT 0,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE questions (
+    id INTEGER PRIMARY KEY,
+    title TEXT,
+    type TEXT,
+    level INTEGER,
+    slug TEXT,
+    body_markdown TEXT,
+    is_published INTEGER DEFAULT 1
+);
+CREATE TABLE user_code_runs (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    question_id INTEGER NOT NULL,
+    is_submitted INTEGER DEFAULT 1,
+    is_accepted INTEGER DEFAULT 0,
+    created_at DATETIME
+);
+CREATE TABLE text_submissions (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    question_id INTEGER NOT NULL,
+    score REAL,
+    created_at DATETIME
+);
+CREATE TABLE hackathon_2025_student_progress (
+    id INTEGER PRIMARY KEY,
+    assignment_id INTEGER NOT NULL,
+    student_email TEXT NOT NULL,
+    question_id INTEGER NOT NULL,
+    is_completed INTEGER DEFAULT 0,
+    score REAL DEFAULT 0,
+    attempts INTEGER DEFAULT 0,
+    last_updated DATETIME
+);
+"""
+
+# Hot-predicate indexes from `python introspect_schema.py indexes`, so plans match production
+INDEXES = """
+CREATE INDEX ix_user_code_runs_cell ON user_code_runs (user_id, question_id, is_accepted, created_at);
+CREATE INDEX ix_text_submissions_cell ON text_submissions (user_id, question_id, score, created_at);
+CREATE INDEX ix_class_members_class ON hackathon_2025_class_members (class_id, is_active, email);
+CREATE INDEX ix_assignment_questions_assignment ON hackathon_2025_assignment_questions (assignment_id);
+CREATE INDEX ix_users_email ON users (email);
+"""
+
+
+def _ts(moment: datetime) -> str:
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def seed(path, sizes=None, random_seed=0, indexes=True):
+    """
+        Creates a fresh database at `path` and fills it. Returns row counts per table plus the
+        ids the benchmark cases need (a class, its instructor, an assignment, a student).
+    """
+    sizes = dict(DEFAULT_SIZES, **(sizes or {}))
+    rng = random.Random(random_seed)
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    for _, ddl in MIGRATIONS:
+        conn.execute(translate(ddl, 'sqlite'))
+    if indexes:
+        conn.executescript(INDEXES)
+
+    start = datetime(2025, 9, 1, 9, 0, 0)
+
+    # Questions, with Zipf-like popularity so a few show up in many assignments
+    questions = []
+    for qid in range(1, sizes['questions'] + 1):
+        qtype = rng.choice(CODING_TYPES) if rng.random() < 0.7 else rng.choice(TEXT_TYPES)
+        level = rng.choices([1, 2, 3], weights=[3, 4, 2])[0]
+        questions.append((qid, f"Question {qid}", qtype, level, f"question-{qid}", f"Body of question {qid}", 1))
+    conn.executemany("INSERT INTO questions VALUES (?, ?, ?, ?, ?, ?, ?)", questions)
+    question_ids = [q[0] for q in questions]
+    popularity = list(itertools.accumulate(1 / rank for rank in range(1, len(questions) + 1)))
+    question_type = {q[0]: q[2] for q in questions}
+    question_level = {q[0]: q[3] for q in questions}
+
+    users, classes, members, assignments, assignment_questions = [], [], [], [], []
+    code_runs, text_submissions, progress = [], [], []
+    user_id = 0
+
+    for i in range(sizes['instructors']):
+        user_id += 1
+        instructor_id = user_id
+        users.append((instructor_id, f"instructor{i}@university.edu", 'Instructor', str(i), f"instructor{i}", 1,
+                      _ts(start)))
+
+        for c in range(sizes['classes_per_instructor']):
+            class_id = len(classes) + 1
+            class_created = start + timedelta(days=rng.randint(0, 14))
+            classes.append((class_id, instructor_id, f"Class {class_id}", _ts(class_created)))
+
+            roster = []
+            for s in range(sizes['students_per_class']):
+                email = f"student{class_id}_{s}@university.edu"
+                has_account = rng.random() < 0.85
+                student_user = None
+                joined = _ts(class_created + timedelta(hours=rng.randint(1, 72))) if has_account else None
+                if has_account:
+                    user_id += 1
+                    student_user = user_id
+                    users.append((student_user, email, 'Student', f"{class_id}-{s}", f"student{class_id}_{s}", 1,
+                                  joined))
+                members.append((len(members) + 1, class_id, email, student_user, _ts(class_created), joined,
+                                0 if rng.random() < 0.03 else 1))
+                # Pareto activity: most students do a little, a few do most of the work
+                activity = 0 if rng.random() < 0.2 else min(rng.paretovariate(1.5) - 1, 6)
+                roster.append((email, student_user, activity))
+
+            for a in range(sizes['assignments_per_class']):
+                assignment_id = len(assignments) + 1
+                created = class_created + timedelta(days=7 * a + 1)
+                assignments.append((assignment_id, class_id, f"Homework {a + 1}", _ts(created + timedelta(days=7)),
+                                    _ts(created), 1))
+                picked = set()
+                while len(picked) < min(sizes['questions_per_assignment'], len(questions)):
+                    picked.add(rng.choices(question_ids, cum_weights=popularity)[0])
+                for qid in sorted(picked):
+                    assignment_questions.append((len(assignment_questions) + 1, assignment_id, qid, 10))
+
+                for email, student_user, activity in roster:
+                    for qid in sorted(picked):
+                        progress.append((len(progress) + 1, assignment_id, email, qid, 0, 0, 0, None))
+                        if student_user is None or rng.random() > min(activity, 1):
+                            continue
+                        when = created + timedelta(hours=rng.randint(1, 160))
+                        level = question_level[qid]
+                        if question_type[qid] in CODING_TYPES:
+                            attempts = 1 + int(rng.expovariate(1 / (level + activity)))
+                            accepted_at = attempts - 1 if rng.random() < ACCEPT_RATE[level] else None
+                            for n in range(attempts):
+                                code_runs.append((student_user, qid, 1, 1 if n == accepted_at else 0,
+                                                  _ts(when + timedelta(minutes=7 * n))))
+                        else:
+                            for n in range(1 + int(rng.expovariate(1.0))):
+                                score = round(min(10, max(0, rng.gauss(5 + 1.5 * activity - level, 2))), 1)
+                                text_submissions.append((student_user, qid, score,
+                                                         _ts(when + timedelta(minutes=15 * n))))
+
+    # Practice outside of assignments, so the submission tables are realistically large
+    student_users = [u[0] for u in users if u[1].startswith('student')]
+    for student_user in student_users:
+        for _ in range(int(rng.expovariate(1 / sizes['background_runs']))):
+            qid = rng.choices(question_ids, cum_weights=popularity)[0]
+            when = _ts(start + timedelta(minutes=rng.randint(0, 60 * 24 * 90)))
+            if question_type[qid] in CODING_TYPES:
+                code_runs.append((student_user, qid, 1, 1 if rng.random() < 0.3 else 0, when))
+            else:
+                text_submissions.append((student_user, qid, rng.randint(0, 10), when))
+
+    conn.executemany("INSERT INTO users VALUES (?, ?, ?, ?, ?, ?, ?)", users)
+    conn.executemany("INSERT INTO hackathon_2025_instructor_classes VALUES (?, ?, ?, ?)", classes)
+    conn.executemany("INSERT INTO hackathon_2025_class_members VALUES (?, ?, ?, ?, ?, ?, ?)", members)
+    conn.executemany("INSERT INTO hackathon_2025_assignments VALUES (?, ?, ?, ?, ?, ?)", assignments)
+    conn.executemany("INSERT INTO hackathon_2025_assignment_questions VALUES (?, ?, ?, ?)", assignment_questions)
+    conn.executemany("INSERT INTO user_code_runs (user_id, question_id, is_submitted, is_accepted, created_at) "
+                     "VALUES (?, ?, ?, ?, ?)", code_runs)
+    conn.executemany("INSERT INTO text_submissions (user_id, question_id, score, created_at) "
+                     "VALUES (?, ?, ?, ?)", text_submissions)
+    conn.executemany("INSERT INTO hackathon_2025_student_progress VALUES (?, ?, ?, ?, ?, ?, ?, ?)", progress)
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+
+    # Cases run against the first instructor's first class and its first assignment
+    class_id = classes[0][0]
+    assignment = next(a for a in assignments if a[1] == class_id)
+    student = next(m for m in members if m[1] == class_id and m[3] is not None)
+    return {
+        'sizes': sizes,
+        'rows': {
+            'users': len(users),
+            'questions': len(questions),
+            'classes': len(classes),
+            'class_members': len(members),
+            'assignments': len(assignments),
+            'assignment_questions': len(assignment_questions),
+            'student_progress': len(progress),
+            'user_code_runs': len(code_runs),
+            'text_submissions': len(text_submissions),
+        },
+        'target': {
+            'instructor_id': classes[0][1],
+            'instructor_email': users[classes[0][1] - 1][1],
+            'class_id': class_id,
+            'class_name': classes[0][2],
+            'assignment_id': assignment[0],
+            'assignment_created_at': assignment[4],
+            'student_email': student[2],
+            'student_user_id': student[3],
+            'question_ids': [aq[2] for aq in assignment_questions if aq[1] == assignment[0]],
+        }
+    }
@@ -0,0 +1,150 @@
+"""
+benchmarks/suite.py
+
+Timed cases over the real code paths: the progress page loaders (called through `__wrapped__`
+so every repeat hits the database instead of the app cache), the completion updater, roster
+import with its invitations (and the bulk pipeline on a 5,000-row roster), the assignment
+notification job and the summary-backed landing pages. Emails go through `send`, a no-op unless
+the run is pointed at SMTP. The roster cases remove the members they add after every repeat, so
+each repeat, and every case after them, runs against the seeded data.
+"""
+
+import contextlib
+import io
+import os
+import statistics
+import time
+from types import SimpleNamespace
+from toolkits import tasks
+
+
+def _no_send(from_email, to_email, subject, body):
+    """Stands in for send_email unless the run is pointed at an SMTP sink"""
+
+
+@contextlib.contextmanager
+def _sending(send):
+    """Routes the job functions' send_email through `send` for the duration of a case"""
+    original = tasks.send_email
+    tasks.send_email = send
+    try:
+        yield
+    finally:
+        tasks.send_email = original
+
+
+def _size(result):
+    if hasattr(result, '__len__'):
+        return len(result)
+    return result
+
+
+def time_case(fn, repeat=5, reset=None):
+    """
+        Runs `fn` `repeat` times, calling `reset` untimed after each run. Returns timings in ms and
+        the size of the last result, or the error if the case fails (for example a MySQL-only
+        query on SQLite).
+    """
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        try:
+            # Some paths print per-row errors, keep the report readable
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = fn()
+            timings.append((time.perf_counter() - start) * 1000)
+        except Exception as e:
+            # pandas wraps the driver error in a message that repeats the whole query
+            cause = getattr(e.__cause__, 'orig', None) or e
+            return {'error': str(cause).splitlines()[0]}
+        finally:
+            if reset:
+                reset()
+    return {
+        'runs': len(timings),
+        'min_ms': round(min(timings), 2),
+        'median_ms': round(statistics.median(timings), 2),
+        'mean_ms': round(statistics.mean(timings), 2),
+        'max_ms': round(max(timings), 2),
+        'result': result if isinstance(result, dict) else _size(result)
+    }
+
+
+def cases(target, roster_size=50, send=_no_send):
+    """(name, callable, repeat[, reset]) for every benchmarked path against the seeded `target` ids"""
+    # Imported here: main builds its page config and styles at import time
+    import main
+    from toolkits.analytics import progress_summary, progress_export_sql, PROGRESS_EXPORT_TYPES
+    from toolkits.exports import export_csv, export_columnar
+    from toolkits import roster, summaries
+    from toolkits.db import run_query
+    from toolkits.controllers.users import get_classes
+    from update_completion_status import update_student_progress_completion
+
+    aid = target['assignment_id']
+    cid = target['class_id']
+    instructor = SimpleNamespace(id=target['instructor_id'])
+    created = target['assignment_created_at']
+    batches = iter(range(1_000_000))
+    seeded_members = int(run_query("SELECT MAX(id) AS id FROM hackathon_2025_class_members").iloc[0]['id'] or 0)
+
+    def drop_imported():
+        # Members added by a roster case, and the class counters they bumped
+        summaries.write([f"DELETE FROM hackathon_2025_class_members WHERE class_id = {cid} AND id > {seeded_members}"],
+                        class_id=cid)
+
+    def import_roster():
+        # The 'Add & Invite' path: the bulk insert, then what its invitation job runs
+        batch = next(batches)
+        emails = [f"bench{batch}_{i}@university.edu" for i in range(roster_size)]
+        report = roster.import_roster(cid, '\n'.join(emails))
+        added = [row['email'] for row in report['rows'] if row['outcome'] == 'added']
+        with _sending(send):
+            return tasks.send_invitations(target['class_name'], target['instructor_email'], added)['sent']
+
+    def bulk_import(size=5000):
+        # New addresses plus existing members, registered users, duplicates and junk
+        batch = next(batches)
+        lines = [f"Bulk{batch}_{i}@University.edu" for i in range(size)]
+        lines += [f"student1_{i}@university.edu" for i in range(size // 10)]
+        lines += lines[:size // 20] + ['not-an-email'] * (size // 100)
+        return roster.import_roster(cid, '\n'.join(lines))['counts']
+
+    def export_to_file(fmt='CSV'):
+        sql = progress_export_sql(aid, cid, created)
+        path, rows = export_csv(sql) if fmt == 'CSV' else export_columnar(sql, PROGRESS_EXPORT_TYPES, fmt)
+        os.remove(path)
+        return rows
+
+    def fan_out():
+        # The job 'Create Assignment' queues, for the seeded assignment and its questions
+        with _sending(send):
+            return tasks.notify_assignment(aid, cid, "Benchmark", target['class_name'], '2025-12-01', {})['sent']
+
+    return [
+        ('progress.summary', lambda: progress_summary.__wrapped__(aid, created), 5),
+        ('progress.students', lambda: main.load_assignment_progress.__wrapped__(aid, created), 5),
+        ('progress.page', lambda: main.load_progress_page.__wrapped__(aid, created, None, 50), 5),
+        ('progress.question_stats', lambda: main.load_question_stats.__wrapped__(aid, cid, created), 5),
+        ('progress.student_details',
+         lambda: main.load_student_question_details.__wrapped__(aid, target['student_user_id'], created), 5),
+        ('progress.export', lambda: main.load_progress_export(aid, cid, created), 3),
+        ('progress.export_csv', export_to_file, 3),
+        ('progress.export_parquet', lambda: export_to_file('Parquet'), 3),
+        ('completion.update_assignment', lambda: update_student_progress_completion(assignment_id=aid), 1),
+        ('roster.import', import_roster, 3, drop_imported),
+        ('roster.bulk_import', bulk_import, 3, drop_imported),
+        ('assignment.fan_out', fan_out, 3),
+        ('classes.list', lambda: get_classes.__wrapped__(instructor), 5),
+        ('classes.dashboard', lambda: summaries.instructor_summary(target['instructor_id']), 5),
+    ]
+
+
+def run(target, repeat=None, only=None, roster_size=50, send=_no_send):
+    results = {}
+    for name, fn, default_repeat, *reset in cases(target, roster_size, send):
+        if only and not any(name.startswith(prefix) for prefix in only):
+            continue
+        results[name] = time_case(fn, repeat or default_repeat, *reset)
+    return results
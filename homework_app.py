@@ -4,6 +4,9 @@ from datetime import datetime, timedelta
 import io
 from toolkits.db import run_query
 from toolkits.email.mail import send_email
+from toolkits.roster import import_roster, read_emails
+from toolkits import summaries
+from toolkits.profiling import profiled
 
 # Page config
 st.set_page_config(
@@ -130,48 +133,31 @@ def instructor_dashboard():
     elif page == "Settings":
         show_settings()
 
+@profiled
 def show_dashboard(instructor_id):
     """Show instructor dashboard overview"""
     st.subheader("📊 Dashboard Overview")
     
     try:
-        # Get instructor stats
-        classes = run_query(f"""
-            SELECT COUNT(*) as total_classes 
-            FROM hackathon_2025_instructor_classes 
-            WHERE instructor_id = {instructor_id} AND is_active = 1
-        """)
-        
-        students = run_query(f"""
-            SELECT COUNT(DISTINCT cm.email) as total_students
-            FROM hackathon_2025_class_members cm
-            JOIN hackathon_2025_instructor_classes ic ON cm.class_id = ic.id
-            WHERE ic.instructor_id = {instructor_id} AND cm.is_active = 1
-        """)
-        
-        assignments = run_query(f"""
-            SELECT COUNT(*) as total_assignments
-            FROM hackathon_2025_assignments a
-            JOIN hackathon_2025_instructor_classes ic ON a.class_id = ic.id
-            WHERE ic.instructor_id = {instructor_id} AND a.is_active = 1
-        """)
+        # Instructor stats, one row maintained by the write paths
+        stats = summaries.instructor_summary(instructor_id)
         
         # Display metrics
         col1, col2, col3 = st.columns(3)
         
         with col1:
             st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-            st.metric("Total Classes", classes.iloc[0]['total_classes'] if not classes.empty else 0)
+            st.metric("Total Classes", stats['classes'])
             st.markdown('</div>', unsafe_allow_html=True)
         
         with col2:
             st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-            st.metric("Total Students", students.iloc[0]['total_students'] if not students.empty else 0)
+            st.metric("Total Students", stats['students'])
             st.markdown('</div>', unsafe_allow_html=True)
         
         with col3:
             st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-            st.metric("Total Assignments", assignments.iloc[0]['total_assignments'] if not assignments.empty else 0)
+            st.metric("Total Assignments", stats['active_assignments'])
             st.markdown('</div>', unsafe_allow_html=True)
         
         # Recent activity
@@ -193,6 +179,7 @@ def show_dashboard(instructor_id):
     except Exception as e:
         st.error(f"Error loading dashboard: {e}")
 
+@profiled
 def manage_classes(instructor_id):
     """Manage classes interface"""
     st.subheader("🏫 Manage Classes")
@@ -227,13 +214,14 @@ def create_class_form(instructor_id):
             
             if uploaded_file:
                 try:
-                    df = pd.read_csv(uploaded_file)
-                    if 'email' in df.columns:
-                        students_data = df['email'].dropna().tolist()
-                        st.success(f"Found {len(students_data)} valid email addresses")
-                        st.dataframe(df[['email']], use_container_width=True)
+                    # Streamed row by row, the import reads the file again from the start
+                    emails = [email for _, email in read_emails(uploaded_file)]
+                    if emails:
+                        students_data = uploaded_file
+                        st.success(f"Found {len(emails)} email addresses")
+                        st.dataframe(pd.DataFrame({'email': emails[:100]}), use_container_width=True)
                     else:
-                        st.error("CSV must contain an 'email' column")
+                        st.error("No email addresses found in the CSV")
                 except Exception as e:
                     st.error(f"Error reading CSV: {e}")
         
@@ -242,18 +230,18 @@ def create_class_form(instructor_id):
                 "Enter student emails (one per line)",
                 placeholder="student1@university.edu\nstudent2@university.edu"
             )
-            if manual_emails:
-                students_data = [email.strip() for email in manual_emails.split('\n') if email.strip()]
+            if manual_emails.strip():
+                students_data = manual_emails
         
         submitted = st.form_submit_button("Create Class", type="primary")
         
         if submitted and class_name:
             try:
                 # Create class
-                run_query(f"""
+                summaries.write([f"""
                     INSERT INTO hackathon_2025_instructor_classes (instructor_id, class_name)
                     VALUES ({instructor_id}, '{class_name}')
-                """)
+                """], owner_id=instructor_id)
                 
                 # Get class ID
                 class_result = run_query(f"""
@@ -265,16 +253,13 @@ def create_class_form(instructor_id):
                 if not class_result.empty:
                     class_id = class_result.iloc[0]['id']
                     
-                    # Add students if provided
+                    # Add students if provided, the roster import refreshes the class counters
+                    added = 0
                     if students_data:
-                        for email in students_data:
-                            run_query(f"""
-                                INSERT INTO hackathon_2025_class_members (class_id, email)
-                                VALUES ({class_id}, '{email}')
-                            """)
+                        added = import_roster(class_id, students_data)['counts']['added']
                     
                     st.markdown('<div class="success-card">', unsafe_allow_html=True)
-                    st.success(f"✅ Class '{class_name}' created successfully with {len(students_data) if students_data else 0} students!")
+                    st.success(f"✅ Class '{class_name}' created successfully with {added} students!")
                     st.markdown('</div>', unsafe_allow_html=True)
                     
                     # Send invitation emails
@@ -289,11 +274,9 @@ def show_existing_classes(instructor_id):
     try:
         classes = run_query(f"""
             SELECT ic.id, ic.class_name, ic.created_at,
-                   COUNT(cm.id) as student_count
+                   {summaries.student_count_sql('ic')} as student_count
             FROM hackathon_2025_instructor_classes ic
-            LEFT JOIN hackathon_2025_class_members cm ON ic.id = cm.class_id AND cm.is_active = 1
             WHERE ic.instructor_id = {instructor_id} AND ic.is_active = 1
-            GROUP BY ic.id, ic.class_name, ic.created_at
             ORDER BY ic.created_at DESC
         """)
         
@@ -355,13 +338,14 @@ def add_students_to_class(class_id):
             
             if uploaded_file:
                 try:
-                    df = pd.read_csv(uploaded_file)
-                    if 'email' in df.columns:
-                        students_data = df['email'].dropna().tolist()
-                        st.success(f"Found {len(students_data)} valid email addresses")
-                        st.dataframe(df[['email']], use_container_width=True)
+                    # Streamed row by row, the import reads the file again from the start
+                    emails = [email for _, email in read_emails(uploaded_file)]
+                    if emails:
+                        students_data = uploaded_file
+                        st.success(f"Found {len(emails)} email addresses")
+                        st.dataframe(pd.DataFrame({'email': emails[:100]}), use_container_width=True)
                     else:
-                        st.error("CSV must contain an 'email' column")
+                        st.error("No email addresses found in the CSV")
                 except Exception as e:
                     st.error(f"Error reading CSV: {e}")
         
@@ -371,31 +355,20 @@ def add_students_to_class(class_id):
                 placeholder="student1@university.edu\nstudent2@university.edu",
                 key=f"manual_{class_id}"
             )
-            if manual_emails:
-                students_data = [email.strip() for email in manual_emails.split('\n') if email.strip()]
+            if manual_emails.strip():
+                students_data = manual_emails
         
         submitted = st.form_submit_button("Add Students", type="primary")
         
         if submitted and students_data:
             try:
-                added_count = 0
-                for email in students_data:
-                    # Check if student already exists in class
-                    existing = run_query(f"""
-                        SELECT id FROM hackathon_2025_class_members 
-                        WHERE class_id = {class_id} AND email = '{email}'
-                    """)
-                    
-                    if existing.empty:
-                        run_query(f"""
-                            INSERT INTO hackathon_2025_class_members (class_id, email)
-                            VALUES ({class_id}, '{email}')
-                        """)
-                        added_count += 1
-                
-                st.success(f"✅ Added {added_count} new students to the class!")
-                if added_count < len(students_data):
-                    st.info(f"{len(students_data) - added_count} students were already in the class.")
+                # One batched lookup per table and bulk inserts, see toolkits.roster
+                report = import_roster(class_id, students_data)
+                counts = report['counts']
+                st.success(f"✅ Added {counts['added']} new students to the class!")
+                if counts['already_member'] or counts['duplicate'] or counts['invalid']:
+                    st.info(f"{counts['already_member']} students were already in the class, "
+                            f"{counts['duplicate']} duplicates and {counts['invalid']} invalid addresses skipped.")
                         
             except Exception as e:
                 st.error(f"Error adding students: {e}")
@@ -419,6 +392,7 @@ def send_invitations(email_list, class_name):
     except Exception as e:
         st.error(f"Error sending invitations: {e}")
 
+@profiled
 def create_assignment(instructor_id):
     """Create assignment interface"""
     st.subheader("📝 Create Assignment")
@@ -469,35 +443,30 @@ def create_assignment(instructor_id):
             
             submitted = st.form_submit_button("Create Assignment", type="primary")
             
-            if submitted and assignment_name and question_ids:
+            question_list = [q.strip() for q in question_ids.split(',') if q.strip()]
+            if submitted and assignment_name and not question_list:
+                st.error("Enter at least one question ID")
+            elif submitted and assignment_name:
                 try:
                     # Combine date and time
                     due_datetime = datetime.combine(due_date, due_time)
                     
-                    # Create assignment
-                    run_query(f"""
-                        INSERT INTO hackathon_2025_assignments (class_id, name, due_date)
-                        VALUES ({selected_class}, '{assignment_name}', '{due_datetime}')
-                    """)
+                    # Create the assignment and its questions in one transaction with the class counters
+                    summaries.write(summaries.assignment_sql(
+                        selected_class, assignment_name, due_datetime,
+                        {question_id: default_points for question_id in question_list}
+                    ), class_id=selected_class)
                     
                     # Get assignment ID
                     assignment_result = run_query(f"""
                         SELECT id FROM hackathon_2025_assignments
-                        WHERE class_id = {selected_class} AND name = '{assignment_name}'
+                        WHERE class_id = {selected_class} AND name = '{assignment_name.replace("'", "''")}'
                         ORDER BY created_at DESC LIMIT 1
                     """)
                     
                     if not assignment_result.empty:
                         assignment_id = assignment_result.iloc[0]['id']
                         
-                        # Add questions to assignment
-                        question_list = [q.strip() for q in question_ids.split(',') if q.strip()]
-                        for question_id in question_list:
-                            run_query(f"""
-                                INSERT INTO hackathon_2025_assignment_questions (assignment_id, question_id, points)
-                                VALUES ({assignment_id}, {question_id}, {default_points})
-                            """)
-                        
                         st.markdown('<div class="success-card">', unsafe_allow_html=True)
                         st.success(f"✅ Assignment '{assignment_name}' created successfully with {len(question_list)} questions!")
                         st.markdown('</div>', unsafe_allow_html=True)
@@ -534,11 +503,10 @@ def show_existing_assignments(instructor_id):
     try:
         assignments = run_query(f"""
             SELECT a.id, a.name, a.due_date, ic.class_name,
-                   COUNT(aq.id) as question_count,
+                   {summaries.question_count_sql('a')} as question_count,
                    COUNT(DISTINCT sp.student_email) as student_count
             FROM hackathon_2025_assignments a
             JOIN hackathon_2025_instructor_classes ic ON a.class_id = ic.id
-            LEFT JOIN hackathon_2025_assignment_questions aq ON a.id = aq.assignment_id
             LEFT JOIN hackathon_2025_student_progress sp ON a.id = sp.assignment_id
             WHERE ic.instructor_id = {instructor_id} AND a.is_active = 1
             GROUP BY a.id, a.name, a.due_date, ic.class_name
@@ -596,6 +564,7 @@ def show_assignment_details(assignment_id):
     except Exception as e:
         st.error(f"Error loading assignment details: {e}")
 
+@profiled
 def view_progress(instructor_id):
     """View student progress"""
     st.subheader("📊 Student Progress")
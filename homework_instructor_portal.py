@@ -1,7 +1,4 @@
 import streamlit as st
-import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
 from datetime import datetime, timedelta
 import hashlib
 import secrets
@@ -9,7 +6,13 @@ import json
 from io import BytesIO
 import re
 from typing import List, Dict, Optional
-import requests
+from toolkits.lazy import lazy_import
+from toolkits.profiling import profiled
+
+pd = lazy_import('pandas')
+go = lazy_import('plotly.graph_objects')
+px = lazy_import('plotly.express')
+requests = lazy_import('requests')
 
 # Page configuration
 st.set_page_config(
@@ -188,6 +191,7 @@ def show_auth():
                     st.rerun()
 
 # Main portal interface
+@profiled
 def show_portal():
     # Header
     col1, col2, col3 = st.columns([3, 1, 1])
@@ -217,6 +221,7 @@ def show_portal():
     elif page == "Reports":
         show_reports_page()
 
+@profiled
 def show_classes_page():
     st.subheader("📚 My Classes")
     
@@ -311,6 +316,7 @@ def show_classes_page():
                 st.session_state.manage_class = False
                 st.rerun()
 
+@profiled
 def show_assignments_page():
     st.subheader("📝 Create Assignment")
     
@@ -419,6 +425,7 @@ def show_assignments_page():
                 st.session_state.selected_questions = []
                 st.rerun()
 
+@profiled
 def show_progress_page():
     st.subheader("📊 Student Progress")
     
@@ -486,6 +493,7 @@ def show_progress_page():
                 fig.update_layout(height=300)
                 st.plotly_chart(fig, use_container_width=True)
 
+@profiled
 def show_reports_page():
     st.subheader("📄 Export Reports")
     
@@ -1,20 +1,35 @@
 import streamlit as st
-import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
 from datetime import datetime, timedelta
-import hashlib
 import secrets
 import json
 import re
 from typing import List, Dict, Optional
-import requests
 import os
-from io import BytesIO
 from toolkits.db import run_query
+from toolkits.search import question_search
+from toolkits.catalog import question_catalog
+from toolkits.links import get_signer
+from toolkits.cache import cached, invalidate, show_cache_stats
+from toolkits.lazy import lazy_import
+from toolkits.profiling import profiled
+from toolkits import metrics
+from toolkits.schema import schema_registry
+from toolkits.analytics import report_summary, question_performance, top_performers, submission_aggregates, \
+    gradebook_sql, GRADEBOOK_TYPES
+from toolkits.exports import export_options
+from toolkits.ui import show_job, show_roster_report
+from toolkits.roster import import_roster, read_emails
+from toolkits import jobs, tasks, summaries
 from toolkits.email.mail import send_email
 from toolkits.email.templates import get_assignment_notification_template
 
+pd = lazy_import('pandas')
+go = lazy_import('plotly.graph_objects')
+px = lazy_import('plotly.express')
+
+# Prometheus /metrics on a side port when IQ_METRICS_PORT is set
+metrics.serve_from_env()
+
 # Page configuration
 st.set_page_config(
     page_title="Interview Query - Instructor Portal",
@@ -119,23 +134,13 @@ def execute_query(query, params=None, fetch=True):
 
 # Question search API
 def search_questions(query: str, limit: int = 20) -> List[Dict]:
-    """Search questions using magus API"""
+    """Search questions using magus API, falling back to the database when it's unavailable"""
     try:
-        url = "https://magus.interviewquery.com/search"
-        payload = {
-            "query": query,
-            "content_types": ["questions"],
-            "companies": [],
-            "positions": [],
-            "limit": limit
-        }
-        
-        response = requests.post(url, json=payload, timeout=10)
-        response.raise_for_status()
-        
-        data = response.json()
-        return data.get('results', [])
-    except requests.RequestException as e:
+        results, source = question_search.search(query, limit=limit)
+        if source != 'magus':
+            st.info("Search service is unavailable, showing database matches instead.")
+        return results
+    except Exception as e:
         st.error(f"Error searching questions: {e}")
         return []
 
@@ -164,84 +169,36 @@ def send_verification_email(email: str, code: str) -> bool:
 
 def create_signed_link(question_id: int, assignment_id: int, user_email: str) -> str:
     """Create signed link for question access"""
-    timestamp = int(datetime.now().timestamp())
-    data = f"{question_id}:{assignment_id}:{user_email}:{timestamp}"
-    signature = hashlib.sha256(data.encode()).hexdigest()[:16]
-    return f"https://interviewquery.com/questions/{question_id}?hw={assignment_id}&u={signature}"
+    return get_signer().sign_link(f"https://interviewquery.com/questions/{question_id}", question_id,
+                                  assignment_id, user_email)
 
 def parse_csv(file) -> List[str]:
     """Parse CSV file and extract emails"""
     try:
-        df = pd.read_csv(file)
-        email_columns = [col for col in df.columns if 'email' in col.lower()]
-        if email_columns:
-            return df[email_columns[0]].dropna().tolist()
-        return df.iloc[:, 0].dropna().tolist()
+        # Streamed row by row, see toolkits.roster
+        return [email for _, email in read_emails(file)]
     except Exception as e:
         st.error(f"Error parsing CSV: {e}")
         return []
 
 # Database operations
 def create_instructor_tables():
-    """Create instructor portal tables if they don't exist"""
-    tables = [
-        """
-        CREATE TABLE IF NOT EXISTS hackathon_2025_instructor_classes (
-            id BIGINT AUTO_INCREMENT PRIMARY KEY,
-            user_id INT NOT NULL,
-            class_name VARCHAR(256) NOT NULL,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users(id)
-        )
-        """,
-        """
-        CREATE TABLE IF NOT EXISTS hackathon_2025_class_members (
-            id BIGINT AUTO_INCREMENT PRIMARY KEY,
-            class_id BIGINT NOT NULL,
-            email VARCHAR(255) NOT NULL,
-            user_id INT NULL,
-            invited_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-            joined_at DATETIME NULL,
-            is_active TINYINT(1) DEFAULT 1,
-            FOREIGN KEY (class_id) REFERENCES hackathon_2025_instructor_classes(id)
-        )
-        """,
-        """
-        CREATE TABLE IF NOT EXISTS hackathon_2025_assignments (
-            id BIGINT AUTO_INCREMENT PRIMARY KEY,
-            class_id BIGINT NOT NULL,
-            name VARCHAR(255) NOT NULL,
-            due_date DATETIME NOT NULL,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (class_id) REFERENCES hackathon_2025_instructor_classes(id)
-        )
-        """,
-        """
-        CREATE TABLE IF NOT EXISTS hackathon_2025_assignment_questions (
-            id BIGINT AUTO_INCREMENT PRIMARY KEY,
-            assignment_id BIGINT NOT NULL,
-            question_id INT NOT NULL,
-            points INT DEFAULT 0,
-            FOREIGN KEY (assignment_id) REFERENCES hackathon_2025_assignments(id),
-            FOREIGN KEY (question_id) REFERENCES questions(id)
-        )
-        """
-    ]
-    
-    for table_sql in tables:
-        try:
-            run_query(table_sql)
-        except Exception as e:
-            st.error(f"Error creating table: {e}")
+    """Check that the instructor portal tables exist. DDL runs from `python -m toolkits.schema migrate`."""
+    # Re-reflect: the migration may have run in another process since the schema was loaded
+    schema_registry.refresh()
+    missing = schema_registry.missing_tables()
+    if missing:
+        st.error(f"Missing tables: {', '.join(missing)}. Run `python -m toolkits.schema migrate`.")
+        return False
+    return True
 
+@cached('classes', scope=lambda user_id: user_id)
 def get_user_classes(user_id: int) -> List[Dict]:
     """Get classes for a user"""
-    query = """
-    SELECT c.*, COUNT(m.id) as student_count
+    query = f"""
+    SELECT c.*, {summaries.student_count_sql('c')} as student_count
     FROM hackathon_2025_instructor_classes c
-    LEFT JOIN hackathon_2025_class_members m ON c.id = m.class_id AND m.is_active = 1
     WHERE c.user_id = %s
-    GROUP BY c.id
     ORDER BY c.created_at DESC
     """
     return execute_query_with_params(query, (user_id,))
@@ -253,12 +210,14 @@ def create_class(user_id: int, class_name: str) -> bool:
     VALUES ({user_id}, '{class_name}')
     """
     try:
-        run_query(query)
+        summaries.write([query], owner_id=user_id)
+        invalidate('classes', user_id)
         return True
     except Exception as e:
         st.error(f"Error creating class: {e}")
         return False
 
+@cached('class_students', scope=lambda class_id: class_id)
 def get_class_students(class_id: int) -> List[Dict]:
     """Get students in a class"""
     query = f"""
@@ -270,10 +229,8 @@ def get_class_students(class_id: int) -> List[Dict]:
     """
     return execute_query_with_params(query)
 
-def add_students_to_class(class_id: int, emails: List[str]) -> int:
-    """Add students to class and send welcome emails"""
-    added_count = 0
-    
+def add_students_to_class(class_id: int, source) -> Optional[Dict]:
+    """Add students to class from pasted text or an uploaded CSV and queue their welcome emails"""
     # Get class info for email
     class_query = f"""
     SELECT c.class_name, u.email as instructor_email 
@@ -285,62 +242,33 @@ def add_students_to_class(class_id: int, emails: List[str]) -> int:
     
     if class_result.empty:
         st.error("Class not found")
-        return 0
+        return None
         
     class_name = class_result.iloc[0]['class_name']
     instructor_email = class_result.iloc[0]['instructor_email']
     
-    for email in emails:
-        # Check if student already exists
-        check_query = """
-        SELECT id FROM hackathon_2025_class_members 
-        WHERE class_id = %s AND email = %s AND is_active = 1
-        """
-        existing = execute_query(check_query, (class_id, email))
-        
-        if not existing:
-            # Get user_id if user exists
-            user_query = "SELECT id FROM users WHERE email = %s"
-            user_result = execute_query(user_query, (email,))
-            user_id = user_result[0]['id'] if user_result else None
-            
-            # Add student
-            insert_query = """
-            INSERT INTO hackathon_2025_class_members (class_id, email, user_id)
-            VALUES (%s, %s, %s)
-            """
-            if execute_query(insert_query, (class_id, email, user_id), fetch=False):
-                added_count += 1
-                
-                # Send welcome email to new student
-                try:
-                    from toolkits.email.templates import get_class_invitation_template
-                    
-                    email_body = get_class_invitation_template(
-                        class_name=class_name,
-                        student_email=email,
-                        instructor_email=instructor_email
-                    )
-                    
-                    send_email(
-                        from_email="noreply@interviewquery.com",
-                        to_email=email,
-                        subject=f"Welcome to {class_name}!",
-                        body=email_body
-                    )
-                except Exception as e:
-                    st.warning(f"Added {email} but failed to send welcome email: {str(e)}")
+    try:
+        # Batched lookups and inserts, the emails go out as one background job
+        report = import_roster(class_id, source, invite=(class_name, instructor_email),
+                               owner=st.session_state.user_id)
+    except Exception as e:
+        st.error(f"Error adding students: {e}")
+        return None
     
-    return added_count
+    if report['invite_job']:
+        st.session_state.roster_invite_job = report['invite_job']
+    if report['counts']['added']:
+        invalidate('class_students', class_id)
+        invalidate('classes', st.session_state.user_id)
+    return report
 
+@cached('class_assignments', scope=lambda class_id: class_id)
 def get_class_assignments(class_id: int) -> List[Dict]:
     """Get assignments for a class"""
-    query = """
-    SELECT a.*, COUNT(aq.id) as question_count
+    query = f"""
+    SELECT a.*, {summaries.question_count_sql('a')} as question_count
     FROM hackathon_2025_assignments a
-    LEFT JOIN hackathon_2025_assignment_questions aq ON a.id = aq.assignment_id
     WHERE a.class_id = %s
-    GROUP BY a.id
     ORDER BY a.created_at DESC
     """
     return execute_query(query, (class_id,)) or []
@@ -351,37 +279,15 @@ def create_assignment(class_id: int, name: str, due_date: str, questions: List[D
         # Format due date for SQL
         due_date_str = due_date.strftime('%Y-%m-%d %H:%M:%S') if hasattr(due_date, 'strftime') else str(due_date)
         
-        # Create assignment
-        assignment_query = f"""
-        INSERT INTO hackathon_2025_assignments (class_id, name, due_date)
-        VALUES ({class_id}, '{name.replace("'", "''")}', '{due_date_str}')
-        """
-        
-        # Execute the insert and get the ID
-        from toolkits.db import execute_query
-        execute_query(assignment_query)
-        
-        # Get the assignment ID
-        id_query = f"""
-        SELECT id FROM hackathon_2025_assignments 
-        WHERE class_id = {class_id} AND name = '{name.replace("'", "''")}' 
-        ORDER BY created_at DESC LIMIT 1
-        """
-        result = run_query(id_query)
-        
-        if result.empty:
-            st.error("Failed to create assignment")
+        if not questions:
+            st.error("Select at least one question")
             return False
-            
-        assignment_id = result.iloc[0]['id']
         
-        # Add questions
-        for question in questions:
-            question_query = f"""
-            INSERT INTO hackathon_2025_assignment_questions (assignment_id, question_id, points)
-            VALUES ({assignment_id}, {question['id']}, {question.get('points', 10)})
-            """
-            execute_query(question_query)
+        # Create the assignment with its questions and refresh the class counters in one transaction
+        summaries.write(summaries.assignment_sql(
+            class_id, name, due_date_str,
+            {question['id']: question.get('points', 10) for question in questions}
+        ), class_id=class_id)
         
         # Get class info
         class_query = f"""
@@ -400,13 +306,12 @@ def create_assignment(class_id: int, name: str, due_date: str, questions: List[D
         
         # Prepare question data with proper links for email
         email_questions = []
+        catalog = question_catalog.get_many([q['id'] for q in questions])
         for q in questions:
-            # Query for the slug to generate proper URL
-            slug_query = f"SELECT slug FROM questions WHERE id = {q['id']}"
-            slug_result = run_query(slug_query)
+            catalog_entry = catalog.get(int(q['id']))
             
-            if not slug_result.empty and slug_result.iloc[0]['slug']:
-                link = f"https://www.interviewquery.com/questions/{slug_result.iloc[0]['slug']}"
+            if catalog_entry and catalog_entry['url']:
+                link = catalog_entry['url']
             else:
                 # Use the URL from search results if available
                 link = q.get('url', f"https://www.interviewquery.com/questions/{q['id']}")
@@ -454,12 +359,21 @@ def create_assignment(class_id: int, name: str, due_date: str, questions: List[D
         if failed_emails:
             st.warning(f"Failed to send emails to: {', '.join(failed_emails)}")
         
+        invalidate('class_assignments', class_id)
         return True
         
     except Exception as e:
         st.error(f"Error creating assignment: {e}")
         return False
 
+# Question types scored from user_code_runs in this portal's reports
+REPORT_CODING_TYPES = ('coding', 'algorithm')
+
+def _has_account(student: Dict) -> bool:
+    """Roster rows get a user_id once the student signs up (NULL reads back as None or NaN)"""
+    user_id = student.get('user_id')
+    return bool(user_id) and user_id == user_id
+
 def get_student_progress(class_id: int, assignment_id: int = None) -> Dict:
     """Get student progress for class/assignment"""
     # Get students
@@ -475,65 +389,56 @@ def get_student_progress(class_id: int, assignment_id: int = None) -> Dict:
         """
         questions = execute_query(question_query, (assignment_id,)) or []
         
-        # Get submissions for each student/question
+        # All submissions for the class x assignment in two grouped queries
+        enrolled = [student for student in students if _has_account(student)]
+        code_runs, text_answers = submission_aggregates(
+            [student['user_id'] for student in enrolled],
+            [q['question_id'] for q in questions if q['type'] in REPORT_CODING_TYPES],
+            [q['question_id'] for q in questions if q['type'] not in REPORT_CODING_TYPES]
+        )
+
         progress_data = []
-        for student in students:
-            if not student['user_id']:
-                continue
-                
+        for student in enrolled:
+            user_id = int(student['user_id'])
             student_progress = {
                 'student': student['email'],
                 'user_id': student['user_id'],
                 'questions': []
             }
-            
+
             total_score = 0
             total_possible = 0
-            
+
             for question in questions:
                 question_id = question['question_id']
                 points = question['points']
                 total_possible += points
-                
-                # Check coding submissions
-                if question['type'] in ['coding', 'algorithm']:
-                    code_query = """
-                    SELECT COUNT(*) as attempts, MAX(is_accepted) as accepted
-                    FROM user_code_runs 
-                    WHERE user_id = %s AND question_id = %s
-                    """
-                    code_result = execute_query(code_query, (student['user_id'], question_id))
-                    
-                    if code_result and code_result[0]['accepted']:
+
+                # Coding questions are scored from code runs, the rest from text submissions
+                if question['type'] in REPORT_CODING_TYPES:
+                    code_result = code_runs.get((user_id, int(question_id)))
+
+                    if code_result and code_result['accepted']:
                         score = points
                         status = '✅'
                     else:
                         score = 0
-                        status = '❌' if code_result and code_result[0]['attempts'] > 0 else '⏳'
-                        
-                    attempts = code_result[0]['attempts'] if code_result else 0
-                    
+                        status = '❌' if code_result and code_result['attempts'] > 0 else '⏳'
+
+                    attempts = code_result['attempts'] if code_result else 0
+
                 else:
-                    # Check text submissions
-                    text_query = """
-                    SELECT score, COUNT(*) as attempts
-                    FROM text_submissions 
-                    WHERE user_id = %s AND question_id = %s
-                    GROUP BY user_id, question_id
-                    ORDER BY score DESC
-                    LIMIT 1
-                    """
-                    text_result = execute_query(text_query, (student['user_id'], question_id))
-                    
+                    text_result = text_answers.get((user_id, int(question_id)))
+
                     if text_result:
-                        score = min(text_result[0]['score'], points)
+                        score = min(text_result['score'], points)
                         status = '✅' if score >= points * 0.8 else '⚠️'
-                        attempts = text_result[0]['attempts']
+                        attempts = text_result['attempts']
                     else:
                         score = 0
                         status = '⏳'
                         attempts = 0
-                
+
                 total_score += score
                 student_progress['questions'].append({
                     'question_id': question_id,
@@ -543,13 +448,13 @@ def get_student_progress(class_id: int, assignment_id: int = None) -> Dict:
                     'status': status,
                     'attempts': attempts
                 })
-            
+
             student_progress['total_score'] = total_score
             student_progress['total_possible'] = total_possible
             student_progress['percentage'] = (total_score / total_possible * 100) if total_possible > 0 else 0
-            
+
             progress_data.append(student_progress)
-        
+
         return {
             'students': progress_data,
             'questions': questions,
@@ -641,6 +546,7 @@ def show_auth():
                     st.rerun()
 
 # Main portal interface
+@profiled
 def show_portal():
     # Header
     col1, col2, col3 = st.columns([3, 1, 1])
@@ -660,6 +566,7 @@ def show_portal():
         "Select Page",
         ["Classes", "Assignments", "Progress", "Reports"]
     )
+    show_cache_stats()
     
     if page == "Classes":
         show_classes_page()
@@ -670,6 +577,7 @@ def show_portal():
     elif page == "Reports":
         show_reports_page()
 
+@profiled
 def show_classes_page():
     st.subheader("📚 My Classes")
     
@@ -714,12 +622,14 @@ def show_classes_page():
             with col4:
                 if st.button("Delete", key=f"delete_{class_data['id']}"):
                     # Soft delete - set is_active = 0 for members
-                    delete_query = """
+                    delete_query = f"""
                     UPDATE hackathon_2025_class_members 
                     SET is_active = 0 
-                    WHERE class_id = %s
+                    WHERE class_id = {int(class_data['id'])}
                     """
-                    execute_query(delete_query, (class_data['id'],), fetch=False)
+                    summaries.write([delete_query], class_id=class_data['id'])
+                    invalidate('class_students', class_data['id'])
+                    invalidate('classes', st.session_state.user_id)
                     st.rerun()
             
             st.divider()
@@ -741,8 +651,7 @@ def show_classes_page():
                     st.success(f"Found {len(emails)} email addresses")
                     
                     if st.button("Import Students"):
-                        added_count = add_students_to_class(st.session_state.selected_class, emails)
-                        st.success(f"Added {added_count} new students!")
+                        st.session_state.roster_report = add_students_to_class(st.session_state.selected_class, uploaded_file)
                         st.rerun()
                 except Exception as e:
                     st.error(f"Error parsing CSV: {str(e)}")
@@ -751,11 +660,14 @@ def show_classes_page():
             with st.expander("Add Students Manually"):
                 email_input = st.text_area("Enter email addresses (one per line)")
                 if st.button("Add Students"):
-                    emails = [e.strip() for e in email_input.split('\n') if e.strip()]
-                    added_count = add_students_to_class(st.session_state.selected_class, emails)
-                    st.success(f"Added {added_count} new students!")
+                    st.session_state.roster_report = add_students_to_class(st.session_state.selected_class, email_input)
                     st.rerun()
             
+            # Outcome of the last import
+            if st.session_state.get('roster_report'):
+                show_roster_report(st.session_state.roster_report)
+            show_job('roster_invite_job', lambda result: st.success(f"Sent {result['sent']} welcome emails"))
+            
             # Current students
             st.subheader("Current Students")
             students = get_class_students(st.session_state.selected_class)
@@ -779,6 +691,7 @@ def show_classes_page():
                 st.session_state.manage_class = False
                 st.rerun()
 
+@profiled
 def show_assignments_page():
     st.subheader("📝 Create Assignment")
     
@@ -921,6 +834,7 @@ def show_assignments_page():
                 else:
                     st.error("Error creating assignment")
 
+@profiled
 def show_progress_page():
     st.subheader("📊 Student Progress")
     
@@ -1048,6 +962,7 @@ def show_progress_page():
             fig.update_layout(height=400)
             st.plotly_chart(fig, use_container_width=True)
 
+@profiled
 def show_reports_page():
     st.subheader("📄 Export Reports")
     
@@ -1070,22 +985,19 @@ def show_reports_page():
     selected_assignment_name = st.selectbox("Select Assignment", list(assignment_options.keys()))
     selected_assignment_id = assignment_options[selected_assignment_name]
     
-    # Generate report preview
+    # Generate report preview, aggregated in SQL
     st.markdown("### Report Preview")
-    
-    progress_data = get_student_progress(selected_class_id, selected_assignment_id)
-    
-    if progress_data.get('students'):
-        students = progress_data['students']
-        questions = progress_data['questions']
-        
+
+    summary = report_summary(selected_class_id, selected_assignment_id, coding_types=REPORT_CODING_TYPES)
+
+    if summary['total_students'] > 0:
         # Report summary
-        total_students = len(students)
-        completed = len([s for s in students if s['percentage'] >= 80])
-        avg_score = sum(s['percentage'] for s in students) / total_students if total_students > 0 else 0
-        
+        total_students = summary['total_students']
+        completed = summary['completed']
+        avg_score = summary['avg_score']
+
         col1, col2, col3, col4 = st.columns(4)
-        
+
         with col1:
             st.metric("Total Students", total_students)
         with col2:
@@ -1094,46 +1006,35 @@ def show_reports_page():
             st.metric("Average Score", f"{avg_score:.1f}%")
         with col4:
             st.metric("Completion Rate", f"{(completed/total_students*100):.1f}%")
-        
+
         # Question performance
         st.markdown("### Question Performance")
-        
-        question_stats = []
-        for i, question in enumerate(questions):
-            completed_count = len([s for s in students if s['questions'][i]['status'] == '✅'])
-            total_attempts = sum(s['questions'][i]['attempts'] for s in students)
-            avg_attempts = total_attempts / total_students if total_students > 0 else 0
-            
-            question_stats.append({
-                'Question': question['title'],
-                'Type': question['type'],
-                'Success Rate': f"{(completed_count/total_students*100):.1f}%",
-                'Avg Attempts': f"{avg_attempts:.1f}",
-                'Total Attempts': total_attempts
+
+        question_stats = question_performance(selected_class_id, selected_assignment_id, coding_types=REPORT_CODING_TYPES)
+        if not question_stats.empty:
+            df = pd.DataFrame({
+                'Question': question_stats['title'],
+                'Type': question_stats['type'],
+                'Success Rate': question_stats['success_rate'].map(lambda x: f"{x:.1f}%"),
+                'Avg Attempts': question_stats['avg_attempts'].map(lambda x: f"{x:.1f}"),
+                'Total Attempts': question_stats['total_attempts'].astype(int)
             })
-        
-        if question_stats:
-            df = pd.DataFrame(question_stats)
             st.dataframe(df, use_container_width=True)
-        
+
         # Top performers
         st.markdown("### Top Performers")
-        
-        top_students = sorted(students, key=lambda x: x['percentage'], reverse=True)[:5]
-        top_data = []
-        
-        for i, student in enumerate(top_students):
-            top_data.append({
-                'Rank': i + 1,
-                'Student': student['student'],
-                'Score': f"{student['total_score']}/{student['total_possible']}",
-                'Percentage': f"{student['percentage']:.1f}%"
+
+        top_students = top_performers(selected_class_id, selected_assignment_id, 5, coding_types=REPORT_CODING_TYPES)
+        if not top_students.empty:
+            df = pd.DataFrame({
+                'Rank': top_students['student_rank'].astype(int),
+                'Student': top_students['email'],
+                'Score': [f"{score:g}/{possible:g}" for score, possible in
+                          zip(top_students['total_score'], top_students['total_possible'])],
+                'Percentage': top_students['percentage'].map(lambda x: f"{x:.1f}%")
             })
-        
-        if top_data:
-            df = pd.DataFrame(top_data)
             st.dataframe(df, use_container_width=True)
-    
+
     # Export options
     st.divider()
     
@@ -1145,40 +1046,42 @@ def show_reports_page():
     
     with col2:
         if st.button("📊 Export as Excel", use_container_width=True):
-            # Create Excel file with progress data
-            if progress_data.get('students'):
-                excel_data = []
-                for student in students:
-                    row = {
-                        'Student Email': student['student'],
-                        'Total Score': student['total_score'],
-                        'Total Possible': student['total_possible'],
-                        'Percentage': student['percentage']
-                    }
-                    for i, q in enumerate(student['questions']):
-                        row[f"Q{i+1} Status"] = q['status']
-                        row[f"Q{i+1} Score"] = q['score']
-                        row[f"Q{i+1} Attempts"] = q['attempts']
-                    excel_data.append(row)
-                
-                df = pd.DataFrame(excel_data)
-                
-                # Create download
-                output = BytesIO()
-                with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-                    df.to_excel(writer, sheet_name='Student Progress', index=False)
-                
+            # The workbook is built by a background job, the progress bar polls its state
+            st.session_state[f"excel_job_{selected_assignment_id}"] = jobs.submit(
+                tasks.excel_report, int(selected_class_id), int(selected_assignment_id),
+                owner=st.session_state.user_id, kind='excel report')
+
+        def describe_excel_job(result):
+            # The job row outlives the temp file, which export cleanup removes after EXPORT_TTL
+            try:
+                f = open(result['path'], 'rb')
+            except FileNotFoundError:
+                st.info("The workbook has expired, export it again.")
+                return
+            with f:
                 st.download_button(
-                    label="Download Excel File",
-                    data=output.getvalue(),
+                    label=f"Download Excel File ({result['rows']} students)",
+                    data=f,
                     file_name=f"{selected_assignment_name.split(' (')[0]}_progress.xlsx",
                     mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
                 )
+
+        show_job(f"excel_job_{selected_assignment_id}", describe_excel_job)
     
     with col3:
         if st.button("📧 Email Report", use_container_width=True):
             st.success("Report will be emailed to all students and saved to class records.")
 
+    # Per (student, question) gradebook with typed columns, streamed to a file only on request
+    st.markdown("### Gradebook Export")
+    export_options(
+        "📒 Gradebook",
+        f"gradebook_{selected_class_id}_{selected_assignment_id}",
+        gradebook_sql(selected_class_id, selected_assignment_id),
+        f"{selected_assignment_name.split(' (')[0]}_gradebook_{datetime.now().strftime('%Y%m%d')}",
+        GRADEBOOK_TYPES
+    )
+
 # Main app logic
 def main():
     if not st.session_state.authenticated:
@@ -3,6 +3,7 @@ import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
 from datetime import datetime
+from toolkits.figures import cached_figure
 
 # Page config
 st.set_page_config(
@@ -126,22 +127,26 @@ if page == "Executive Summary":
     with col2:
         st.markdown("### 📊 Quick Stats")
         
-        fig = go.Figure(go.Indicator(
-            mode = "gauge+number",
-            value = 32.5,
-            domain = {'x': [0, 1], 'y': [0, 1]},
-            title = {'text': "Current Adoption %"},
-            gauge = {
-                'axis': {'range': [None, 100]},
-                'bar': {'color': "darkblue"},
-                'steps': [
-                    {'range': [0, 25], 'color': "lightgray"},
-                    {'range': [25, 50], 'color': "gray"}],
-                'threshold': {
-                    'line': {'color': "red", 'width': 4},
-                    'thickness': 0.75,
-                    'value': 90}}))
-        fig.update_layout(height=300)
+        def build_adoption_gauge():
+            fig = go.Figure(go.Indicator(
+                mode = "gauge+number",
+                value = 32.5,
+                domain = {'x': [0, 1], 'y': [0, 1]},
+                title = {'text': "Current Adoption %"},
+                gauge = {
+                    'axis': {'range': [None, 100]},
+                    'bar': {'color': "darkblue"},
+                    'steps': [
+                        {'range': [0, 25], 'color': "lightgray"},
+                        {'range': [25, 50], 'color': "gray"}],
+                    'threshold': {
+                        'line': {'color': "red", 'width': 4},
+                        'thickness': 0.75,
+                        'value': 90}}))
+            fig.update_layout(height=300)
+            return fig
+
+        fig = cached_figure('adoption_gauge', 32.5, build_adoption_gauge)
         st.plotly_chart(fig, use_container_width=True)
         
         st.markdown('<div class="success-box">', unsafe_allow_html=True)
@@ -157,16 +162,20 @@ elif page == "Adoption Analysis":
     st.markdown("### Current Adoption Landscape")
     
     # Create adoption visualization
-    fig = px.bar(university_data.sort_values('Adoption_Rate', ascending=True), 
-                 x='Adoption_Rate', 
-                 y='University',
-                 color='Risk_Level',
-                 color_discrete_map={'Low': '#4caf50', 'Medium': '#ff9800', 'High': '#f44336'},
-                 title='Student Adoption Rates by University',
-                 labels={'Adoption_Rate': 'Adoption Rate (%)', 'University': ''})
-    
-    fig.add_vline(x=50, line_dash="dash", line_color="gray", annotation_text="50% Threshold")
-    fig.update_layout(height=600, showlegend=True)
+    def build_adoption_chart():
+        fig = px.bar(university_data.sort_values('Adoption_Rate', ascending=True), 
+                     x='Adoption_Rate', 
+                     y='University',
+                     color='Risk_Level',
+                     color_discrete_map={'Low': '#4caf50', 'Medium': '#ff9800', 'High': '#f44336'},
+                     title='Student Adoption Rates by University',
+                     labels={'Adoption_Rate': 'Adoption Rate (%)', 'University': ''})
+
+        fig.add_vline(x=50, line_dash="dash", line_color="gray", annotation_text="50% Threshold")
+        fig.update_layout(height=600, showlegend=True)
+        return fig
+
+    fig = cached_figure('adoption_by_university', university_data, build_adoption_chart)
     st.plotly_chart(fig, use_container_width=True)
     
     col1, col2 = st.columns(2)
@@ -184,11 +193,15 @@ elif page == "Adoption Analysis":
         st.markdown('</div>', unsafe_allow_html=True)
         
         # Risk distribution pie chart
-        risk_counts = university_data['Risk_Level'].value_counts()
-        fig_pie = px.pie(values=risk_counts.values, 
-                         names=risk_counts.index,
-                         title='Risk Distribution of Contracts',
-                         color_discrete_map={'Low': '#4caf50', 'Medium': '#ff9800', 'High': '#f44336'})
+        def build_risk_pie():
+            risk_counts = university_data['Risk_Level'].value_counts()
+            fig_pie = px.pie(values=risk_counts.values, 
+                             names=risk_counts.index,
+                             title='Risk Distribution of Contracts',
+                             color_discrete_map={'Low': '#4caf50', 'Medium': '#ff9800', 'High': '#f44336'})
+            return fig_pie
+
+        fig_pie = cached_figure('risk_distribution', university_data, build_risk_pie)
         st.plotly_chart(fig_pie, use_container_width=True)
     
     with col2:
@@ -205,14 +218,18 @@ elif page == "Adoption Analysis":
         st.markdown('</div>', unsafe_allow_html=True)
         
         # Correlation scatter plot
-        fig_scatter = px.scatter(university_data, 
-                                x='Adoption_Rate', 
-                                y='Contract_Value',
-                                size='Contract_Value',
-                                color='Risk_Level',
-                                title='Adoption vs Contract Value Correlation',
-                                color_discrete_map={'Low': '#4caf50', 'Medium': '#ff9800', 'High': '#f44336'})
-        fig_scatter.update_layout(height=350)
+        def build_adoption_scatter():
+            fig_scatter = px.scatter(university_data, 
+                                    x='Adoption_Rate', 
+                                    y='Contract_Value',
+                                    size='Contract_Value',
+                                    color='Risk_Level',
+                                    title='Adoption vs Contract Value Correlation',
+                                    color_discrete_map={'Low': '#4caf50', 'Medium': '#ff9800', 'High': '#f44336'})
+            fig_scatter.update_layout(height=350)
+            return fig_scatter
+
+        fig_scatter = cached_figure('adoption_vs_contract_value', university_data, build_adoption_scatter)
         st.plotly_chart(fig_scatter, use_container_width=True)
 
 elif page == "Revenue Impact":
@@ -265,28 +282,32 @@ elif page == "Revenue Impact":
                      delta=f"+${new_acv - current_acv:,.0f}")
         
         # Waterfall chart
-        fig_waterfall = go.Figure(go.Waterfall(
-            name = "Revenue Impact",
-            orientation = "v",
-            measure = ["absolute", "relative", "relative", "total"],
-            x = ["Current ARR", "Renewal Improvement", "ACV Increase", "New ARR"],
-            textposition = "outside",
-            text = [f"${current_arr:,.0f}", 
-                   f"+${new_renewals * current_acv:,.0f}", 
-                   f"+${current_contracts * (new_acv - current_acv):,.0f}", 
-                   f"${new_total_arr:,.0f}"],
-            y = [current_arr, 
-                new_renewals * current_acv, 
-                current_contracts * (new_acv - current_acv), 
-                new_total_arr],
-            connector = {"line":{"color":"rgb(63, 63, 63)"}},
-        ))
-        
-        fig_waterfall.update_layout(
-            title = "Revenue Growth Waterfall",
-            showlegend = False,
-            height = 400
-        )
+        def build_revenue_waterfall():
+            fig_waterfall = go.Figure(go.Waterfall(
+                name = "Revenue Impact",
+                orientation = "v",
+                measure = ["absolute", "relative", "relative", "total"],
+                x = ["Current ARR", "Renewal Improvement", "ACV Increase", "New ARR"],
+                textposition = "outside",
+                text = [f"${current_arr:,.0f}", 
+                       f"+${new_renewals * current_acv:,.0f}", 
+                       f"+${current_contracts * (new_acv - current_acv):,.0f}", 
+                       f"${new_total_arr:,.0f}"],
+                y = [current_arr, 
+                    new_renewals * current_acv, 
+                    current_contracts * (new_acv - current_acv), 
+                    new_total_arr],
+                connector = {"line":{"color":"rgb(63, 63, 63)"}},
+            ))
+
+            fig_waterfall.update_layout(
+                title = "Revenue Growth Waterfall",
+                showlegend = False,
+                height = 400
+            )
+            return fig_waterfall
+
+        fig_waterfall = cached_figure('revenue_waterfall', (current_arr, current_contracts, current_acv, new_renewals, new_acv, new_total_arr), build_revenue_waterfall)
         st.plotly_chart(fig_waterfall, use_container_width=True)
     
     st.markdown("---")
@@ -353,11 +374,15 @@ elif page == "Strategic Alignment":
             'Description': ['5,000 programs × $6K', '+ Engineering & Business', '+ International Markets']
         })
         
-        fig_market = px.funnel(market_data, 
-                              y='Segment', 
-                              x='Value',
-                              title='Market Opportunity ($M)')
-        fig_market.update_layout(height=300)
+        def build_market_funnel():
+            fig_market = px.funnel(market_data, 
+                                  y='Segment', 
+                                  x='Value',
+                                  title='Market Opportunity ($M)')
+            fig_market.update_layout(height=300)
+            return fig_market
+
+        fig_market = cached_figure('market_opportunity', market_data, build_market_funnel)
         st.plotly_chart(fig_market, use_container_width=True)
     
     st.markdown("---")
@@ -494,10 +519,14 @@ elif page == "Implementation Roadmap":
                         'Case studies & collateral', 'Training & support', 'Contingency']
     })
     
-    fig_funding = px.pie(funding_breakdown, 
-                         values='Amount', 
-                         names='Category',
-                         title='$250K Seed Funding Allocation')
+    def build_funding_pie():
+        fig_funding = px.pie(funding_breakdown, 
+                             values='Amount', 
+                             names='Category',
+                             title='$250K Seed Funding Allocation')
+        return fig_funding
+
+    fig_funding = cached_figure('funding_allocation', funding_breakdown, build_funding_pie)
     st.plotly_chart(fig_funding, use_container_width=True)
     
     st.markdown("### 🎯 Success Metrics & Milestones")
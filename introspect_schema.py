@@ -2,27 +2,62 @@
 introspect_schema.py
 
 Utility script to inspect and print all tables and their columns
-from the IQ database, using SQLAlchemy reflection.
+from the IQ database, using SQLAlchemy reflection. The app reads the same
+reflection through toolkits.schema.schema_registry.
+
+With `indexes` it works as an index advisor: it lists the indexes each hot table has, runs
+EXPLAIN on the SQL the progress and report pages build (toolkits.analytics), flags full table
+scans and filesorts, and prints CREATE INDEX statements for hot predicates that no existing index
+covers, or that only a prefix covers on a table the plans flag.
+
+    python introspect_schema.py                                   # tables and columns
+    python introspect_schema.py indexes                           # index advisor report
+    python introspect_schema.py indexes --class-id 12 --assignment-id 40
 """
 
 import os
-from sqlalchemy import create_engine, MetaData
+import re
+import sys
 from dotenv import load_dotenv
+from toolkits.db import run_query
+from toolkits.schema import reflect_schema
+from toolkits.lazy import lazy_import
 
+sqlalchemy = lazy_import('sqlalchemy')
+
+# Columns the portal filters, joins and sorts on, in the order a composite index should use them
+HOT_PREDICATES = [
+    ('user_code_runs', ['user_id', 'question_id', 'is_accepted', 'created_at']),
+    ('text_submissions', ['user_id', 'question_id', 'score', 'created_at']),
+    ('hackathon_2025_class_members', ['class_id', 'is_active', 'email']),
+    ('hackathon_2025_assignment_questions', ['assignment_id']),
+]
+
+
+def query_shapes(class_id, assignment_id):
+    """
+        name -> SQL for the pages' hot queries, built by the same functions the pages call, so
+        the plans are the plans production runs
+    """
+    from toolkits.analytics import student_progress_sql, progress_export_sql, question_stats_sql, gradebook_sql
+
+    created = run_query(f"SELECT created_at FROM hackathon_2025_assignments WHERE id = {assignment_id}")
+    created_at = created.iloc[0]['created_at'] if len(created) > 0 else '1970-01-01 00:00:00'
+    return {
+        'progress students': student_progress_sql(assignment_id, created_at),
+        'progress page': student_progress_sql(assignment_id, created_at, limit=50, active_only=True),
+        'progress export': progress_export_sql(assignment_id, class_id, created_at),
+        'question stats': question_stats_sql(assignment_id, class_id, created_at),
+        'report cells (gradebook)': gradebook_sql(class_id, assignment_id),
+    }
 
-def main():
-    # Load DB connection URL from .env
-    load_dotenv()
-    db_url = os.getenv("IQ_DB_AUTH")
-    if not db_url:
-        raise RuntimeError("IQ_DB_AUTH is not set in the environment")
 
-    # Reflect metadata from the database
-    engine = create_engine(db_url)
-    metadata = MetaData()
-    metadata.reflect(bind=engine)
+_TABLE_RE = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+_CTE_RE = re.compile(r"\b(\w+)\s+AS\s*\(", re.IGNORECASE)
+_NOT_ALIASES = {'where', 'on', 'join', 'left', 'right', 'inner', 'cross', 'group', 'order', 'limit', 'using'}
 
-    # Print schema: tables and their columns
+
+def print_tables(metadata):
     for table_name, table in metadata.tables.items():
         print(f"Table: {table_name}")
         for col in table.columns:
@@ -30,5 +65,193 @@ def main():
         print()
 
 
+def reflect_indexes(engine, tables):
+    """table -> [column lists], primary key first, for every table that exists"""
+    inspector = sqlalchemy.inspect(engine)
+    existing = set(inspector.get_table_names())
+    indexes = {}
+    for table in tables:
+        if table not in existing:
+            continue
+        pk = inspector.get_pk_constraint(table).get('constrained_columns') or []
+        indexes[table] = ([pk] if pk else []) + [ix['column_names'] for ix in inspector.get_indexes(table)]
+    return indexes
+
+
+def covered_prefix(columns, indexes):
+    """Longest leading run of `columns` that some existing index starts with"""
+    best = 0
+    for index_columns in indexes:
+        n = 0
+        while n < len(columns) and n < len(index_columns) and index_columns[n] == columns[n]:
+            n += 1
+        best = max(best, n)
+    return best
+
+
+def index_ddl(table, columns):
+    name = f"ix_{table}_{'_'.join(columns)}"[:64]
+    return f"CREATE INDEX {name} ON {table} ({', '.join(columns)});"
+
+
+def _cte_bodies(sql):
+    """CTE name -> the SQL inside its parentheses"""
+    bodies = {}
+    for match in _CTE_RE.finditer(sql):
+        depth, end = 1, match.end()
+        while end < len(sql) and depth:
+            depth += {'(': 1, ')': -1}.get(sql[end], 0)
+            end += 1
+        bodies[match.group(1)] = sql[match.end():end - 1]
+    return bodies
+
+
+def _aliases(sql, ctes=()):
+    """alias (or bare table name) -> table for every FROM/JOIN of a real table (not a CTE) in `sql`"""
+    aliases = {}
+    for table, alias in _TABLE_RE.findall(sql):
+        if table in ctes:
+            continue
+        aliases[table] = table
+        if alias and alias.lower() not in _NOT_ALIASES:
+            aliases[alias] = table
+    return aliases
+
+
+def _scoped_aliases(sql):
+    """
+        CTE name (None for the outer query) -> its aliases. Scopes can reuse an alias for
+        different things, e.g. `aq` for the table inside one CTE and for that CTE outside it.
+    """
+    bodies = _cte_bodies(sql)
+    outer = sql
+    for body in bodies.values():
+        outer = outer.replace(body, '')
+    scopes = {name: _aliases(body, bodies) for name, body in bodies.items()}
+    scopes[None] = _aliases(outer, bodies)
+    return scopes
+
+
+def explain(sql, dialect):
+    """
+        Problems in the plan as (table, issue) pairs: 'full scan' when a table is read without an
+        index, 'filesort' / 'temporary' when sorting or grouping cannot use one.
+    """
+    scopes = _scoped_aliases(sql)
+    problems = []
+    if dialect == 'sqlite':
+        plan = run_query(f"EXPLAIN QUERY PLAN {sql}")
+        rows = {row['id']: row for row in plan.to_dict('records')}
+        for row in plan.to_dict('records'):
+            detail = row['detail']
+            words = detail.split()
+            # Steps under `MATERIALIZE <cte>` read that CTE's tables
+            scope, parent = None, rows.get(row['parent'])
+            while parent is not None and scope is None:
+                head = parent['detail'].split()
+                if head[0] in ('MATERIALIZE', 'CO-ROUTINE') and len(head) > 1 and head[1] in scopes:
+                    scope = head[1]
+                parent = rows.get(parent['parent'])
+            aliases = scopes[scope]
+            if words[0] in ('SCAN', 'SEARCH') and words[1] in aliases:
+                table = aliases[words[1]]
+                if words[0] == 'SCAN' and 'INDEX' not in detail:
+                    problems.append((table, 'full scan'))
+                elif 'AUTOMATIC' in detail:
+                    problems.append((table, 'no index (temporary index built per query)'))
+            elif detail.startswith('USE TEMP B-TREE FOR ORDER BY'):
+                problems.append((None, 'filesort'))
+            elif detail.startswith('USE TEMP B-TREE'):
+                problems.append((None, 'temporary'))
+    else:
+        # MySQL names the table or alias per row but not its scope, skip aliases that are ambiguous
+        aliases = {}
+        for scope_aliases in scopes.values():
+            for alias, table in scope_aliases.items():
+                aliases[alias] = table if aliases.get(alias, table) == table else None
+        plan = run_query(f"EXPLAIN {sql}")
+        for row in plan.to_dict('records'):
+            table = aliases.get(row.get('table'))
+            extra = row.get('Extra') or ''
+            if table and row.get('type') == 'ALL':
+                problems.append((table, f"full scan (~{row.get('rows')} rows)"))
+            if 'Using filesort' in extra:
+                problems.append((table, 'filesort'))
+            if 'Using temporary' in extra:
+                problems.append((table, 'temporary'))
+    return problems
+
+
+def advise(class_id=1, assignment_id=1):
+    db_url = os.getenv("IQ_DB_AUTH")
+    engine = sqlalchemy.create_engine(db_url)
+    dialect = engine.dialect.name
+    indexes = reflect_indexes(engine, [table for table, _ in HOT_PREDICATES] + ['users', 'questions'])
+    engine.dispose()
+
+    print("Existing indexes")
+    for table, table_indexes in indexes.items():
+        print(f"  {table}")
+        for columns in table_indexes:
+            print(f"    ({', '.join(columns)})")
+        if not table_indexes:
+            print("    none")
+
+    print("\nQuery plans")
+    flagged = set()
+    for name, sql in query_shapes(class_id, assignment_id).items():
+        try:
+            problems = explain(sql, dialect)
+        except Exception as e:
+            print(f"  {name:<32} EXPLAIN failed: {str(e).splitlines()[0]}")
+            continue
+        # Sorts and groupings over CTE or aggregate output have no table an index could fix
+        findings = [(table, issue) for table, issue in problems if table]
+        sorts = ', '.join(sorted({issue for table, issue in problems if not table}))
+        note = f"  (temp b-tree: {sorts})" if sorts else ""
+        print(f"  {name:<32} {'' if findings else 'ok'}{note}")
+        for table, issue in findings:
+            print(f"      {issue} on {table}")
+            flagged.add(table)
+
+    print("\nSuggested indexes")
+    suggestions = []
+    for table, columns in HOT_PREDICATES:
+        if table not in indexes:
+            print(f"  -- {table} does not exist")
+            continue
+        covered = covered_prefix(columns, indexes[table])
+        if covered == len(columns):
+            continue
+        if covered and table not in flagged:
+            # The leading columns already narrow the lookups and the plans show no problem here
+            print(f"  -- {table}: existing indexes cover ({', '.join(columns[:covered])}), enough for the plans above")
+            continue
+        reason = f"existing indexes cover ({', '.join(columns[:covered])})" if covered else "no index on these columns"
+        if table in flagged:
+            reason += ", flagged in query plans"
+        print(f"  -- {table}: {reason}")
+        print(f"  {index_ddl(table, columns)}")
+        suggestions.append(table)
+    if not suggestions:
+        print("  none, every hot predicate is covered")
+    return suggestions
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    # Load DB connection URL from .env
+    load_dotenv()
+
+    if argv and argv[0] == 'indexes':
+        class_id = int(argv[argv.index('--class-id') + 1]) if '--class-id' in argv else 1
+        assignment_id = int(argv[argv.index('--assignment-id') + 1]) if '--assignment-id' in argv else 1
+        advise(class_id, assignment_id)
+        return
+
+    # Reflect metadata from the database and print tables and their columns
+    print_tables(reflect_schema())
+
+
 if __name__ == "__main__":
     main()
@@ -1,16 +1,31 @@
 import dotenv
 dotenv.load_dotenv()
 import streamlit as st
-import pandas as pd
-import requests
-import hashlib
 from datetime import datetime, timedelta
-import plotly.graph_objects as go
-import plotly.express as px
-from toolkits.controllers.users import get_users, get_classes
-from toolkits.db import run_query, execute_query
-from toolkits.email.mail import send_email
-from toolkits.email.templates import get_class_invitation_template, get_assignment_notification_template
+from toolkits.lazy import lazy_import
+from toolkits.controllers.users import get_users, get_classes, get_class_assignments, get_class_members_page
+from toolkits.cache import cached, session_cached, invalidate, show_cache_stats
+from toolkits.db import run_query
+from toolkits.search import question_search, hydrate_questions
+from toolkits.frames import add_progress_columns, options, records
+from toolkits.figures import cached_figure, downsample_bars
+from toolkits.exports import export_options
+from toolkits.analytics import student_progress_sql, progress_summary, progress_export_sql, question_stats_sql, \
+    PROGRESS_EXPORT_TYPES
+from toolkits.ui import timed_fragment, lazy_tabs, lazy_expander, page_size_control, KeysetPager, \
+    show_render_timings, show_job, show_recent_jobs, show_roster_report
+from toolkits.profiling import profiled
+from toolkits import metrics
+from toolkits import jobs, tasks, summaries
+from toolkits.roster import import_roster
+
+# Heavy libraries load on first use, so the login screen and chart-free pages stay fast
+pd = lazy_import('pandas')
+go = lazy_import('plotly.graph_objects')
+px = lazy_import('plotly.express')
+
+# Prometheus /metrics on a side port when IQ_METRICS_PORT is set
+metrics.serve_from_env()
 
 # Page configuration
 st.set_page_config(
@@ -25,17 +40,17 @@ st.markdown("""
 
 """, unsafe_allow_html=True)
 
-def create_signed_link(question_url: str, assignment_id: int, user_email: str) -> str:
-    """Create signed link for question access"""
-    timestamp = int(datetime.now().timestamp())
-    data = f"{question_url}:{assignment_id}:{user_email}:{timestamp}"
-    signature = hashlib.sha256(data.encode()).hexdigest()[:16]
-    
-    # Append parameters correctly based on whether URL already has query params
-    separator = '&' if '?' in question_url else '?'
-    return f"{question_url}{separator}hw={assignment_id}&u={signature}"
+def describe_email_job(result, sent_label):
+    """Outcome of a background email job: {'sent': n, 'failed': {email: error}}"""
+    if result['failed']:
+        st.warning(f"{result['sent']} {sent_label}, {len(result['failed'])} failed.")
+        for email, error in result['failed'].items():
+            st.caption(f"{email}: {error}")
+    else:
+        st.success(f"✅ {result['sent']} {sent_label}!")
 
 
+@profiled
 def show_classes_page(user):
     st.markdown('<h2 class="main-header">📚 My Classes</h2>', unsafe_allow_html=True)
     st.markdown('<p style="color: var(--iq-gray-600); font-size: 1.125rem; margin-bottom: 2rem;">Manage your classes and student rosters</p>', unsafe_allow_html=True)
@@ -51,7 +66,8 @@ def show_classes_page(user):
                 if class_name:
                     try:
                         query = f"INSERT INTO hackathon_2025_instructor_classes (user_id, class_name) VALUES ({user.id}, '{class_name}')"
-                        execute_query(query)
+                        summaries.write([query], owner_id=user.id)
+                        invalidate('classes', user.id)
                         st.success(f"🎉 Class '{class_name}' created successfully!")
                         st.balloons()
                         st.rerun()
@@ -62,7 +78,7 @@ def show_classes_page(user):
     try:
         classes = get_classes(user)
         if len(classes) > 0:
-            for _, class_data in classes.iterrows():
+            for class_data in records(classes):
                 # Use a custom card component
                 card_html = f"""
                 <div class="metric-card" style="margin-bottom: 1rem;">
@@ -83,13 +99,7 @@ def show_classes_page(user):
                         st.write("")  # Spacer
 
                     with col2:
-                        # Get student count
-                        try:
-                            student_count = run_query(f"SELECT COUNT(*) as count FROM hackathon_2025_class_members WHERE class_id = {class_data['id']}")
-                            count = student_count.iloc[0]['count'] if len(student_count) > 0 else 0
-                        except:
-                            count = 0
-                        st.metric("Students", count)
+                        st.metric("Students", int(class_data['student_count']))
 
                     with col3:
                         if st.button("Manage", key=f"manage_{class_data['id']}"):
@@ -100,7 +110,11 @@ def show_classes_page(user):
                     with col4:
                         if st.button("Delete", key=f"delete_{class_data['id']}"):
                             try:
-                                execute_query(f"DELETE FROM hackathon_2025_instructor_classes WHERE id = {class_data['id']}")
+                                summaries.write(
+                                    [f"DELETE FROM hackathon_2025_instructor_classes WHERE id = {class_data['id']}"]
+                                    + summaries.forget_class_sql(class_data['id']),
+                                    owner_id=user.id)
+                                invalidate('classes', user.id)
                                 st.success("Class deleted!")
                                 st.rerun()
                             except Exception as e:
@@ -128,10 +142,11 @@ def show_classes_page(user):
             """
             st.markdown(header_html, unsafe_allow_html=True)
 
-            # Student roster management with tabs
-            tab1, tab2, tab3 = st.tabs(["👥 Students", "📝 Assignments", "📊 Analytics"])
-            
-            with tab1:
+            # Student roster management with tabs, only the selected tab is built
+            tabs = ["👥 Students", "📝 Assignments", "📊 Analytics"]
+            tab = lazy_tabs(tabs, key=f"class_tabs_{selected_class['id']}")
+
+            if tab == tabs[0]:
                 st.markdown("### Student Roster")
                 
                 # Add students with enhanced UI
@@ -146,38 +161,73 @@ def show_classes_page(user):
                         st.write("") # spacer
                         if st.button("Add & Invite", type="primary", use_container_width=True):
                             if student_emails:
-                                emails = [e.strip() for e in student_emails.split('\n') if e.strip()]
                                 try:
-                                    # First validate all emails can be sent before adding any students
-                                    progress_bar = st.progress(0, text="Adding students...")
-                                    for i, email in enumerate(emails):
-                                        # Add to database
-                                        query = f"INSERT INTO hackathon_2025_class_members (class_id, email) VALUES ({selected_class['id']}, '{email}')"
-                                        execute_query(query)
-                                        
-                                        # Send invitation email
-                                        subject = f"🎓 Welcome to {selected_class['class_name']} - Interview Query"
-                                        html_body = get_class_invitation_template(
-                                            class_name=selected_class['class_name'],
-                                            student_email=email,
-                                            instructor_email=user.email
-                                        )
-                                        send_email("noreply@interviewquery.com", email, subject, html_body)
-                                        
-                                        progress_bar.progress((i + 1) / len(emails), text=f"Added {i + 1}/{len(emails)} students")
-                                    
-                                    st.success(f"✅ Added {len(emails)} students and sent invitation emails!")
-                                    st.rerun()
+                                    # Members are added in bulk here, the invitations go out as a background job
+                                    report = import_roster(
+                                        int(selected_class['id']), student_emails,
+                                        invite=(selected_class['class_name'], user.email), owner=user.id)
+                                    invalidate('class_students', selected_class['id'])
+                                    invalidate('classes', user.id)
+                                    st.session_state[f"roster_report_{selected_class['id']}"] = report
+                                    if report['invite_job']:
+                                        st.session_state[f"roster_job_{selected_class['id']}"] = report['invite_job']
                                 except Exception as e:
                                     st.error(f"❌ Error: {str(e)}")
 
+                report = st.session_state.get(f"roster_report_{selected_class['id']}")
+                if report:
+                    show_roster_report(report)
+                show_job(f"roster_job_{selected_class['id']}",
+                         lambda result: describe_email_job(result, "invitations sent"))
+
                 # Display current students with enhanced table
                 try:
-                    students = run_query(f"SELECT * FROM hackathon_2025_class_members WHERE class_id = {selected_class['id']} AND is_active = 1")
+                    col1, col2 = st.columns([1, 2])
+                    with col1:
+                        grid_mode = st.toggle("Compact grid", key=f"roster_grid_{selected_class['id']}")
+                    with col2:
+                        page_size = page_size_control(f"roster_page_size_{selected_class['id']}")
 
-                    if len(students) > 0:
+                    # One page of the roster at a time, fetched with a keyset query
+                    pager = KeysetPager(f"roster_{selected_class['id']}", page_size)
+                    students = session_cached(
+                        'class_students', (selected_class['id'], pager.after, page_size),
+                        lambda: get_class_members_page(selected_class['id'], pager.after, page_size + 1))
+
+                    if len(students) > 0 or pager.page > 1:
                         st.markdown("#### Current Students")
-                        
+                        students = pager.paginate(students, 'id')
+
+                    if grid_mode and len(students) > 0:
+                        roster = students[['id', 'email', 'joined_at']].copy()
+                        roster['status'] = roster['joined_at'].notna().map({True: 'Joined', False: 'Invited'})
+                        selection = st.dataframe(
+                            roster[['email', 'status', 'joined_at']],
+                            hide_index=True,
+                            use_container_width=True,
+                            on_select="rerun",
+                            selection_mode="multi-row",
+                            key=f"roster_grid_select_{selected_class['id']}",
+                            column_config={'email': 'Email', 'status': 'Status', 'joined_at': 'Joined'}
+                        )
+                        students_to_remove = roster['id'].iloc[selection.selection.rows].tolist()
+
+                        if st.button(f"🗑️ Remove Selected ({len(students_to_remove)})",
+                                     disabled=len(students_to_remove) == 0,
+                                     key=f"roster_grid_remove_{selected_class['id']}"):
+                            try:
+                                summaries.write([
+                                    f"UPDATE hackathon_2025_class_members SET is_active = 0 "
+                                    f"WHERE id IN ({', '.join(str(int(i)) for i in students_to_remove)})"
+                                ], class_id=selected_class['id'])
+                                invalidate('class_students', selected_class['id'])
+                                invalidate('classes', user.id)
+                                st.success(f"✅ Successfully removed {len(students_to_remove)} student(s)")
+                                st.rerun()
+                            except Exception as e:
+                                st.error(f"❌ Error removing students: {str(e)}")
+
+                    elif len(students) > 0:
                         # Initialize session state for student selection
                         if 'students_to_remove' not in st.session_state:
                             st.session_state.students_to_remove = set()
@@ -201,7 +251,7 @@ def show_classes_page(user):
                             
                             # Student rows with checkboxes
                             students_to_remove = []
-                            for _, student in students.iterrows():
+                            for student in records(students):
                                 col1, col2, col3, col4 = st.columns([1, 3, 1, 1])
 
                                 with col1:
@@ -238,8 +288,12 @@ def show_classes_page(user):
 
                             if remove_selected and students_to_remove:
                                 try:
-                                    for student_id in students_to_remove:
-                                        execute_query(f"UPDATE hackathon_2025_class_members SET is_active = 0 WHERE id = {student_id}")
+                                    summaries.write([
+                                        f"UPDATE hackathon_2025_class_members SET is_active = 0 "
+                                        f"WHERE id IN ({', '.join(str(int(i)) for i in students_to_remove)})"
+                                    ], class_id=selected_class['id'])
+                                    invalidate('class_students', selected_class['id'])
+                                    invalidate('classes', user.id)
                                     st.success(f"✅ Successfully removed {len(students_to_remove)} student(s)")
                                     st.rerun()
                                 except Exception as e:
@@ -257,14 +311,15 @@ def show_classes_page(user):
                 except Exception as e:
                     st.error(f"❌ Error loading students: {str(e)}")
 
-            with tab2:
+            elif tab == tabs[1]:
                 # View assignments for this class
                 st.markdown("### Class Assignments")
                 try:
-                    assignments = run_query(f"SELECT * FROM hackathon_2025_assignments WHERE class_id = {selected_class['id']} AND is_active = 1 ORDER BY due_date DESC")
+                    assignments = session_cached('class_assignments', selected_class['id'],
+                                                 lambda: get_class_assignments(selected_class['id']))
 
                     if len(assignments) > 0:
-                        for _, assignment in assignments.iterrows():
+                        for assignment in records(assignments):
                             # Enhanced assignment card
                             assignment_card_html = f"""
                             <div class="glass-card" style="margin-bottom: 1rem;">
@@ -297,7 +352,7 @@ def show_classes_page(user):
                 except Exception as e:
                     st.error(f"❌ Error loading assignments: {str(e)}")
 
-            with tab3:
+            elif tab == tabs[2]:
                 st.markdown("### Class Analytics")
                 # Add class analytics here
                 st.info("📊 Analytics coming soon!")
@@ -313,12 +368,16 @@ def show_classes_page(user):
             st.session_state.manage_class = False
 
 
+@profiled
 def show_assignments_page(user):
     st.markdown('<h2 class="main-header">📝 Create Assignment</h2>', unsafe_allow_html=True)
     st.markdown(
         '<p style="color: var(--iq-gray-600); font-size: 1.125rem; margin-bottom: 2rem;">Build custom assignments with Interview Query questions</p>',
         unsafe_allow_html=True)
 
+    # Emails for the last created assignment, sent by a background job
+    show_job('assignment_notify_job', lambda result: describe_email_job(result, "students notified"))
+
     # Initialize session state variables
     if 'assignment_name' not in st.session_state:
         st.session_state.assignment_name = ""
@@ -356,7 +415,7 @@ def show_assignments_page(user):
         col1, col2, col3 = st.columns([2, 2, 1])
 
         with col1:
-            class_options = {row['class_name']: row['id'] for _, row in classes.iterrows()}
+            class_options = options(classes, 'class_name', 'id')
             selected_class_name = st.selectbox("Select Class",
                                                list(class_options.keys()),
                                                key="class_select",
@@ -409,63 +468,13 @@ def show_assignments_page(user):
             st.session_state.show_search_results = True
 
             try:
-                # Use magus semantic search API
+                # Magus semantic search, with the breaker routing to the database search when it's down
                 with st.spinner("Searching for relevant questions..."):
-                    url = "https://magus.interviewquery.com/search"
-                    payload = {
-                        "query": search_query,
-                        "content_types": ["questions"],
-                        "companies": [],
-                        "positions": [],
-                        "limit": 20
-                    }
-
-                    response = requests.post(url, json=payload, timeout=10)
-                    response.raise_for_status()
-
-                    search_data = response.json()
-                    results = search_data.get('results', [])
-
-                    questions = []
-                    if results:
-                        # Get question IDs from search results
-                        question_ids = []
-                        question_urls = {}
-                        for result in results:
-                            content_id = result.get('content_id')
-                            if content_id:
-                                question_ids.append(str(content_id))
-                                question_urls[content_id] = result.get('url', '')
-
-                        # Fetch full question details from database
-                        if question_ids:
-                            ids_str = ','.join(question_ids)
-                            questions_sql = f"""
-                            SELECT id, title, type, level, summary, body_markdown, slug
-                            FROM questions 
-                            WHERE id IN ({ids_str})
-                            AND is_published = 1
-                            """
-                            db_results = run_query(questions_sql)
-
-                            if len(db_results) > 0:
-                                # Create a mapping to preserve search order
-                                id_to_order = {int(qid): idx for idx, qid in enumerate(question_ids)}
-
-                                # Sort results by search relevance
-                                sorted_results = db_results.iloc[
-                                    db_results['id'].map(lambda x: id_to_order.get(x, 999)).argsort()
-                                ]
-
-                                for _, row in sorted_results.iterrows():
-                                    questions.append({
-                                        'id': row['id'],
-                                        'title': row['title'],
-                                        'type': row['type'],
-                                        'level': row['level'],
-                                        'body_markdown': row.get('body_markdown', ''),
-                                        'url': question_urls.get(row['id'], '')
-                                    })
+                    results, source = question_search.search(search_query, limit=20)
+                    if source != 'magus':
+                        st.info("Search service is unavailable, showing database matches instead.")
+
+                    questions = hydrate_questions(results)
 
                     # Store search results in session state
                     st.session_state.search_results = questions
@@ -473,34 +482,9 @@ def show_assignments_page(user):
                     if not questions:
                         st.info(f"No questions found for '{search_query}'. Try different keywords.")
 
-            except requests.RequestException as e:
-                st.error(f"Error connecting to search service: {str(e)}")
-                # Fallback to database search
-                try:
-                    search_sql = f"""
-                    SELECT id, title, type, level, summary, body_markdown
-                    FROM questions 
-                    WHERE (title LIKE '%{search_query}%' OR body_markdown LIKE '%{search_query}%')
-                    AND is_published = 1
-                    LIMIT 20
-                    """
-                    results = run_query(search_sql)
-
-                    questions = []
-                    for _, row in results.iterrows():
-                        questions.append({
-                            'id': row['id'],
-                            'title': row['title'],
-                            'type': row['type'],
-                            'level': row['level'],
-                            'body_markdown': row.get('body_markdown', '')
-                        })
-
-                    st.session_state.search_results = questions
-
-                except Exception as db_error:
-                    st.error(f"Database search error: {str(db_error)}")
-                    st.session_state.search_results = []
+            except Exception as e:
+                st.error(f"Search error: {str(e)}")
+                st.session_state.search_results = []
 
         # Show default questions only if no search has been performed
         elif not st.session_state.show_search_results and not st.session_state.search_results:
@@ -513,17 +497,7 @@ def show_assignments_page(user):
                               """
                 results = run_query(default_sql)
 
-                questions = []
-                for _, row in results.iterrows():
-                    questions.append({
-                        'id': row['id'],
-                        'title': row['title'],
-                        'type': row['type'],
-                        'level': row['level'],
-                        'body_markdown': row['body_markdown']
-                    })
-
-                st.session_state.search_results = questions
+                st.session_state.search_results = records(results, ['id', 'title', 'type', 'level', 'body_markdown'])
 
             except Exception as e:
                 st.error(f"Error loading default questions: {str(e)}")
@@ -619,17 +593,19 @@ def show_assignments_page(user):
 
                     if st.session_state.assignment_name and selected_question_ids:
                         try:
-                            # Insert assignment
-                            insert_query = f"""
-                            INSERT INTO hackathon_2025_assignments (class_id, name, due_date) 
-                            VALUES ({st.session_state.assignment_class_id}, '{st.session_state.assignment_name}', '{st.session_state.assignment_due_date}')
-                            """
-                            execute_query(insert_query)
+                            # Insert the assignment and its questions, the class counters are refreshed in the same transaction
+                            summaries.write(summaries.assignment_sql(
+                                st.session_state.assignment_class_id,
+                                st.session_state.assignment_name,
+                                st.session_state.assignment_due_date,
+                                {q_id: 10 for q_id in selected_question_ids}
+                            ), class_id=st.session_state.assignment_class_id)
+                            invalidate('class_assignments', st.session_state.assignment_class_id)
 
                             # Get the assignment ID
                             assignment_result = run_query(f"""
                             SELECT id FROM hackathon_2025_assignments 
-                            WHERE class_id = {st.session_state.assignment_class_id} AND name = '{st.session_state.assignment_name}' 
+                            WHERE class_id = {st.session_state.assignment_class_id} AND name = '{st.session_state.assignment_name.replace("'", "''")}' 
                             ORDER BY created_at DESC LIMIT 1
                             """)
 
@@ -637,126 +613,19 @@ def show_assignments_page(user):
                                 assignment_id = assignment_result.iloc[0]['id']
 
                                 # Show loading indicator
-                                with st.spinner("Creating assignment and adding questions..."):
-                                    # Insert assignment questions
-                                    for q_id in selected_question_ids:
-                                        question_query = f"""
-                                        INSERT INTO hackathon_2025_assignment_questions (assignment_id, question_id, points) 
-                                        VALUES ({assignment_id}, {q_id}, 10)
-                                        """
-                                        execute_query(question_query)
-
-                                    # Get question details for the assignment
-                                    with st.spinner("Fetching question details..."):
-                                        questions_query = f"""
-                                        SELECT q.id, q.title, q.type, q.level, aq.points
-                                        FROM hackathon_2025_assignment_questions aq
-                                        JOIN questions q ON aq.question_id = q.id
-                                        WHERE aq.assignment_id = {assignment_id}
-                                        """
-                                        assignment_questions = run_query(questions_query)
-
-                                        # Add URLs from session state
-                                        for idx, row in assignment_questions.iterrows():
-                                            q_id = row['id']
-                                            if q_id in st.session_state.selected_questions_dict:
-                                                assignment_questions.at[idx, 'url'] = \
-                                                    st.session_state.selected_questions_dict[q_id].get('url', '')
-
-                                    # Get all students in the class
-                                    with st.spinner("Loading student roster..."):
-                                        students = run_query(f"""
-                                        SELECT email FROM hackathon_2025_class_members 
-                                        WHERE class_id = {st.session_state.assignment_class_id} AND is_active = 1
-                                        """)
-
-                                    # Send emails to all students
-                                    if len(students) > 0:
-                                        email_count = 0
-
-                                        # Prepare question list with links
-                                        question_list = []
-                                        for _, q in assignment_questions.iterrows():
-                                            # Create signed link for each question
-                                            question_url = q.get('url', '')
-                                            if question_url:
-                                                question_link = create_signed_link(question_url, assignment_id,
-                                                                                   "student@university.edu")
-                                            else:
-                                                # Fallback if no URL
-                                                question_link = f"https://www.interviewquery.com/questions/{q['id']}"
-
-                                            question_list.append({
-                                                'id': q['id'],
-                                                'title': q['title'],
-                                                'points': q['points'],
-                                                'link': question_link,
-                                                'difficulty': {1: 'Easy', 2: 'Medium', 3: 'Hard'}.get(q['level'],
-                                                                                                      'Medium')
-                                            })
-
-                                        # Send emails with progress bar
-                                        progress_bar = st.progress(0, text="Sending emails to students...")
-
-                                        for idx, (_, student) in enumerate(students.iterrows()):
-                                            try:
-                                                # Update question links for this specific student
-                                                student_questions = []
-                                                for q in question_list:
-                                                    q_url = st.session_state.selected_questions_dict.get(q['id'],
-                                                                                                         {}).get(
-                                                        'url', '')
-                                                    if q_url:
-                                                        student_link = create_signed_link(q_url, assignment_id,
-                                                                                          student['email'])
-                                                    else:
-                                                        # Query the questions table for the slug
-                                                        slug_query = f"SELECT slug FROM questions WHERE id = {q['id']}"
-                                                        slug_result = run_query(slug_query)
-                                                        
-                                                        if not slug_result.empty and slug_result.iloc[0]['slug']:
-                                                            # Use the slug to create proper URL
-                                                            q_url = f"https://www.interviewquery.com/questions/{slug_result.iloc[0]['slug']}"
-                                                            student_link = create_signed_link(q_url, assignment_id,
-                                                                                              student['email'])
-                                                        else:
-                                                            # Final fallback - use question ID
-                                                            student_link = f"https://www.interviewquery.com/questions/{q['id']}"
-
-                                                    student_questions.append({
-                                                        'title': q['title'],
-                                                        'points': q['points'],
-                                                        'link': student_link,
-                                                        'difficulty': q['difficulty']
-                                                    })
-
-                                                subject = f"📚 New Assignment: {st.session_state.assignment_name}"
-                                                html_body = get_assignment_notification_template(
-                                                    assignment_name=st.session_state.assignment_name,
-                                                    class_name=st.session_state.assignment_class_name,
-                                                    due_date=str(st.session_state.assignment_due_date),
-                                                    question_count=len(selected_question_ids),
-                                                    student_email=student['email'],
-                                                    questions=student_questions
-                                                )
-                                                send_email("noreply@interviewquery.com", student['email'], subject,
-                                                           html_body)
-                                                email_count += 1
-
-                                                # Update progress
-                                                progress = (idx + 1) / len(students)
-                                                progress_bar.progress(progress,
-                                                                      text=f"Sent {email_count}/{len(students)} emails...")
-
-                                            except Exception as email_error:
-                                                st.warning(
-                                                    f"Failed to send email to {student['email']}: {str(email_error)}")
-
-                                        st.success(
-                                            f"Assignment '{st.session_state.assignment_name}' created with {len(selected_question_ids)} questions! Notified {email_count} students.")
-                                    else:
-                                        st.success(
-                                            f"Assignment '{st.session_state.assignment_name}' created with {len(selected_question_ids)} questions!")
+                                with st.spinner("Queueing student notifications..."):
+                                    # Student emails go out from a background job, polled at the top of the page
+                                    st.session_state.assignment_notify_job = jobs.submit(
+                                        tasks.notify_assignment,
+                                        int(assignment_id),
+                                        int(st.session_state.assignment_class_id),
+                                        st.session_state.assignment_name,
+                                        st.session_state.assignment_class_name,
+                                        str(st.session_state.assignment_due_date),
+                                        {qid: q.get('url', '') for qid, q in st.session_state.selected_questions_dict.items()},
+                                        owner=user.id, kind='assignment emails')
+                                    st.success(
+                                        f"Assignment '{st.session_state.assignment_name}' created with {len(selected_question_ids)} questions! Notifying students...")
 
                                     # Clear selections and reset state
                                     st.session_state.selected_questions_dict = {}
@@ -789,6 +658,130 @@ def show_assignments_page(user):
     except Exception as e:
         st.error(f"Error loading assignments page: {str(e)}")
 
+@cached('progress', ttl=60, scope=lambda assignment_id, assignment_created_at: assignment_id)
+def load_assignment_progress(assignment_id, assignment_created_at):
+    """One row per active student with completed questions and points for the assignment"""
+    return run_query(student_progress_sql(assignment_id, assignment_created_at))
+
+
+@cached('progress', ttl=60, scope=lambda assignment_id, *args, **kwargs: assignment_id)
+def load_progress_page(assignment_id, assignment_created_at, after_email=None, limit=50, active_only=False):
+    """One page of students ordered by email, see `student_progress_sql`"""
+    return run_query(student_progress_sql(assignment_id, assignment_created_at, after_email, limit, active_only))
+
+
+@cached('progress', ttl=60, scope=lambda assignment_id, class_id, assignment_created_at: assignment_id)
+def load_question_stats(assignment_id, class_id, assignment_created_at):
+    """Per-question completed/attempting counts across the class"""
+    return run_query(question_stats_sql(assignment_id, class_id, assignment_created_at))
+
+
+@cached('progress', ttl=60, scope=lambda assignment_id, user_id, assignment_created_at: assignment_id)
+def load_student_question_details(assignment_id, user_id, assignment_created_at):
+    """Question-by-question status for one student"""
+    question_detail_query = f"""
+    SELECT 
+        q.title as question_title,
+        q.type as question_type,
+        q.level as difficulty,
+        aq.points,
+        CASE 
+            WHEN q.type IN ('sql', 'python', 'algorithms') THEN
+                CASE
+                    WHEN ucr.is_accepted = 1 THEN 'Completed'
+                    WHEN ucr.is_submitted = 1 THEN 'Attempted'
+                    ELSE 'Not Started'
+                END
+            ELSE
+                CASE
+                    WHEN ts.score >= 7 THEN 'Completed'
+                    WHEN ts.score > 0 THEN 'Attempted'
+                    ELSE 'Not Started'
+                END
+        END as status,
+        CASE
+            WHEN q.type IN ('sql', 'python', 'algorithms') THEN ucr.is_accepted
+            ELSE ts.score
+        END as score,
+        COALESCE(ucr.created_at, ts.created_at) as last_submission
+    FROM hackathon_2025_assignment_questions aq
+    JOIN questions q ON aq.question_id = q.id
+    LEFT JOIN (
+        SELECT user_id, question_id, MAX(is_accepted) as is_accepted, MAX(is_submitted) as is_submitted, MAX(created_at) as created_at
+        FROM user_code_runs
+        GROUP BY user_id, question_id
+    ) ucr ON ucr.user_id = {user_id if user_id else 'NULL'}
+        AND ucr.question_id = aq.question_id
+        AND ucr.created_at >= '{assignment_created_at}'
+    LEFT JOIN (
+        SELECT user_id, question_id, MAX(score) as score, MAX(created_at) as created_at
+        FROM text_submissions
+        GROUP BY user_id, question_id
+    ) ts ON ts.user_id = {user_id if user_id else 'NULL'}
+        AND ts.question_id = aq.question_id
+        AND ts.created_at >= '{assignment_created_at}'
+    WHERE aq.assignment_id = {assignment_id}
+    ORDER BY q.title
+    """
+    return run_query(question_detail_query)
+
+
+def load_progress_export(assignment_id, class_id, assignment_created_at):
+    """Student x question rows for the detailed CSV export"""
+    return run_query(progress_export_sql(assignment_id, class_id, assignment_created_at))
+
+
+def student_completion_figure(student_completion):
+    fig = px.bar(
+        student_completion,
+        x='progress_pct',
+        y='email',
+        orientation='h',
+        title='Student Completion Rates',
+        labels={'progress_pct': 'Completion %', 'email': 'Student'},
+        color='progress_pct',
+        color_continuous_scale='viridis'
+    )
+    fig.update_layout(height=400)
+    return fig
+
+
+def difficulty_completion_figure(question_stats):
+    fig = go.Figure()
+
+    colors = {1: 'green', 2: 'yellow', 3: 'red'}
+    difficulty_names = {1: 'Easy', 2: 'Medium', 3: 'Hard'}
+
+    for difficulty in [1, 2, 3]:
+        df_filtered = question_stats[question_stats['difficulty'] == difficulty]
+        if len(df_filtered) > 0:
+            completion_rates = (df_filtered['students_completed'] / df_filtered['total_students'] * 100)
+            fig.add_trace(go.Bar(
+                name=difficulty_names[difficulty],
+                x=df_filtered['question_title'],
+                y=completion_rates,
+                marker_color=colors.get(difficulty, 'gray')
+            ))
+
+    fig.update_layout(
+        title='Question Completion by Difficulty',
+        xaxis_title='Question',
+        yaxis_title='Completion Rate (%)',
+        barmode='group',
+        height=400
+    )
+    return fig
+
+
+def progress_distribution_figure(bin_counts):
+    return px.pie(
+        values=bin_counts.values,
+        names=bin_counts.index,
+        title='Student Progress Distribution'
+    )
+
+
+@profiled
 def show_progress_page(user):
     st.markdown('<h2 class="main-header">📊 Student Progress Tracking</h2>', unsafe_allow_html=True)
     st.markdown('<p style="color: var(--iq-gray-600); font-size: 1.125rem; margin-bottom: 2rem;">Monitor student performance and track assignment completion</p>', unsafe_allow_html=True)
@@ -801,30 +794,20 @@ def show_progress_page(user):
             return
 
         # Class selection
-        class_options = {row['class_name']: row['id'] for _, row in classes.iterrows()}
+        class_options = options(classes, 'class_name', 'id')
         selected_class_name = st.selectbox("Select Class", list(class_options.keys()))
         selected_class_id = class_options[selected_class_name]
 
         # Get assignments for selected class
-        assignments_query = f"""
-        SELECT a.*, 
-               (SELECT COUNT(DISTINCT aq.question_id) 
-                FROM hackathon_2025_assignment_questions aq 
-                WHERE aq.assignment_id = a.id) as question_count
-        FROM hackathon_2025_assignments a
-        WHERE a.class_id = {selected_class_id} 
-        AND a.is_active = 1
-        ORDER BY a.due_date DESC
-        """
-        assignments = run_query(assignments_query)
+        assignments = get_class_assignments(selected_class_id)
 
         if len(assignments) == 0:
             st.info("No assignments found for this class.")
             return
 
         # Assignment selection
-        assignment_options = {f"{row['name']} (Due: {row['due_date']})" : row['id']
-                            for _, row in assignments.iterrows()}
+        assignment_labels = assignments['name'] + " (Due: " + assignments['due_date'].map(str) + ")"
+        assignment_options = dict(zip(assignment_labels, assignments['id']))
         selected_assignment_display = st.selectbox("Select Assignment", list(assignment_options.keys()))
         selected_assignment_id = assignment_options[selected_assignment_display]
 
@@ -845,620 +828,320 @@ def show_progress_page(user):
 
         st.divider()
 
-        # Get student progress data
-        # Get student progress data
-        progress_query = f"""
-                WITH assignment_questions AS (
-                    SELECT question_id, points
-                    FROM hackathon_2025_assignment_questions
-                    WHERE assignment_id = {selected_assignment_id}
-                ),
-                -- Step 2: Get students in the class (via assignment → class → members → users)
-                class_students AS (
-                    SELECT
-                        cm.email,
-                        u.id as user_id,
-                        u.first_name,
-                        u.last_name,
-                        u.created_at as joined_at
-                    FROM hackathon_2025_assignments a
-                    JOIN hackathon_2025_class_members cm ON a.class_id = cm.class_id
-                    JOIN users u ON cm.email = u.email
-                    WHERE a.id = {selected_assignment_id}
-                        AND cm.is_active = 1
-                )
-                -- Step 3: For each (student, question) pair, check completion
-                SELECT
-                    cs.email,
-                    cs.user_id,
-                    cs.joined_at,
-                    CONCAT(COALESCE(cs.first_name, ''), ' ', COALESCE(cs.last_name, '')) as student_name,
-                    COUNT(aq.question_id) as total_questions,
-                    SUM(
-                        CASE
-                            WHEN q.type IN ('sql', 'python', 'algorithms') THEN
-                                CASE WHEN EXISTS (
-                                    SELECT 1 FROM user_code_runs ucr
-                                    WHERE ucr.user_id = cs.user_id
-                                    AND ucr.question_id = aq.question_id
-                                    AND ucr.is_accepted = 1
-                                    AND ucr.created_at >= '{assignment['created_at']}'
-                                ) THEN 1 ELSE 0 END
-                            ELSE
-                                CASE WHEN EXISTS (
-                                    SELECT 1 FROM text_submissions ts
-                                    WHERE ts.user_id = cs.user_id
-                                    AND ts.question_id = aq.question_id
-                                    AND ts.score >= 8
-                                    AND ts.created_at >= '{assignment['created_at']}'
-                                ) THEN 1 ELSE 0 END
-                        END
-                    ) as completed_questions,
-                    SUM(
-                        CASE
-                            WHEN q.type IN ('sql', 'python', 'algorithms') THEN
-                                CASE WHEN EXISTS (
-                                    SELECT 1 FROM user_code_runs ucr
-                                    WHERE ucr.user_id = cs.user_id
-                                    AND ucr.question_id = aq.question_id
-                                    AND ucr.is_accepted = 1
-                                    AND ucr.created_at >= '{assignment['created_at']}'
-                                ) THEN aq.points ELSE 0 END
-                            ELSE
-                                CASE WHEN EXISTS (
-                                    SELECT 1 FROM text_submissions ts
-                                    WHERE ts.user_id = cs.user_id
-                                    AND ts.question_id = aq.question_id
-                                    AND ts.score >= 8
-                                    AND ts.created_at >= '{assignment['created_at']}'
-                                ) THEN aq.points ELSE 0 END
-                        END
-                    ) as points_earned,
-                    SUM(aq.points) as total_points
-                FROM class_students cs
-                CROSS JOIN assignment_questions aq
-                JOIN questions q ON q.id = aq.question_id
-                GROUP BY cs.email, cs.user_id, cs.joined_at, cs.first_name, cs.last_name
-                ORDER BY completed_questions DESC, cs.email
-                """
+        # Each panel is a fragment that loads its own (cached) data, so a widget inside
+        # one panel only reruns that panel
         try:
-            progress_data = run_query(progress_query)
+            summary = progress_summary(selected_assignment_id, assignment['created_at'])
+        except Exception as e:
+            st.error(f"Error loading progress data: {str(e)}")
+            return
 
-            if len(progress_data) > 0:
-                # Summary metrics
-                st.markdown("### 📈 Class Overview")
+        if summary['total_students'] == 0:
+            st.warning("No student data found for this assignment.")
+            return
 
-                total_students = len(progress_data)
-                students_started = len(progress_data[progress_data['completed_questions'] > 0])
-                students_completed = len(progress_data[progress_data['completed_questions'] == progress_data['total_questions']])
-                avg_completion = progress_data['completed_questions'].sum() / (progress_data['total_questions'].sum() or 1) * 100
+        show_progress_overview(assignment)
+        st.divider()
+        show_question_overview(assignment, selected_class_id)
+        st.divider()
+        show_individual_progress(assignment)
+        show_progress_exports(assignment, selected_class_id, selected_class_name)
 
-                col1, col2, col3, col4 = st.columns(4)
-                with col1:
-                    st.metric("Total Students", total_students)
-                with col2:
-                    st.metric("Started", f"{students_started} ({students_started/total_students*100:.0f}%)")
-                with col3:
-                    st.metric("Completed", f"{students_completed} ({students_completed/total_students*100:.0f}%)")
-                with col4:
-                    st.metric("Avg Progress", f"{avg_completion:.0f}%")
+    except Exception as e:
+        st.error(f"Error loading progress page: {str(e)}")
 
-                st.divider()
 
-                # Question completion summary
-                st.markdown("### 📝 Question Completion Overview")
-
-                # Initialize question_stats variable
-                question_stats = pd.DataFrame()
-
-                # Get question completion stats
-                # Get question completion stats
-                question_stats_query = f"""
-                                SELECT 
-                                    q.title as question_title,
-                                    q.type as question_type,
-                                    q.level as difficulty,
-                                    aq.points,
-                                    COUNT(DISTINCT u.id) as total_students,
-                                    COUNT(DISTINCT CASE 
-                                        WHEN q.type IN ('sql', 'python', 'algorithms') AND ucr.is_accepted = 1 THEN u.id
-                                        WHEN q.type NOT IN ('sql', 'python', 'algorithms') AND ts.score >= 8 THEN u.id
-                                    END) as students_completed,
-                                    COUNT(DISTINCT CASE 
-                                        WHEN q.type IN ('sql', 'python', 'algorithms') AND ucr.is_submitted = 1 AND ucr.is_accepted = 0 THEN u.id
-                                        WHEN q.type NOT IN ('sql', 'python', 'algorithms') AND ts.score > 0 AND ts.score < 8 THEN u.id
-                                    END) as students_attempted
-                                FROM hackathon_2025_assignment_questions aq
-                                JOIN questions q ON aq.question_id = q.id
-                                CROSS JOIN hackathon_2025_class_members cm
-                                INNER JOIN users u ON cm.email = u.email
-                                LEFT JOIN user_code_runs ucr ON ucr.user_id = u.id
-                                    AND ucr.question_id = aq.question_id
-                                    AND ucr.created_at >= '{assignment['created_at']}'
-                                    AND ucr.is_submitted = 1
-                                LEFT JOIN text_submissions ts ON ts.user_id = u.id
-                                    AND ts.question_id = aq.question_id
-                                    AND ts.created_at >= '{assignment['created_at']}'
-                                WHERE aq.assignment_id = {selected_assignment_id}
-                                    AND cm.class_id = {selected_class_id}
-                                    AND cm.is_active = 1
-                                GROUP BY q.id, q.title, q.type, q.level, aq.points
-                                ORDER BY q.title
-                                """
+@timed_fragment("Class overview")
+def show_progress_overview(assignment):
+    summary = progress_summary(assignment['id'], assignment['created_at'])
 
-                try:
-                    question_stats = run_query(question_stats_query)
+    # Summary metrics
+    st.markdown("### 📈 Class Overview")
 
-                    if len(question_stats) > 0:
-                        for _, q in question_stats.iterrows():
-                            with st.container():
-                                q_col1, q_col2, q_col3, q_col4, q_col5 = st.columns([3, 1, 1, 2, 1])
+    total_students = summary['total_students']
+    students_started = summary['students_started']
+    students_completed = summary['students_completed']
+    avg_completion = summary['avg_completion']
 
-                                with q_col1:
-                                    st.write(f"**{q['question_title']}**")
-                                    st.caption(f"Type: {q['question_type']} | {q['points']} points")
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Total Students", total_students)
+    with col2:
+        st.metric("Started", f"{students_started} ({students_started/total_students*100:.0f}%)")
+    with col3:
+        st.metric("Completed", f"{students_completed} ({students_completed/total_students*100:.0f}%)")
+    with col4:
+        st.metric("Avg Progress", f"{avg_completion:.0f}%")
 
-                                with q_col2:
-                                    difficulty_map = {1: '🟢 Easy', 2: '🟡 Medium', 3: '🔴 Hard'}
-                                    st.write(difficulty_map.get(q['difficulty'], 'Unknown'))
 
-                                with q_col3:
-                                    completion_rate = (q['students_completed'] / q['total_students'] * 100) if q['total_students'] > 0 else 0
-                                    st.metric("Completed", f"{q['students_completed']}/{q['total_students']}")
 
-                                with q_col4:
-                                    # Custom progress bar with Interview Query styling
-                                    progress_html = f"""
-                                    <div class="progress-container">
-                                        <div class="progress-fill" style="width: {completion_rate:.0f}%;"></div>
-                                    </div>
-                                    <small style="color: var(--iq-gray-600); font-weight: 500;">{completion_rate:.0f}% completion rate</small>
-                                    """
-                                    st.markdown(progress_html, unsafe_allow_html=True)
+@timed_fragment("Question overview")
+def show_question_overview(assignment, class_id):
+    # Question completion summary
+    st.markdown("### 📝 Question Completion Overview")
 
-                                with q_col5:
-                                    if q['students_attempted'] > 0:
-                                        st.caption(f"🔄 {q['students_attempted']} attempting")
+    try:
+        question_stats = load_question_stats(assignment['id'], class_id, assignment['created_at'])
 
-                            st.divider()
+        if len(question_stats) > 0:
+            for q in records(question_stats):
+                with st.container():
+                    q_col1, q_col2, q_col3, q_col4, q_col5 = st.columns([3, 1, 1, 2, 1])
 
-                except Exception as e:
-                    st.error(f"Error loading question statistics: {str(e)}")
+                    with q_col1:
+                        st.write(f"**{q['question_title']}**")
+                        st.caption(f"Type: {q['question_type']} | {q['points']} points")
 
-                st.divider()
+                    with q_col2:
+                        difficulty_map = {1: '🟢 Easy', 2: '🟡 Medium', 3: '🔴 Hard'}
+                        st.write(difficulty_map.get(q['difficulty'], 'Unknown'))
 
-                # Individual student progress
-                st.markdown("### 👥 Individual Progress")
+                    with q_col3:
+                        completion_rate = (q['students_completed'] / q['total_students'] * 100) if q['total_students'] > 0 else 0
+                        st.metric("Completed", f"{q['students_completed']}/{q['total_students']}")
 
-                # Add progress bar column
-                progress_data['progress_pct'] = (progress_data['completed_questions'] / progress_data['total_questions'] * 100).fillna(0)
-                progress_data['status'] = progress_data.apply(
-                    lambda x: '✅ Complete' if x['progress_pct'] == 100
-                    else '🟡 In Progress' if x['progress_pct'] > 0
-                    else '⚪ Not Started', axis=1
-                )
+                    with q_col4:
+                        # Custom progress bar with Interview Query styling
+                        progress_html = f"""
+                        <div class="progress-container">
+                            <div class="progress-fill" style="width: {completion_rate:.0f}%;"></div>
+                        </div>
+                        <small style="color: var(--iq-gray-600); font-weight: 500;">{completion_rate:.0f}% completion rate</small>
+                        """
+                        st.markdown(progress_html, unsafe_allow_html=True)
 
-                # Display options
-                col1, col2 = st.columns([1, 3])
-                with col1:
-                    show_only_active = st.checkbox("Show only active students", value=True)
-
-                # Filter data
-                display_data = progress_data
-                if show_only_active:
-                    display_data = progress_data[progress_data['completed_questions'] > 0]
-
-                # Display student progress
-                for _, student in display_data.iterrows():
-                    with st.container():
-                        col1, col2, col3, col4, col5 = st.columns([3, 1, 1, 2, 1])
-
-                        with col1:
-                            student_name = student['student_name'].strip() if student['student_name'] else ""
-                            if not student_name or student_name == " ":
-                                student_name = student['email']
-                            st.write(f"**{student_name}**")
-                            st.caption(student['email'])
-
-                        with col2:
-                            # Map status to CSS class
-                            status_class_map = {
-                                '✅ Complete': 'status-complete',
-                                '🟡 In Progress': 'status-progress',
-                                '⚪ Not Started': 'status-notstarted'
-                            }
-                            status_class = status_class_map.get(student['status'], 'status-notstarted')
-                            status_text = student['status'].replace('✅ ', '').replace('🟡 ', '').replace('⚪ ', '')
-
-                            status_html = f'<span class="status-pill {status_class}">{status_text}</span>'
-                            st.markdown(status_html, unsafe_allow_html=True)
-
-                        with col3:
-                            st.write(f"{student['completed_questions']}/{student['total_questions']} done")
-
-                        with col4:
-                            # Custom progress bar with Interview Query styling
-                            progress_html = f"""
-                            <div class="progress-container">
-                                <div class="progress-fill" style="width: {student['progress_pct']:.0f}%;"></div>
-                            </div>
-                            <small style="color: var(--iq-gray-600); font-weight: 500;">{student['progress_pct']:.0f}%</small>
-                            """
-                            st.markdown(progress_html, unsafe_allow_html=True)
+                    with q_col5:
+                        if q['students_attempted'] > 0:
+                            st.caption(f"🔄 {q['students_attempted']} attempting")
 
-                        with col5:
-                            if student['total_points'] > 0:
-                                st.write(f"🏆 {student['points_earned']}/{student['total_points']}")
+                st.divider()
 
-                        # Expandable section to show individual question status
-                        with st.expander("View Question Details"):
-                            # Get detailed question status for this student
-                            question_detail_query = f"""
-                            SELECT 
-                                q.title as question_title,
-                                q.type as question_type,
-                                q.level as difficulty,
-                                aq.points,
-                                CASE 
-                                    WHEN q.type IN ('sql', 'python', 'algorithms') THEN
-                                        CASE
-                                            WHEN ucr.is_accepted = 1 THEN 'Completed'
-                                            WHEN ucr.is_submitted = 1 THEN 'Attempted'
-                                            ELSE 'Not Started'
-                                        END
-                                    ELSE
-                                        CASE
-                                            WHEN ts.score >= 7 THEN 'Completed'
-                                            WHEN ts.score > 0 THEN 'Attempted'
-                                            ELSE 'Not Started'
-                                        END
-                                END as status,
-                                CASE
-                                    WHEN q.type IN ('sql', 'python', 'algorithms') THEN ucr.is_accepted
-                                    ELSE ts.score
-                                END as score,
-                                COALESCE(ucr.created_at, ts.created_at) as last_submission
-                            FROM hackathon_2025_assignment_questions aq
-                            JOIN questions q ON aq.question_id = q.id
-                            LEFT JOIN (
-                                SELECT user_id, question_id, MAX(is_accepted) as is_accepted, MAX(is_submitted) as is_submitted, MAX(created_at) as created_at
-                                FROM user_code_runs
-                                GROUP BY user_id, question_id
-                            ) ucr ON ucr.user_id = {student['user_id'] if student['user_id'] else 'NULL'}
-                                AND ucr.question_id = aq.question_id
-                                AND ucr.created_at >= '{assignment['created_at']}'
-                            LEFT JOIN (
-                                SELECT user_id, question_id, MAX(score) as score, MAX(created_at) as created_at
-                                FROM text_submissions
-                                GROUP BY user_id, question_id
-                            ) ts ON ts.user_id = {student['user_id'] if student['user_id'] else 'NULL'}
-                                AND ts.question_id = aq.question_id
-                                AND ts.created_at >= '{assignment['created_at']}'
-                            WHERE aq.assignment_id = {selected_assignment_id}
-                            ORDER BY q.title
-                            """
+    except Exception as e:
+        st.error(f"Error loading question statistics: {str(e)}")
 
-                            try:
-                                question_details = run_query(question_detail_query)
-
-                                if len(question_details) > 0:
-                                    # Create columns for question details
-                                    for _, q in question_details.iterrows():
-                                        q_col1, q_col2, q_col3, q_col4 = st.columns([3, 1, 1, 1])
-
-                                        with q_col1:
-                                            st.write(f"📝 {q['question_title']}")
-
-                                        with q_col2:
-                                            difficulty_map = {1: '🟢 Easy', 2: '🟡 Medium', 3: '🔴 Hard'}
-                                            st.write(difficulty_map.get(q['difficulty'], 'Unknown'))
-
-                                        with q_col3:
-                                            status_emoji = {
-                                                'Completed': '✅',
-                                                'Attempted': '🔄',
-                                                'Text Submitted': '📝',
-                                                'Not Started': '⚪'
-                                            }
-                                            # Display status with score if available
-                                            status_display = f"{status_emoji.get(q['status'], '')} {q['status']}"
-                                            
-                                            # Add score information
-                                            if q['score'] is not None:
-                                                if q['question_type'] in ['sql', 'python', 'algorithms']:
-                                                    # For coding questions, show checkmark or X
-                                                    if q['score'] == 1:
-                                                        status_display += " ✓"
-                                                else:
-                                                    # For text questions, show percentage score
-                                                    status_display += f" ({q['score']*100:.0f}%)"
-                                            
-                                            st.write(status_display)
-
-                                        with q_col4:
-                                            if q['last_submission']:
-                                                st.caption(f"Last: {pd.to_datetime(q['last_submission']).strftime('%m/%d %I:%M %p')}")
-                                            else:
-                                                st.caption("No submission")
-
-                                else:
-                                    st.info("No questions found for this assignment")
 
-                            except Exception as e:
-                                st.error(f"Error loading question details: {str(e)}")
+@timed_fragment("Individual progress")
+def show_individual_progress(assignment):
+    # Individual student progress
+    st.markdown("### 👥 Individual Progress")
 
-                        st.divider()
+    # Display options
+    col1, col2, col3 = st.columns([1, 1, 2])
+    with col1:
+        show_only_active = st.checkbox("Show only active students", value=True)
+    with col2:
+        grid_mode = st.toggle("Compact grid", key="progress_grid_mode")
+    with col3:
+        page_size = page_size_control("progress_page_size")
+
+    # Only one page of students is queried and rendered, whatever the class size
+    pager = KeysetPager(f"progress_{assignment['id']}", page_size, reset_on=show_only_active)
+    page = load_progress_page(assignment['id'], assignment['created_at'], pager.after, page_size + 1, show_only_active)
+    display_data = add_progress_columns(pager.paginate(page, 'email'))
+
+    if len(display_data) == 0:
+        st.info("No students to show.")
+        return
+
+    if grid_mode:
+        st.dataframe(
+            display_data[['student_name', 'email', 'status', 'completed_questions', 'total_questions',
+                          'progress_pct', 'points_earned', 'total_points']],
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                'student_name': 'Student',
+                'email': 'Email',
+                'status': 'Status',
+                'completed_questions': 'Done',
+                'total_questions': 'Questions',
+                'progress_pct': st.column_config.ProgressColumn('Progress', format='%.0f%%', min_value=0, max_value=100),
+                'points_earned': 'Points',
+                'total_points': 'Total Points'
+            }
+        )
+        return
+
+    # Display student progress
+    for student in records(display_data):
+        with st.container():
+            col1, col2, col3, col4, col5 = st.columns([3, 1, 1, 2, 1])
 
-                # Export options
-                st.markdown("### 📤 Export Options")
+            with col1:
+                st.write(f"**{student['display_name']}**")
+                st.caption(student['email'])
 
-                col1, col2, col3 = st.columns(3)
+            with col2:
+                status_html = f'<span class="status-pill {student["status_class"]}">{student["status_text"]}</span>'
+                st.markdown(status_html, unsafe_allow_html=True)
 
-                with col1:
-                    # CSV export with detailed question breakdown
-                    export_query = f"""
-                    SELECT 
-                        cm.email,
-                        CONCAT(COALESCE(u.first_name, ''), ' ', COALESCE(u.last_name, '')) as student_name,
-                        q.title as question_title,
-                        q.type as question_type,
-                        q.level as difficulty,
-                        aq.points,
-                        CASE 
-                            WHEN ucr.is_accepted = 1 THEN 'Completed'
-                            WHEN ucr.is_submitted = 1 THEN 'Attempted'
-                            WHEN ts.id IS NOT NULL THEN 'Text Submitted'
-                            ELSE 'Not Started'
-                        END as status,
-                        COALESCE(ucr.created_at, ts.created_at) as submission_time
-                    FROM hackathon_2025_class_members cm
-                    LEFT JOIN users u ON cm.user_id = u.id
-                    CROSS JOIN hackathon_2025_assignment_questions aq
-                    JOIN questions q ON aq.question_id = q.id
-                    LEFT JOIN user_code_runs ucr ON ucr.user_id = cm.user_id
-                        AND ucr.question_id = aq.question_id
-                        AND ucr.created_at >= '{assignment['created_at']}'
-                        AND ucr.is_submitted = 1
-                    LEFT JOIN text_submissions ts ON ts.user_id = cm.user_id
-                        AND ts.question_id = aq.question_id
-                        AND ts.created_at >= '{assignment['created_at']}'
-                    WHERE cm.class_id = {selected_class_id}
-                        AND cm.is_active = 1
-                        AND aq.assignment_id = {selected_assignment_id}
-                    ORDER BY cm.email, q.title
-                    """
+            with col3:
+                st.write(f"{student['completed_questions']}/{student['total_questions']} done")
 
+            with col4:
+                # Custom progress bar with Interview Query styling
+                progress_html = f"""
+                <div class="progress-container">
+                    <div class="progress-fill" style="width: {student['progress_pct']:.0f}%;"></div>
+                </div>
+                <small style="color: var(--iq-gray-600); font-weight: 500;">{student['progress_pct']:.0f}%</small>
+                """
+                st.markdown(progress_html, unsafe_allow_html=True)
+
+            with col5:
+                if student['total_points'] > 0:
+                    st.write(f"🏆 {student['points_earned']}/{student['total_points']}")
+
+            # Question status is only queried once the section is opened
+            details_key = f"details_{assignment['id']}_{student['email']}"
+            if lazy_expander("View Question Details", key=details_key):
+                with st.container(border=True):
                     try:
-                        export_data = run_query(export_query)
-                        csv = export_data.to_csv(index=False)
-                        st.download_button(
-                            label="📊 Download Detailed CSV",
-                            data=csv,
-                            file_name=f"{assignment['name']}_detailed_progress_{pd.Timestamp.now().strftime('%Y%m%d')}.csv",
-                            mime="text/csv"
-                        )
+                        question_details = session_cached(
+                            'progress', (assignment['id'], student['email']),
+                            lambda: load_student_question_details(assignment['id'], student['user_id'], assignment['created_at']))
+
+                        if len(question_details) > 0:
+                            # Create columns for question details
+                            for q in records(question_details):
+                                q_col1, q_col2, q_col3, q_col4 = st.columns([3, 1, 1, 1])
+
+                                with q_col1:
+                                    st.write(f"📝 {q['question_title']}")
+
+                                with q_col2:
+                                    difficulty_map = {1: '🟢 Easy', 2: '🟡 Medium', 3: '🔴 Hard'}
+                                    st.write(difficulty_map.get(q['difficulty'], 'Unknown'))
+
+                                with q_col3:
+                                    status_emoji = {
+                                        'Completed': '✅',
+                                        'Attempted': '🔄',
+                                        'Text Submitted': '📝',
+                                        'Not Started': '⚪'
+                                    }
+                                    # Display status with score if available
+                                    status_display = f"{status_emoji.get(q['status'], '')} {q['status']}"
+
+                                    # Add score information
+                                    if q['score'] is not None:
+                                        if q['question_type'] in ['sql', 'python', 'algorithms']:
+                                            # For coding questions, show checkmark or X
+                                            if q['score'] == 1:
+                                                status_display += " ✓"
+                                        else:
+                                            # For text questions, show percentage score
+                                            status_display += f" ({q['score']*100:.0f}%)"
+
+                                    st.write(status_display)
+
+                                with q_col4:
+                                    if q['last_submission']:
+                                        st.caption(f"Last: {pd.to_datetime(q['last_submission']).strftime('%m/%d %I:%M %p')}")
+                                    else:
+                                        st.caption("No submission")
+
+                        else:
+                            st.info("No questions found for this assignment")
+
                     except Exception as e:
-                        # Fallback to simple export
-                        csv = progress_data.to_csv(index=False)
-                        st.download_button(
-                            label="📊 Download CSV",
-                            data=csv,
-                            file_name=f"{assignment['name']}_progress_{pd.Timestamp.now().strftime('%Y%m%d')}.csv",
-                            mime="text/csv"
-                        )
+                        st.error(f"Error loading question details: {str(e)}")
 
-                with col2:
-                    if st.button("📧 Email Progress Reports"):
-                        with st.spinner("Sending progress reports..."):
-                            email_count = 0
-                            email_errors = 0
+            st.divider()
 
-                            for _, student in progress_data.iterrows():
-                                try:
-                                    # Get detailed question status for this student
-                                    student_detail_query = f"""
-                                    SELECT 
-                                        q.title as question_title,
-                                        CASE 
-                                            WHEN ucr.is_accepted = 1 THEN 'Completed'
-                                            WHEN ucr.is_submitted = 1 THEN 'Attempted'
-                                            WHEN ts.id IS NOT NULL THEN 'Text Submitted'
-                                            ELSE 'Not Started'
-                                        END as status
-                                    FROM hackathon_2025_assignment_questions aq
-                                    JOIN questions q ON aq.question_id = q.id
-                                    LEFT JOIN user_code_runs ucr ON ucr.user_id = {student['user_id'] if student['user_id'] else 'NULL'}
-                                        AND ucr.question_id = aq.question_id
-                                        AND ucr.created_at >= '{assignment['created_at']}'
-                                        AND ucr.is_submitted = 1
-                                    LEFT JOIN text_submissions ts ON ts.user_id = {student['user_id'] if student['user_id'] else 'NULL'}
-                                        AND ts.question_id = aq.question_id
-                                        AND ts.created_at >= '{assignment['created_at']}'
-                                    WHERE aq.assignment_id = {selected_assignment_id}
-                                    ORDER BY q.title
-                                    """
-
-                                    student_questions = run_query(student_detail_query)
-
-                                    # Create email content
-                                    questions_html = ""
-                                    for _, q in student_questions.iterrows():
-                                        status_color = {
-                                            'Completed': '#10b981',
-                                            'Attempted': '#f59e0b',
-                                            'Text Submitted': '#3b82f6',
-                                            'Not Started': '#6b7280'
-                                        }.get(q['status'], '#6b7280')
-
-                                        questions_html += f"""
-                                        <tr>
-                                            <td style="padding: 8px; border-bottom: 1px solid #e5e7eb;">{q['question_title']}</td>
-                                            <td style="padding: 8px; border-bottom: 1px solid #e5e7eb; color: {status_color}; font-weight: 600;">{q['status']}</td>
-                                        </tr>
-                                        """
-
-                                    # Create progress report email
-                                    subject = f"Progress Report: {assignment['name']} - {selected_class_name}"
-
-                                    student_name = student['student_name'].strip() if student['student_name'] and student['student_name'].strip() else student['email']
-
-                                    html_body = f"""
-                                    <!DOCTYPE html>
-                                    <html>
-                                    <head>
-                                        <style>
-                                            body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                                            .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-                                            .header {{ background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 20px; border-radius: 8px 8px 0 0; }}
-                                            .content {{ background: #f7fafc; padding: 20px; border-radius: 0 0 8px 8px; }}
-                                            .progress-bar {{ background: #e5e7eb; border-radius: 4px; height: 20px; margin: 10px 0; }}
-                                            .progress-fill {{ background: #667eea; height: 100%; border-radius: 4px; transition: width 0.3s; }}
-                                            table {{ width: 100%; border-collapse: collapse; margin: 20px 0; }}
-                                            th {{ background: #f3f4f6; padding: 10px; text-align: left; }}
-                                        </style>
-                                    </head>
-                                    <body>
-                                        <div class="container">
-                                            <div class="header">
-                                                <h2>Progress Report: {assignment['name']}</h2>
-                                                <p>Class: {selected_class_name}</p>
-                                            </div>
-                                            <div class="content">
-                                                <p>Hi {student_name},</p>
-                                                <p>Here's your current progress on the assignment:</p>
-                                                
-                                                <h3>Overall Progress</h3>
-                                                <div class="progress-bar">
-                                                    <div class="progress-fill" style="width: {student['progress_pct']:.0f}%;"></div>
-                                                </div>
-                                                <p><strong>{student['completed_questions']}/{student['total_questions']}</strong> questions completed ({student['progress_pct']:.0f}%)</p>
-                                                
-                                                <h3>Question Status</h3>
-                                                <table>
-                                                    <tr>
-                                                        <th>Question</th>
-                                                        <th>Status</th>
-                                                    </tr>
-                                                    {questions_html}
-                                                </table>
-                                                
-                                                <p>Due Date: <strong>{assignment['due_date']}</strong></p>
-                                                
-                                                <p>Keep up the good work!</p>
-                                                
-                                                <p>Best regards,<br>Your Instructor</p>
-                                            </div>
-                                        </div>
-                                    </body>
-                                    </html>
-                                    """
-
-                                    # Send email
-                                    send_email(
-                                        from_email="noreply@interviewquery.com",
-                                        to_email=student['email'],
-                                        subject=subject,
-                                        html_body=html_body
-                                    )
-                                    email_count += 1
 
-                                except Exception as e:
-                                    email_errors += 1
-                                    st.error(f"Failed to send to {student['email']}: {str(e)}")
+@timed_fragment("Export options")
+def show_progress_exports(assignment, class_id, class_name):
+    summary = progress_summary(assignment['id'], assignment['created_at'])
+    avg_completion = summary['avg_completion']
 
-                            if email_errors == 0:
-                                st.success(f"✅ Successfully sent {email_count} progress reports!")
-                            else:
-                                st.warning(f"Sent {email_count} reports with {email_errors} errors.")
+    def full_progress():
+        # Per-student rows, only fetched for the actions that need every student
+        return add_progress_columns(load_assignment_progress(assignment['id'], assignment['created_at']))
 
-                with col3:
-                    if st.button("📈 Generate Analytics"):
-                        # Show analytics in an expandable section
-                        with st.expander("📊 Assignment Analytics", expanded=True):
-                            # Create visualizations
-
-                            # 1. Completion rate by student
-                            fig1 = px.bar(
-                                progress_data.sort_values('progress_pct', ascending=True),
-                                x='progress_pct',
-                                y='email',
-                                orientation='h',
-                                title='Student Completion Rates',
-                                labels={'progress_pct': 'Completion %', 'email': 'Student'},
-                                color='progress_pct',
-                                color_continuous_scale='viridis'
-                            )
-                            fig1.update_layout(height=400)
-                            st.plotly_chart(fig1, use_container_width=True)
-
-                            # 2. Question difficulty vs completion
-                            if 'question_stats' in locals() and len(question_stats) > 0:
-                                fig2 = go.Figure()
-
-                                colors = {1: 'green', 2: 'yellow', 3: 'red'}
-                                difficulty_names = {1: 'Easy', 2: 'Medium', 3: 'Hard'}
-
-                                for difficulty in [1, 2, 3]:
-                                    df_filtered = question_stats[question_stats['difficulty'] == difficulty]
-                                    if len(df_filtered) > 0:
-                                        completion_rates = (df_filtered['students_completed'] / df_filtered['total_students'] * 100)
-                                        fig2.add_trace(go.Bar(
-                                            name=difficulty_names[difficulty],
-                                            x=df_filtered['question_title'],
-                                            y=completion_rates,
-                                            marker_color=colors.get(difficulty, 'gray')
-                                        ))
-
-                                fig2.update_layout(
-                                    title='Question Completion by Difficulty',
-                                    xaxis_title='Question',
-                                    yaxis_title='Completion Rate (%)',
-                                    barmode='group',
-                                    height=400
-                                )
-                                st.plotly_chart(fig2, use_container_width=True)
-
-                            # 3. Summary statistics
-                            col_a, col_b = st.columns(2)
-
-                            with col_a:
-                                st.metric("Class Average", f"{avg_completion:.1f}%")
-                                st.metric("Median Completion", f"{progress_data['progress_pct'].median():.1f}%")
-
-                            with col_b:
-                                time_remaining = (pd.to_datetime(assignment['due_date']) - pd.Timestamp.now()).days
-                                st.metric("Days Until Due", max(0, time_remaining))
-
-                                # Estimate completion rate
-                                if time_remaining > 0 and avg_completion < 100:
-                                    days_since_assigned = (pd.Timestamp.now() - pd.to_datetime(assignment['created_at'])).days
-                                    if days_since_assigned > 0:
-                                        daily_rate = avg_completion / days_since_assigned
-                                        projected_completion = min(100, avg_completion + (daily_rate * time_remaining))
-                                        st.metric("Projected Completion", f"{projected_completion:.1f}%")
-
-                            # 4. Distribution chart
-                            completion_bins = pd.cut(progress_data['progress_pct'],
-                                                   bins=[0, 25, 50, 75, 100],
-                                                   labels=['0-25%', '26-50%', '51-75%', '76-100%'])
-                            bin_counts = completion_bins.value_counts()
-
-                            fig3 = px.pie(
-                                values=bin_counts.values,
-                                names=bin_counts.index,
-                                title='Student Progress Distribution'
-                            )
-                            st.plotly_chart(fig3, use_container_width=True)
+    # Export options
+    st.markdown("### 📤 Export Options")
 
-            else:
-                st.warning("No student data found for this assignment.")
+    col1, col2, col3 = st.columns(3)
 
+    with col1:
+        # Detailed question breakdown as CSV, Parquet or Arrow, queried and streamed to a file only on request
+        try:
+            export_options(
+                "📊 Detailed",
+                f"progress_{assignment['id']}",
+                progress_export_sql(assignment['id'], class_id, assignment['created_at']),
+                f"{assignment['name']}_detailed_progress_{datetime.now().strftime('%Y%m%d')}",
+                PROGRESS_EXPORT_TYPES
+            )
         except Exception as e:
-            st.error(f"Error loading progress data: {str(e)}")
+            # Fallback to simple export
+            csv = full_progress().to_csv(index=False)
+            st.download_button(
+                label="📊 Download CSV",
+                data=csv,
+                file_name=f"{assignment['name']}_progress_{pd.Timestamp.now().strftime('%Y%m%d')}.csv",
+                mime="text/csv"
+            )
 
-    except Exception as e:
-        st.error(f"Error loading progress page: {str(e)}")
+    with col2:
+        if st.button("📧 Email Progress Reports"):
+            # Sent from a background job, the progress bar polls its state
+            st.session_state[f"progress_reports_job_{assignment['id']}"] = jobs.submit(
+                tasks.send_progress_reports,
+                {k: assignment[k] for k in ('id', 'name', 'created_at', 'due_date')},
+                int(class_id), class_name,
+                owner=st.session_state['user'].id, kind='progress reports')
+        show_job(f"progress_reports_job_{assignment['id']}",
+                 lambda result: describe_email_job(result, "progress reports sent"))
 
+    with col3:
+        if st.button("📈 Generate Analytics"):
+            # Show analytics in an expandable section
+            with st.expander("📊 Assignment Analytics", expanded=True):
+                # Create visualizations
+
+                # 1. Completion rate by student
+                student_completion = downsample_bars(full_progress(), 'progress_pct', 'email')
+                fig1 = cached_figure('student_completion', student_completion[['email', 'progress_pct']],
+                                     lambda: student_completion_figure(student_completion))
+                st.plotly_chart(fig1, use_container_width=True)
+
+                # 2. Question difficulty vs completion
+                question_stats = load_question_stats(assignment['id'], class_id, assignment['created_at'])
+                if len(question_stats) > 0:
+                    fig2 = cached_figure('difficulty_completion', question_stats,
+                                         lambda: difficulty_completion_figure(question_stats))
+                    st.plotly_chart(fig2, use_container_width=True)
+
+                # 3. Summary statistics
+                col_a, col_b = st.columns(2)
+
+                with col_a:
+                    st.metric("Class Average", f"{avg_completion:.1f}%")
+                    st.metric("Median Completion", f"{summary['median_completion']:.1f}%")
+
+                with col_b:
+                    time_remaining = (pd.to_datetime(assignment['due_date']) - pd.Timestamp.now()).days
+                    st.metric("Days Until Due", max(0, time_remaining))
+
+                    # Estimate completion rate
+                    if time_remaining > 0 and avg_completion < 100:
+                        days_since_assigned = (pd.Timestamp.now() - pd.to_datetime(assignment['created_at'])).days
+                        if days_since_assigned > 0:
+                            daily_rate = avg_completion / days_since_assigned
+                            projected_completion = min(100, avg_completion + (daily_rate * time_remaining))
+                            st.metric("Projected Completion", f"{projected_completion:.1f}%")
+
+                # 4. Distribution chart
+                bin_counts = pd.Series(summary['distribution'])
+
+                fig3 = cached_figure('progress_distribution', bin_counts,
+                                     lambda: progress_distribution_figure(bin_counts))
+                st.plotly_chart(fig3, use_container_width=True)
+
+
+@profiled
 def show_dashboard(user):
     # Header
     col1, col2, col3 = st.columns([3, 1, 1])
@@ -1477,6 +1160,8 @@ def show_dashboard(user):
         "Select Page",
         ["Classes", "Assignments", "Progress"]
     )
+    show_cache_stats()
+    show_recent_jobs(user.id)
 
     if page == "Classes":
         show_classes_page(user)
@@ -1485,6 +1170,8 @@ def show_dashboard(user):
     elif page == "Progress":
         show_progress_page(user)
 
+    show_render_timings()
+
 def main():
     st.title("Interview Query Homeworks")
     st.text("Assign, monitor, and analyze the homeworks of your students.")
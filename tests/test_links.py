@@ -0,0 +1,38 @@
+import time
+from urllib.parse import urlsplit, parse_qs
+from toolkits.links import LinkSigner, LinkVerifier
+
+
+def _params(link):
+    return {key: values[0] for key, values in parse_qs(urlsplit(link).query).items()}
+
+
+def test_signed_link_round_trips_through_verifier():
+    signer = LinkSigner(b'test-secret')
+    verifier = LinkVerifier(signer, max_age=3600, cache_size=2)
+    link = signer.sign_link('https://example.com/q/1?ref=hw', 1, 40, 'student@university.edu')
+    params = _params(link)
+
+    assert params['hw'] == '40'
+    assert verifier.verify(1, params['hw'], 'student@university.edu', params['t'], params['u'])
+    # A cached hit gives the same answer
+    assert verifier.verify(1, params['hw'], 'student@university.edu', params['t'], params['u'])
+    assert not verifier.verify(1, params['hw'], 'other@university.edu', params['t'], params['u'])
+    assert not verifier.verify(2, params['hw'], 'student@university.edu', params['t'], params['u'])
+
+
+def test_matrix_links_verify_and_expire():
+    signer = LinkSigner(b'test-secret')
+    questions = [{'id': 1, 'url': 'https://example.com/q/1'}, {'id': 2, 'url': 'https://example.com/q/2'}]
+    matrix = signer.sign_matrix(40, questions, ['a@university.edu', 'b@university.edu'])
+    verifier = LinkVerifier(signer, max_age=3600, cache_size=1)
+    for email, row in matrix.items():
+        for question_id, link in row.items():
+            params = _params(link)
+            assert verifier.verify(question_id, 40, email, params['t'], params['u'])
+    assert len(verifier._recent) == 1
+
+    old = int(time.time()) - 7200
+    link = signer.sign_link('https://example.com/q/1', 1, 40, 'a@university.edu', timestamp=old)
+    params = _params(link)
+    assert not verifier.verify(1, 40, 'a@university.edu', params['t'], params['u'])
@@ -0,0 +1,438 @@
+"""
+toolkits/analytics.py
+
+Aggregates for the progress and report pages computed in SQL, so only the numbers a widget
+shows come back from the database instead of one row per student (or per student x question).
+"""
+
+from typing import Dict
+from toolkits.db import run_query
+from toolkits.cache import cached
+
+CODING_TYPES = ('sql', 'python', 'algorithms')
+PROGRESS_BINS = [(0, 25, '0-25%'), (25, 50, '26-50%'), (50, 75, '51-75%'), (75, 100, '76-100%')]
+STATUS_LEVELS = ('Completed', 'Attempted', 'Text Submitted', 'Not Started')
+
+# Column types for the typed (Parquet / Arrow) exports, see toolkits.exports.export_columnar
+PROGRESS_EXPORT_TYPES = {
+    'email': 'string',
+    'student_name': 'string',
+    'question_title': 'string',
+    'question_type': 'string',
+    'difficulty': 'int16',
+    'points': 'int32',
+    'status': STATUS_LEVELS,
+    'submission_time': 'timestamp',
+}
+GRADEBOOK_TYPES = {
+    'email': 'string',
+    'user_id': 'int64',
+    'question_id': 'int64',
+    'title': 'string',
+    'type': 'string',
+    'points': 'int32',
+    'score': 'float64',
+    'attempts': 'int32',
+    'status': STATUS_LEVELS,
+    'last_submitted': 'timestamp',
+}
+
+
+def _in_list(values) -> str:
+    return ', '.join(f"'{v}'" for v in values)
+
+
+def student_progress_sql(assignment_id, assignment_created_at, after_email=None, limit=None, active_only=False):
+    """
+        Per-student completion for an assignment. With `limit` the rows are ordered by email and
+        start after `after_email`, so pages are keyset seeks rather than OFFSET scans.
+    """
+    page_filter = f"WHERE cs.email > '{after_email}'" if after_email else ""
+    having = "HAVING completed_questions > 0" if active_only else ""
+    order_by = "cs.email" if limit else "completed_questions DESC, cs.email"
+    limit_clause = f"LIMIT {int(limit)}" if limit else ""
+    return f"""
+    WITH assignment_questions AS (
+        SELECT question_id, points
+        FROM hackathon_2025_assignment_questions
+        WHERE assignment_id = {assignment_id}
+    ),
+    -- Step 2: Get students in the class (via assignment → class → members → users)
+    class_students AS (
+        SELECT
+            cm.email,
+            u.id as user_id,
+            u.first_name,
+            u.last_name,
+            u.created_at as joined_at
+        FROM hackathon_2025_assignments a
+        JOIN hackathon_2025_class_members cm ON a.class_id = cm.class_id
+        JOIN users u ON cm.email = u.email
+        WHERE a.id = {assignment_id}
+            AND cm.is_active = 1
+    )
+    -- Step 3: For each (student, question) pair, check completion
+    SELECT
+        cs.email,
+        cs.user_id,
+        cs.joined_at,
+        CONCAT(COALESCE(cs.first_name, ''), ' ', COALESCE(cs.last_name, '')) as student_name,
+        COUNT(aq.question_id) as total_questions,
+        SUM(
+            CASE
+                WHEN q.type IN ('sql', 'python', 'algorithms') THEN
+                    CASE WHEN EXISTS (
+                        SELECT 1 FROM user_code_runs ucr
+                        WHERE ucr.user_id = cs.user_id
+                        AND ucr.question_id = aq.question_id
+                        AND ucr.is_accepted = 1
+                        AND ucr.created_at >= '{assignment_created_at}'
+                    ) THEN 1 ELSE 0 END
+                ELSE
+                    CASE WHEN EXISTS (
+                        SELECT 1 FROM text_submissions ts
+                        WHERE ts.user_id = cs.user_id
+                        AND ts.question_id = aq.question_id
+                        AND ts.score >= 8
+                        AND ts.created_at >= '{assignment_created_at}'
+                    ) THEN 1 ELSE 0 END
+            END
+        ) as completed_questions,
+        SUM(
+            CASE
+                WHEN q.type IN ('sql', 'python', 'algorithms') THEN
+                    CASE WHEN EXISTS (
+                        SELECT 1 FROM user_code_runs ucr
+                        WHERE ucr.user_id = cs.user_id
+                        AND ucr.question_id = aq.question_id
+                        AND ucr.is_accepted = 1
+                        AND ucr.created_at >= '{assignment_created_at}'
+                    ) THEN aq.points ELSE 0 END
+                ELSE
+                    CASE WHEN EXISTS (
+                        SELECT 1 FROM text_submissions ts
+                        WHERE ts.user_id = cs.user_id
+                        AND ts.question_id = aq.question_id
+                        AND ts.score >= 8
+                        AND ts.created_at >= '{assignment_created_at}'
+                    ) THEN aq.points ELSE 0 END
+            END
+        ) as points_earned,
+        SUM(aq.points) as total_points
+    FROM class_students cs
+    CROSS JOIN assignment_questions aq
+    JOIN questions q ON q.id = aq.question_id
+    {page_filter}
+    GROUP BY cs.email, cs.user_id, cs.joined_at, cs.first_name, cs.last_name
+    {having}
+    ORDER BY {order_by}
+    {limit_clause}
+    """
+
+
+def progress_export_sql(assignment_id, class_id, assignment_created_at):
+    """One row per (active student, assignment question) with status and submission time, for exports"""
+    return f"""
+    SELECT 
+        cm.email,
+        CONCAT(COALESCE(u.first_name, ''), ' ', COALESCE(u.last_name, '')) as student_name,
+        q.title as question_title,
+        q.type as question_type,
+        q.level as difficulty,
+        aq.points,
+        CASE 
+            WHEN ucr.is_accepted = 1 THEN 'Completed'
+            WHEN ucr.is_submitted = 1 THEN 'Attempted'
+            WHEN ts.id IS NOT NULL THEN 'Text Submitted'
+            ELSE 'Not Started'
+        END as status,
+        COALESCE(ucr.created_at, ts.created_at) as submission_time
+    FROM hackathon_2025_class_members cm
+    LEFT JOIN users u ON cm.user_id = u.id
+    CROSS JOIN hackathon_2025_assignment_questions aq
+    JOIN questions q ON aq.question_id = q.id
+    LEFT JOIN user_code_runs ucr ON ucr.user_id = cm.user_id
+        AND ucr.question_id = aq.question_id
+        AND ucr.created_at >= '{assignment_created_at}'
+        AND ucr.is_submitted = 1
+    LEFT JOIN text_submissions ts ON ts.user_id = cm.user_id
+        AND ts.question_id = aq.question_id
+        AND ts.created_at >= '{assignment_created_at}'
+    WHERE cm.class_id = {class_id}
+        AND cm.is_active = 1
+        AND aq.assignment_id = {assignment_id}
+    ORDER BY cm.email, q.title
+    """
+
+
+def question_stats_sql(assignment_id, class_id, assignment_created_at):
+    """Per-question completed/attempting student counts across the class, for the progress page"""
+    return f"""
+    SELECT 
+        q.title as question_title,
+        q.type as question_type,
+        q.level as difficulty,
+        aq.points,
+        COUNT(DISTINCT u.id) as total_students,
+        COUNT(DISTINCT CASE 
+            WHEN q.type IN ('sql', 'python', 'algorithms') AND ucr.is_accepted = 1 THEN u.id
+            WHEN q.type NOT IN ('sql', 'python', 'algorithms') AND ts.score >= 8 THEN u.id
+        END) as students_completed,
+        COUNT(DISTINCT CASE 
+            WHEN q.type IN ('sql', 'python', 'algorithms') AND ucr.is_submitted = 1 AND ucr.is_accepted = 0 THEN u.id
+            WHEN q.type NOT IN ('sql', 'python', 'algorithms') AND ts.score > 0 AND ts.score < 8 THEN u.id
+        END) as students_attempted
+    FROM hackathon_2025_assignment_questions aq
+    JOIN questions q ON aq.question_id = q.id
+    CROSS JOIN hackathon_2025_class_members cm
+    INNER JOIN users u ON cm.email = u.email
+    LEFT JOIN user_code_runs ucr ON ucr.user_id = u.id
+        AND ucr.question_id = aq.question_id
+        AND ucr.created_at >= '{assignment_created_at}'
+        AND ucr.is_submitted = 1
+    LEFT JOIN text_submissions ts ON ts.user_id = u.id
+        AND ts.question_id = aq.question_id
+        AND ts.created_at >= '{assignment_created_at}'
+    WHERE aq.assignment_id = {assignment_id}
+        AND cm.class_id = {class_id}
+        AND cm.is_active = 1
+    GROUP BY q.id, q.title, q.type, q.level, aq.points
+    ORDER BY q.title
+    """
+
+
+@cached('progress', ttl=60, scope=lambda assignment_id, assignment_created_at: assignment_id)
+def progress_summary(assignment_id, assignment_created_at) -> Dict:
+    """
+        Class overview for the progress page: student counts, average and median completion, and
+        the progress distribution buckets (same edges as pd.cut over (0, 25, 50, 75, 100]).
+    """
+    bins = ',\n        '.join(
+        f"SUM(CASE WHEN pct > {low} AND pct <= {high} THEN 1 ELSE 0 END) AS bin_{low}_{high}"
+        for low, high, _ in PROGRESS_BINS
+    )
+    # 2 * rn hits n, n + 1 or n + 2 only for the middle row (odd n) or the middle two (even n)
+    result = run_query(f"""
+    SELECT
+        COUNT(*) AS total_students,
+        SUM(CASE WHEN completed_questions > 0 THEN 1 ELSE 0 END) AS students_started,
+        SUM(CASE WHEN completed_questions = total_questions THEN 1 ELSE 0 END) AS students_completed,
+        COALESCE(SUM(completed_questions) * 100.0 / NULLIF(SUM(total_questions), 0), 0) AS avg_completion,
+        AVG(CASE WHEN 2 * rn IN (n, n + 1, n + 2) THEN pct END) AS median_completion,
+        {bins}
+    FROM (
+        SELECT
+            s.completed_questions,
+            s.total_questions,
+            COALESCE(s.completed_questions * 100.0 / NULLIF(s.total_questions, 0), 0) AS pct,
+            ROW_NUMBER() OVER (ORDER BY COALESCE(s.completed_questions * 100.0 / NULLIF(s.total_questions, 0), 0)) AS rn,
+            COUNT(*) OVER () AS n
+        FROM ({student_progress_sql(assignment_id, assignment_created_at)}) AS s
+    ) p
+    """)
+    row = result.iloc[0].to_dict() if len(result) > 0 else {}
+    total = int(row.get('total_students') or 0)
+    return {
+        'total_students': total,
+        'students_started': int(row.get('students_started') or 0),
+        'students_completed': int(row.get('students_completed') or 0),
+        'avg_completion': float(row.get('avg_completion') or 0),
+        'median_completion': float(row.get('median_completion') or 0),
+        'distribution': {label: int(row.get(f"bin_{low}_{high}") or 0) for low, high, label in PROGRESS_BINS}
+    }
+
+
+def _report_cells(class_id, assignment_id, coding_types) -> str:
+    """
+        CTEs ending in `cells`: one row per (student with an account, assignment question) holding
+        the score, attempts and whether it counts as solved, as the portal report scores them:
+        coding questions score full points once accepted, text questions their best score capped
+        at the question's points and count as solved at 80%.
+    """
+    coding = _in_list(coding_types)
+    return f"""
+    WITH students AS (
+        SELECT m.email, m.user_id
+        FROM hackathon_2025_class_members m
+        WHERE m.class_id = {class_id} AND m.is_active = 1 AND m.user_id IS NOT NULL
+    ),
+    assignment_questions AS (
+        SELECT aq.question_id, aq.points, q.title, q.type
+        FROM hackathon_2025_assignment_questions aq
+        JOIN questions q ON aq.question_id = q.id
+        WHERE aq.assignment_id = {assignment_id}
+    ),
+    code_runs AS (
+        SELECT ucr.user_id, ucr.question_id, COUNT(*) AS attempts, MAX(ucr.is_accepted) AS accepted,
+            MAX(ucr.created_at) AS last_submitted
+        FROM user_code_runs ucr
+        JOIN students s ON s.user_id = ucr.user_id
+        JOIN assignment_questions aq ON aq.question_id = ucr.question_id
+        GROUP BY ucr.user_id, ucr.question_id
+    ),
+    text_answers AS (
+        SELECT ts.user_id, ts.question_id, COUNT(*) AS attempts, MAX(ts.score) AS best_score,
+            MAX(ts.created_at) AS last_submitted
+        FROM text_submissions ts
+        JOIN students s ON s.user_id = ts.user_id
+        JOIN assignment_questions aq ON aq.question_id = ts.question_id
+        GROUP BY ts.user_id, ts.question_id
+    ),
+    cells AS (
+        SELECT
+            s.email,
+            s.user_id,
+            aq.question_id,
+            aq.title,
+            aq.type,
+            aq.points,
+            CASE
+                WHEN aq.type IN ({coding}) THEN CASE WHEN cr.accepted = 1 THEN aq.points ELSE 0 END
+                WHEN ta.best_score IS NULL THEN 0
+                WHEN ta.best_score < aq.points THEN ta.best_score
+                ELSE aq.points
+            END AS score,
+            CASE WHEN aq.type IN ({coding}) THEN COALESCE(cr.attempts, 0) ELSE COALESCE(ta.attempts, 0) END AS attempts,
+            CASE
+                WHEN aq.type IN ({coding}) THEN CASE WHEN cr.accepted = 1 THEN 1 ELSE 0 END
+                WHEN ta.best_score >= aq.points * 0.8 THEN 1
+                ELSE 0
+            END AS solved,
+            CASE WHEN aq.type IN ({coding}) THEN cr.last_submitted ELSE ta.last_submitted END AS last_submitted
+        FROM students s
+        CROSS JOIN assignment_questions aq
+        LEFT JOIN code_runs cr ON cr.user_id = s.user_id AND cr.question_id = aq.question_id
+        LEFT JOIN text_answers ta ON ta.user_id = s.user_id AND ta.question_id = aq.question_id
+    ),
+    student_totals AS (
+        SELECT
+            email,
+            SUM(score) AS total_score,
+            SUM(points) AS total_possible,
+            COALESCE(SUM(score) * 100.0 / NULLIF(SUM(points), 0), 0) AS percentage
+        FROM cells
+        GROUP BY email, user_id
+    )
+    """
+
+
+@cached('progress', ttl=60, scope=lambda class_id, assignment_id, coding_types=CODING_TYPES: assignment_id)
+def report_summary(class_id, assignment_id, coding_types=CODING_TYPES) -> Dict:
+    """Students scored, how many reached 80%, and the average percentage"""
+    result = run_query(f"""
+    {_report_cells(class_id, assignment_id, coding_types)}
+    SELECT
+        COUNT(*) AS total_students,
+        SUM(CASE WHEN percentage >= 80 THEN 1 ELSE 0 END) AS completed,
+        AVG(percentage) AS avg_score
+    FROM student_totals
+    """)
+    row = result.iloc[0].to_dict() if len(result) > 0 else {}
+    return {
+        'total_students': int(row.get('total_students') or 0),
+        'completed': int(row.get('completed') or 0),
+        'avg_score': float(row.get('avg_score') or 0)
+    }
+
+
+@cached('progress', ttl=60, scope=lambda class_id, assignment_id, coding_types=CODING_TYPES: assignment_id)
+def question_performance(class_id, assignment_id, coding_types=CODING_TYPES):
+    """Per question: success rate and attempts across the scored students"""
+    return run_query(f"""
+    {_report_cells(class_id, assignment_id, coding_types)}
+    SELECT
+        question_id,
+        title,
+        type,
+        SUM(solved) * 100.0 / COUNT(*) AS success_rate,
+        SUM(attempts) * 1.0 / COUNT(*) AS avg_attempts,
+        SUM(attempts) AS total_attempts
+    FROM cells
+    GROUP BY question_id, title, type
+    """)
+
+
+def gradebook_sql(class_id, assignment_id, coding_types=CODING_TYPES):
+    """The report's scoring as one row per (student, question) with a status, for gradebook exports"""
+    coding = _in_list(coding_types)
+    return f"""
+    {_report_cells(class_id, assignment_id, coding_types)}
+    SELECT
+        email,
+        user_id,
+        question_id,
+        title,
+        type,
+        points,
+        score,
+        attempts,
+        CASE
+            WHEN solved = 1 THEN 'Completed'
+            WHEN attempts = 0 THEN 'Not Started'
+            WHEN type IN ({coding}) THEN 'Attempted'
+            ELSE 'Text Submitted'
+        END AS status,
+        last_submitted
+    FROM cells
+    ORDER BY email, question_id
+    """
+
+
+@cached('progress', ttl=60, scope=lambda class_id, assignment_id, limit=5, coding_types=CODING_TYPES: assignment_id)
+def top_performers(class_id, assignment_id, limit=5, coding_types=CODING_TYPES):
+    """The `limit` highest-scoring students, ranked"""
+    return run_query(f"""
+    {_report_cells(class_id, assignment_id, coding_types)}
+    SELECT *
+    FROM (
+        SELECT
+            ROW_NUMBER() OVER (ORDER BY percentage DESC, email) AS student_rank,
+            email,
+            total_score,
+            total_possible,
+            percentage
+        FROM student_totals
+    ) ranked
+    WHERE student_rank <= {int(limit)}
+    ORDER BY student_rank
+    """)
+
+
+def submission_aggregates(user_ids, code_question_ids, text_question_ids):
+    """
+        Attempts and best result for every (user, question) pair in two grouped queries, in place
+        of one query per cell. Returns ({(user_id, question_id): {'attempts', 'accepted'}},
+        {(user_id, question_id): {'attempts', 'score'}}); pairs without submissions are absent.
+    """
+    users = ', '.join(str(int(uid)) for uid in user_ids)
+    code_runs, text_answers = {}, {}
+    if not users:
+        return code_runs, text_answers
+
+    if code_question_ids:
+        result = run_query(f"""
+        SELECT user_id, question_id, COUNT(*) AS attempts, MAX(is_accepted) AS accepted
+        FROM user_code_runs
+        WHERE user_id IN ({users}) AND question_id IN ({', '.join(str(int(q)) for q in code_question_ids)})
+        GROUP BY user_id, question_id
+        """)
+        for row in result.to_dict('records'):
+            code_runs[(int(row['user_id']), int(row['question_id']))] = {
+                'attempts': int(row['attempts']),
+                'accepted': bool(row['accepted'])
+            }
+
+    if text_question_ids:
+        result = run_query(f"""
+        SELECT user_id, question_id, COUNT(*) AS attempts, MAX(score) AS score
+        FROM text_submissions
+        WHERE user_id IN ({users}) AND question_id IN ({', '.join(str(int(q)) for q in text_question_ids)})
+        GROUP BY user_id, question_id
+        """)
+        for row in result.to_dict('records'):
+            text_answers[(int(row['user_id']), int(row['question_id']))] = {
+                'attempts': int(row['attempts']),
+                'score': row['score']
+            }
+
+    return code_runs, text_answers
@@ -0,0 +1,149 @@
+import functools
+import os
+import threading
+import time
+from collections import defaultdict, OrderedDict
+import streamlit as st
+from toolkits.lazy import lazy_import
+
+pd = lazy_import('pandas')
+
+DEFAULT_TTL = 300
+MAX_ENTRIES = int(os.getenv("IQ_CACHE_MAX_ENTRIES", "2048"))
+SESSION_KEY = '_session_cache'
+
+
+@st.cache_resource
+def _store():
+    """
+        Shared by every session in the server process. Held in st.cache_resource so Streamlit's
+        "Clear cache" also drops our entries.
+    """
+    return {
+        'entries': OrderedDict(),
+        'stats': defaultdict(lambda: {'hits': 0, 'misses': 0, 'invalidations': 0}),
+        'generations': defaultdict(int),
+        'lock': threading.Lock()
+    }
+
+
+def cached(namespace, ttl=DEFAULT_TTL, scope=None):
+    """
+        Cache a data loader. `scope` maps the loader's arguments to the owner key (user id,
+        class id) that write paths pass to `invalidate`. DataFrames are copied on the way out.
+        A load that overlaps an `invalidate` of its namespace is returned but not stored, and
+        the least recently used entries go once the store holds MAX_ENTRIES.
+    """
+
+    def decorator(fn):
+        name = f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            store = _store()
+            owner = _freeze(scope(*args, **kwargs)) if scope else None
+            key = (namespace, owner, name, _freeze(args), _freeze(kwargs))
+            now = time.monotonic()
+
+            with store['lock']:
+                entry = store['entries'].get(key)
+                if entry is not None and entry[1] > now:
+                    store['entries'].move_to_end(key)
+                    store['stats'][namespace]['hits'] += 1
+                    return _copy(entry[0])
+                store['stats'][namespace]['misses'] += 1
+                generation = store['generations'][namespace]
+
+            value = fn(*args, **kwargs)
+            with store['lock']:
+                # A write invalidated the namespace while we loaded, the value may predate it
+                if store['generations'][namespace] == generation:
+                    store['entries'][key] = (value, now + ttl)
+                    store['entries'].move_to_end(key)
+                    while len(store['entries']) > MAX_ENTRIES:
+                        store['entries'].popitem(last=False)
+            return _copy(value)
+
+        return wrapper
+
+    return decorator
+
+
+def invalidate(namespace, owner=None):
+    """Drop cached results for a namespace, optionally only those belonging to one owner"""
+    store = _store()
+    if owner is not None:
+        owner = _freeze(owner)
+    with store['lock']:
+        stale = [k for k in store['entries'] if k[0] == namespace and (owner is None or k[1] == owner)]
+        for key in stale:
+            del store['entries'][key]
+        store['stats'][namespace]['invalidations'] += 1
+        store['generations'][namespace] += 1
+
+
+def session_cached(namespace, key, loader):
+    """
+        Keep `loader()`'s result in this session's state, for panels that are built on demand and
+        should not reload every rerun. Any `invalidate(namespace)`, from any session, expires it.
+    """
+    generation = _store()['generations'][namespace]
+    entries = st.session_state.setdefault(SESSION_KEY, {})
+    key = (namespace, _freeze(key))
+    entry = entries.get(key)
+    if entry is not None and entry[0] == generation:
+        return _copy(entry[1])
+    value = loader()
+    entries[key] = (generation, value)
+    return _copy(value)
+
+
+def cache_stats() -> 'pd.DataFrame':
+    store = _store()
+    with store['lock']:
+        entries = defaultdict(int)
+        for key in store['entries']:
+            entries[key[0]] += 1
+        rows = []
+        for namespace, stats in sorted(store['stats'].items()):
+            lookups = stats['hits'] + stats['misses']
+            rows.append({
+                'namespace': namespace,
+                'entries': entries[namespace],
+                'hits': stats['hits'],
+                'misses': stats['misses'],
+                'hit_rate': f"{stats['hits'] / lookups * 100:.0f}%" if lookups else '-',
+                'invalidations': stats['invalidations']
+            })
+    return pd.DataFrame(rows)
+
+
+def show_cache_stats():
+    """Sidebar readout of loader cache effectiveness"""
+    with st.sidebar.expander("Cache stats"):
+        stats = cache_stats()
+        if stats.empty:
+            st.caption("No cached loaders used yet")
+        else:
+            st.dataframe(stats, hide_index=True, use_container_width=True)
+
+
+def _freeze(value):
+    """Hashable form of loader arguments (pandas rows such as `user` become their id)"""
+    if isinstance(value, pd.Series):
+        return ('row', _freeze(value.get('id')))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if hasattr(value, 'item'):
+        return value.item()
+    return value
+
+
+def _copy(value):
+    if isinstance(value, pd.DataFrame):
+        return value.copy()
+    if isinstance(value, list):
+        return [dict(v) if isinstance(v, dict) else v for v in value]
+    return value
@@ -0,0 +1,93 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+from toolkits import metrics
+from toolkits.db import run_query
+
+QUESTION_URL = "https://www.interviewquery.com/questions/{}"
+
+catalog_lookups = metrics.counter('iq_catalog_lookups_total', 'Question catalog lookups by cache result')
+
+
+class QuestionCatalog:
+    """
+        Process-wide cache of question metadata (id -> title, type, level, slug, url, body_markdown).
+        Entries expire after `ttl` seconds and are reloaded in batch on the next lookup. Past
+        `max_entries` the least recently used entries are evicted.
+    """
+
+    def __init__(self, ttl=600, max_entries=20000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _load(self, ids):
+        ids_str = ','.join(str(qid) for qid in ids)
+        rows = run_query(f"""
+        SELECT id, title, type, level, slug, body_markdown, is_published
+        FROM questions
+        WHERE id IN ({ids_str})
+        """)
+        loaded = {}
+        for row in rows.to_dict('records'):
+            slug = row.get('slug')
+            slug = slug if isinstance(slug, str) and slug else None
+            loaded[int(row['id'])] = {
+                'id': int(row['id']),
+                'title': row['title'],
+                'type': row['type'],
+                'level': row['level'],
+                'slug': slug,
+                'url': QUESTION_URL.format(slug) if slug else None,
+                'body_markdown': row.get('body_markdown', ''),
+                'is_published': bool(row.get('is_published', 1))
+            }
+        return loaded
+
+    def get_many(self, ids: Iterable) -> Dict[int, Dict]:
+        """Entries for every id that exists, fetching misses and expired ids in one query"""
+        ids = [int(qid) for qid in ids]
+        now = time.monotonic()
+        found = {}
+        missing = []
+        with self._lock:
+            for qid in ids:
+                cached = self._entries.get(qid)
+                if cached is not None and now - cached[1] < self.ttl:
+                    found[qid] = cached[0]
+                    self._entries.move_to_end(qid)
+                elif qid not in missing:
+                    missing.append(qid)
+            self.hits += len(found)
+            self.misses += len(missing)
+        catalog_lookups.inc(len(found), result='hit')
+        catalog_lookups.inc(len(missing), result='miss')
+
+        if missing:
+            loaded = self._load(missing)
+            with self._lock:
+                for qid, entry in loaded.items():
+                    self._entries[qid] = (entry, now)
+                    self._entries.move_to_end(qid)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            found.update(loaded)
+        return found
+
+    def get(self, qid) -> Optional[Dict]:
+        return self.get_many([qid]).get(int(qid))
+
+    def invalidate(self, ids: Iterable = None):
+        with self._lock:
+            if ids is None:
+                self._entries.clear()
+            else:
+                for qid in ids:
+                    self._entries.pop(int(qid), None)
+
+
+question_catalog = QuestionCatalog()
@@ -1,4 +1,6 @@
 from toolkits.db import run_query
+from toolkits.cache import cached
+from toolkits import summaries
 from st_pages import Page, add_page_title, Section
 
 
@@ -15,5 +17,44 @@ def get_users(emails):
     return run_query(f"SELECT * FROM users where email in {strformat}")
 
 
+@cached('classes', scope=lambda user: user.id)
 def get_classes(user):
-    return run_query(f"SELECT * FROM hackathon_2025_instructor_classes where user_id = {user.id}")
+    return run_query(f"""
+    SELECT c.*, {summaries.student_count_sql('c')} as student_count
+    FROM hackathon_2025_instructor_classes c
+    WHERE c.user_id = {user.id}
+    """)
+
+
+@cached('class_students', scope=lambda class_id: class_id)
+def get_class_member_count(class_id):
+    student_count = run_query(f"SELECT COUNT(*) as count FROM hackathon_2025_class_members WHERE class_id = {class_id}")
+    return int(student_count.iloc[0]['count']) if len(student_count) > 0 else 0
+
+
+@cached('class_students', scope=lambda class_id: class_id)
+def get_active_class_members(class_id):
+    return run_query(f"SELECT * FROM hackathon_2025_class_members WHERE class_id = {class_id} AND is_active = 1")
+
+
+@cached('class_assignments', scope=lambda class_id: class_id)
+def get_class_assignments(class_id):
+    return run_query(f"""
+    SELECT a.*, {summaries.question_count_sql('a')} as question_count
+    FROM hackathon_2025_assignments a
+    WHERE a.class_id = {class_id}
+    AND a.is_active = 1
+    ORDER BY a.due_date DESC
+    """)
+
+
+@cached('class_students', scope=lambda class_id, *args, **kwargs: class_id)
+def get_class_members_page(class_id, after_id=None, limit=50):
+    """Active members in id order starting after `after_id` (keyset pagination)"""
+    after = f"AND id > {int(after_id)}" if after_id is not None else ""
+    return run_query(f"""
+    SELECT * FROM hackathon_2025_class_members
+    WHERE class_id = {class_id} AND is_active = 1 {after}
+    ORDER BY id
+    LIMIT {int(limit)}
+    """)
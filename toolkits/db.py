@@ -1,24 +1,109 @@
-from sqlalchemy import create_engine, text
 import os
-import pandas as pd
+import threading
+import time
+from contextlib import contextmanager
 import dotenv
+from toolkits import metrics
+from toolkits.lazy import lazy_import
+from toolkits.dialect import translate, register_sqlite_functions
 dotenv.load_dotenv()
 
+pd = lazy_import('pandas')
+sqlalchemy = lazy_import('sqlalchemy')
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def _pool_usage():
+    usage = {}
+    for engine in list(_engines.values()):
+        pool = engine.pool
+        if hasattr(pool, 'checkedout'):
+            usage[(('dialect', engine.dialect.name), ('state', 'checked_out'))] = pool.checkedout()
+            usage[(('dialect', engine.dialect.name), ('state', 'size'))] = pool.size()
+    return usage
+
+
+query_seconds = metrics.histogram('iq_db_query_seconds', 'Statement latency including fetching rows')
+query_errors = metrics.counter('iq_db_query_errors_total', 'Statements that raised')
+metrics.gauge('iq_db_pool_connections', 'Connection pool size and connections in use', _pool_usage)
+
+
+def get_engine():
+    """
+        One engine (and connection pool) per IQ_DB_AUTH URL for the life of the process. A
+        sqlite:/// URL runs the app against a local file database, see toolkits.dialect.
+    """
+    url = os.getenv("IQ_DB_AUTH")
+    with _engines_lock:
+        engine = _engines.get(url)
+        if engine is None:
+            engine = sqlalchemy.create_engine(url)
+            if engine.dialect.name == 'sqlite':
+                sqlalchemy.event.listen(engine, 'connect', register_sqlite_functions)
+            _engines[url] = engine
+        return engine
+
+
 def run_query(query):
-    query_text = text(query)
-    engine = create_engine(os.getenv("IQ_DB_AUTH"))
-    connection = engine.connect()
-    df = pd.read_sql_query(query_text, connection)
-    connection.close()
-    return df
+    """
+        Run a read and return its rows as a DataFrame. A statement that returns no rows raises
+        and is rolled back, writes go through execute_query / execute_transaction.
+    """
+    engine = get_engine()
+    query_text = sqlalchemy.text(translate(query, engine.dialect.name))
+    start = time.perf_counter()
+    try:
+        with engine.connect() as connection:
+            result = connection.execute(query_text)
+            return pd.DataFrame.from_records(result.fetchall(), columns=list(result.keys()), coerce_float=True)
+    except Exception:
+        query_errors.inc(kind='read')
+        raise
+    finally:
+        query_seconds.observe(time.perf_counter() - start, kind='read')
+
+
+@contextmanager
+def stream_query(query, chunk_size=5000):
+    """
+        `with stream_query(sql) as (columns, chunks):` iterates the result `chunk_size` rows at a
+        time through a server-side cursor, for exports that must not hold every row in memory.
+    """
+    engine = get_engine()
+    query_text = sqlalchemy.text(translate(query, engine.dialect.name))
+    with query_seconds.time(kind='stream'):
+        with engine.connect() as connection:
+            result = connection.execution_options(stream_results=True, max_row_buffer=chunk_size).execute(query_text)
+            yield list(result.keys()), result.partitions(chunk_size)
+
+
+def execute_transaction(queries):
+    """Execute several INSERT/UPDATE/DELETE statements in one transaction: all of them or none"""
+    engine = get_engine()
+    with query_seconds.time(kind='write'):
+        try:
+            with engine.begin() as connection:
+                for query in queries:
+                    connection.execute(sqlalchemy.text(translate(query, engine.dialect.name)))
+        except Exception:
+            query_errors.inc(kind='write')
+            raise
+
 
 def execute_query(query):
     """Execute INSERT, UPDATE, DELETE queries that don't return rows"""
-    query_text = text(query)
-    engine = create_engine(os.getenv("IQ_DB_AUTH"))
-    connection = engine.connect()
-    result = connection.execute(query_text)
-    connection.commit()
-    connection.close()
+    engine = get_engine()
+    query_text = sqlalchemy.text(translate(query, engine.dialect.name))
+    with query_seconds.time(kind='write'):
+        connection = engine.connect()
+        try:
+            result = connection.execute(query_text)
+            connection.commit()
+        except Exception:
+            query_errors.inc(kind='write')
+            raise
+        finally:
+            connection.close()
     return result
-
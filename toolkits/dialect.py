@@ -0,0 +1,87 @@
+"""
+toolkits/dialect.py
+
+The app's SQL is written for MySQL. On a SQLite database (a local file for profiling and
+benchmarks) toolkits.db passes every statement through `translate`, and the MySQL functions
+the queries use (NOW, CONCAT) are registered on each SQLite connection.
+"""
+
+import re
+from datetime import datetime
+
+_UPDATE_JOIN_RE = re.compile(
+    r"^\s*UPDATE\s+(\w+)\s+(?:AS\s+)?(\w+)\s+((?:(?:INNER\s+)?JOIN\s+.+?)+?)\s+SET\s+(.+?)(?:\s+WHERE\s+(.+?))?\s*;?\s*$",
+    re.IGNORECASE | re.DOTALL
+)
+_JOIN_RE = re.compile(r"(?:INNER\s+)?JOIN\s+(\w+)\s+(?:AS\s+)?(\w+)\s+ON\s+(.+?)(?=\s+(?:INNER\s+)?JOIN\s+|$)",
+                      re.IGNORECASE | re.DOTALL)
+_REWRITES = [
+    (re.compile(r"\bINSERT\s+IGNORE\s+INTO\b", re.IGNORECASE), "INSERT OR IGNORE INTO"),
+    (re.compile(r"\b\w*INT\s+AUTO_INCREMENT\s+PRIMARY\s+KEY\b", re.IGNORECASE), "INTEGER PRIMARY KEY AUTOINCREMENT"),
+    (re.compile(r"\bLAST_INSERT_ID\(\)", re.IGNORECASE), "last_insert_rowid()"),
+]
+
+
+def _split_top_level(text, separator=','):
+    """Splits on `separator` outside parentheses and quotes"""
+    parts, depth, quote, start = [], 0, None, 0
+    for i, ch in enumerate(text):
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in "'\"":
+            quote = ch
+        elif ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+        elif ch == separator and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return parts
+
+
+def _update_join_to_from(match):
+    """
+        MySQL `UPDATE t a JOIN u b ON ... SET a.x = ... WHERE ...` as SQLite's
+        `UPDATE t AS a SET x = ... FROM u AS b WHERE (...) AND (...)`.
+    """
+    table, alias, joins, assignments, where = match.groups()
+    sources, conditions = [], []
+    for join_table, join_alias, condition in _JOIN_RE.findall(joins):
+        sources.append(f"{join_table} AS {join_alias}")
+        conditions.append(f"({condition.strip()})")
+    if where:
+        conditions.append(f"({where.strip()})")
+    # SQLite does not allow a qualified column on the left of SET
+    columns = [re.sub(rf"^\s*{alias}\.", '', a.strip()) for a in _split_top_level(assignments)]
+    sql = f"UPDATE {table} AS {alias} SET {', '.join(columns)} FROM {', '.join(sources)}"
+    if conditions:
+        sql += f" WHERE {' AND '.join(conditions)}"
+    return sql
+
+
+def translate(sql: str, dialect: str) -> str:
+    """`sql` rewritten for `dialect` ('mysql' statements are returned unchanged)"""
+    if dialect != 'sqlite':
+        return sql
+    for pattern, replacement in _REWRITES:
+        sql = pattern.sub(replacement, sql)
+    match = _UPDATE_JOIN_RE.match(sql)
+    if match:
+        sql = _update_join_to_from(match)
+    return sql
+
+
+def _concat(*args):
+    # MySQL returns NULL when any argument is NULL
+    if any(a is None for a in args):
+        return None
+    return ''.join(str(a) for a in args)
+
+
+def register_sqlite_functions(dbapi_connection, connection_record=None):
+    """SQLAlchemy 'connect' listener adding the MySQL functions the app's queries call"""
+    dbapi_connection.create_function('NOW', 0, lambda: datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    dbapi_connection.create_function('CONCAT', -1, _concat)
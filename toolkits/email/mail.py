@@ -1,12 +1,18 @@
 import smtplib
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from toolkits import metrics
 
 _smtp_server = 'localhost'
 _smtp_port = 1025
 _smtp_username = ''
 _smtp_password = ''
 
+emails_sent = metrics.counter('iq_emails_sent_total', 'Emails handed to the SMTP server')
+emails_failed = metrics.counter('iq_emails_failed_total', 'Emails that could not be sent')
+email_send_seconds = metrics.histogram('iq_email_send_seconds', 'Time to connect and send one email')
+
 def send_email(from_email, to_email, subject, body):
     msg = MIMEMultipart()
     msg['From'] = from_email
@@ -15,17 +21,20 @@ def send_email(from_email, to_email, subject, body):
     msg.attach(MIMEText(body, 'html'))
 
     server = None
+    start = time.perf_counter()
     try:
         server = smtplib.SMTP(_smtp_server, _smtp_port)
         # server.starttls()
         # server.login(_smtp_username, _smtp_password)
         server.send_message(msg)
-
+        emails_sent.inc()
 
     except Exception as e:
+        emails_failed.inc()
         raise Exception(f"SMTP Error: {str(e)}")
 
     finally:
+        email_send_seconds.observe(time.perf_counter() - start)
         if server:
             try:
                 server.quit()
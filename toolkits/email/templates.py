@@ -589,4 +589,78 @@ def get_assignment_notification_template(assignment_name, class_name, due_date,
 </html>
 """
     
-    return html_template
\ No newline at end of file
+    return html_template
+
+
+def get_progress_report_template(assignment_name, class_name, student_name, progress_pct, completed_questions,
+                                 total_questions, due_date, questions):
+    """Generate HTML email template for a student's progress report (questions: title and status)"""
+
+    questions_html = ""
+    for q in questions:
+        status_color = {
+            'Completed': '#10b981',
+            'Attempted': '#f59e0b',
+            'Text Submitted': '#3b82f6',
+            'Not Started': '#6b7280'
+        }.get(q['status'], '#6b7280')
+
+        questions_html += f"""
+        <tr>
+            <td style="padding: 8px; border-bottom: 1px solid #e5e7eb;">{q['question_title']}</td>
+            <td style="padding: 8px; border-bottom: 1px solid #e5e7eb; color: {status_color}; font-weight: 600;">{q['status']}</td>
+        </tr>
+        """
+
+    html_template = f"""
+<!DOCTYPE html>
+<html>
+<head>
+    <style>
+        body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
+        .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
+        .header {{ background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 20px; border-radius: 8px 8px 0 0; }}
+        .content {{ background: #f7fafc; padding: 20px; border-radius: 0 0 8px 8px; }}
+        .progress-bar {{ background: #e5e7eb; border-radius: 4px; height: 20px; margin: 10px 0; }}
+        .progress-fill {{ background: #667eea; height: 100%; border-radius: 4px; transition: width 0.3s; }}
+        table {{ width: 100%; border-collapse: collapse; margin: 20px 0; }}
+        th {{ background: #f3f4f6; padding: 10px; text-align: left; }}
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h2>Progress Report: {assignment_name}</h2>
+            <p>Class: {class_name}</p>
+        </div>
+        <div class="content">
+            <p>Hi {student_name},</p>
+            <p>Here's your current progress on the assignment:</p>
+
+            <h3>Overall Progress</h3>
+            <div class="progress-bar">
+                <div class="progress-fill" style="width: {progress_pct:.0f}%;"></div>
+            </div>
+            <p><strong>{completed_questions}/{total_questions}</strong> questions completed ({progress_pct:.0f}%)</p>
+
+            <h3>Question Status</h3>
+            <table>
+                <tr>
+                    <th>Question</th>
+                    <th>Status</th>
+                </tr>
+                {questions_html}
+            </table>
+
+            <p>Due Date: <strong>{due_date}</strong></p>
+
+            <p>Keep up the good work!</p>
+
+            <p>Best regards,<br>Your Instructor</p>
+        </div>
+    </div>
+</body>
+</html>
+"""
+
+    return html_template
@@ -0,0 +1,186 @@
+"""
+toolkits/exports.py
+
+On-demand file exports. Nothing is queried until the instructor asks for a file; rows are then
+streamed from the database a chunk at a time into a temp file (CSV, optionally gzipped, or typed
+Parquet / Arrow IPC), so memory stays flat however large the class is, and the download button
+serves that file. st.download_button holds the whole file in the server's memory for the
+session, so files over MAX_DOWNLOAD_BYTES (IQ_EXPORT_MAX_BYTES, default 100 MB) are refused.
+"""
+
+import csv
+import gzip
+import os
+import tempfile
+import time
+import streamlit as st
+from toolkits.db import stream_query
+from toolkits.lazy import lazy_import
+
+pa = lazy_import('pyarrow')
+pq = lazy_import('pyarrow.parquet')
+
+CHUNK_ROWS = 5000
+EXPORT_TTL = 3600
+EXPORT_PREFIX = 'iq-export-'
+MAX_DOWNLOAD_BYTES = int(os.getenv("IQ_EXPORT_MAX_BYTES", str(100 * 1024 * 1024)))
+STATE_KEY = '_exports'
+
+# Format -> (file suffix, mime type)
+FORMATS = {
+    'CSV': ('.csv', 'text/csv'),
+    'Parquet': ('.parquet', 'application/vnd.apache.parquet'),
+    'Arrow IPC': ('.arrow', 'application/vnd.apache.arrow.file'),
+}
+
+
+def _cleanup(max_age=EXPORT_TTL):
+    """Removes export files older than `max_age` seconds left behind by earlier sessions"""
+    now = time.time()
+    directory = tempfile.gettempdir()
+    for name in os.listdir(directory):
+        if name.startswith(EXPORT_PREFIX):
+            path = os.path.join(directory, name)
+            try:
+                if now - os.path.getmtime(path) > max_age:
+                    os.remove(path)
+            except OSError:
+                pass
+
+
+def temp_path(suffix):
+    fd, path = tempfile.mkstemp(prefix=EXPORT_PREFIX, suffix=suffix)
+    os.close(fd)
+    return path
+
+
+def export_csv(sql, compress=False, chunk_size=CHUNK_ROWS):
+    """Streams `sql` into a CSV (or .csv.gz) temp file. Returns (path, row count)."""
+    path = temp_path('.csv.gz' if compress else '.csv')
+    opener = gzip.open if compress else open
+    rows = 0
+    with opener(path, 'wt', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        with stream_query(sql, chunk_size) as (columns, chunks):
+            writer.writerow(columns)
+            for chunk in chunks:
+                writer.writerows(chunk)
+                rows += len(chunk)
+    return path, rows
+
+
+def export_download(label, key, build, file_name, mime):
+    """
+        Two-step download: a button that runs `build()` -> (path, rows) only when clicked, then a
+        download button serving the file. The prepared file is kept for this session under `key`
+        and replaced when the instructor prepares it again. Streamlit reads the file into memory
+        to serve it, so a file over MAX_DOWNLOAD_BYTES is deleted instead of offered.
+    """
+    exports = st.session_state.setdefault(STATE_KEY, {})
+    if st.button(f"Prepare {label}", key=f"prepare_{key}"):
+        with st.spinner(f"Preparing {label}..."):
+            _cleanup()
+            previous = exports.pop(key, None)
+            if previous and os.path.exists(previous['path']):
+                os.remove(previous['path'])
+            path, rows = build()
+            size = os.path.getsize(path)
+            if size > MAX_DOWNLOAD_BYTES:
+                os.remove(path)
+                st.warning(f"{label} is {size / 2**20:,.0f} MB, over the {MAX_DOWNLOAD_BYTES / 2**20:,.0f} MB "
+                           f"download limit. Try a compressed or Parquet export.")
+            else:
+                exports[key] = {'path': path, 'rows': rows}
+
+    prepared = exports.get(key)
+    if prepared and os.path.exists(prepared['path']):
+        with open(prepared['path'], 'rb') as f:
+            st.download_button(
+                label=f"⬇️ Download {label} ({prepared['rows']:,} rows)",
+                data=f,
+                file_name=file_name,
+                mime=mime,
+                key=f"download_{key}"
+            )
+
+
+def _arrow_type(kind):
+    """'timestamp', a pyarrow alias ('string', 'int32', 'float64', ...), or a tuple of category levels"""
+    if isinstance(kind, tuple):
+        return pa.dictionary(pa.int8(), pa.string())
+    if kind == 'timestamp':
+        return pa.timestamp('us')
+    return pa.type_for_alias(kind)
+
+
+def _to_array(values, kind):
+    if isinstance(kind, tuple):
+        # Fixed levels give every batch the same dictionary, which the Arrow IPC file format requires
+        codes = {level: i for i, level in enumerate(kind)}
+        unknown = {v for v in values if v is not None and v not in codes}
+        if unknown:
+            raise ValueError(f"{sorted(unknown)} not in categories {kind}")
+        return pa.DictionaryArray.from_arrays(
+            pa.array([None if v is None else codes[v] for v in values], pa.int8()),
+            pa.array(kind, pa.string())
+        )
+    if kind == 'timestamp':
+        # MySQL drivers give datetimes, SQLite gives 'YYYY-MM-DD HH:MM:SS' strings
+        if any(isinstance(v, str) for v in values):
+            return pa.array(values, pa.string()).cast(pa.timestamp('us'))
+        return pa.array(values, pa.timestamp('us'))
+    if kind.startswith('int'):
+        values = [None if v is None else int(v) for v in values]
+    elif kind.startswith('float'):
+        values = [None if v is None else float(v) for v in values]
+    elif kind == 'string':
+        values = [None if v is None else str(v) for v in values]
+    return pa.array(values, _arrow_type(kind))
+
+
+def export_columnar(sql, column_types, fmt='Parquet', chunk_size=CHUNK_ROWS):
+    """
+        Streams `sql` into a zstd-compressed Parquet or an Arrow IPC temp file, one record batch
+        per chunk. `column_types` maps column name -> kind (see _arrow_type), columns without
+        one are written as strings. Returns (path, row count).
+    """
+    path = temp_path(FORMATS[fmt][0])
+    rows = 0
+    with stream_query(sql, chunk_size) as (columns, chunks):
+        kinds = [column_types.get(c, 'string') for c in columns]
+        schema = pa.schema([(c, _arrow_type(k)) for c, k in zip(columns, kinds)])
+        if fmt == 'Parquet':
+            writer = pq.ParquetWriter(path, schema, compression='zstd')
+        else:
+            writer = pa.ipc.new_file(path, schema)
+        with writer:
+            for chunk in chunks:
+                arrays = [_to_array(list(values), kind) for values, kind in zip(zip(*chunk), kinds)]
+                writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+                rows += len(chunk)
+    return path, rows
+
+
+def export_options(label, key, sql, file_stem, column_types):
+    """
+        Format picker (CSV with optional gzip, Parquet, Arrow IPC) in front of export_download for
+        the rows of `sql`. `column_types` gives the Parquet / Arrow column types.
+    """
+    fmt = st.radio("Format", list(FORMATS), horizontal=True, key=f"export_format_{key}")
+    compress = fmt == 'CSV' and st.toggle("Compress (gzip)", key=f"export_gzip_{key}")
+    suffix, mime = FORMATS[fmt]
+    if compress:
+        suffix, mime = suffix + '.gz', 'application/gzip'
+
+    if fmt == 'CSV':
+        build = lambda: export_csv(sql, compress)
+    else:
+        build = lambda: export_columnar(sql, column_types, fmt)
+
+    export_download(
+        f"{label} {fmt}",
+        f"{key}_{fmt.replace(' ', '_').lower()}_{'gz' if compress else 'plain'}",
+        build,
+        file_name=f"{file_stem}{suffix}",
+        mime=mime
+    )
@@ -0,0 +1,76 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+import streamlit as st
+from toolkits.lazy import lazy_import
+
+pd = lazy_import('pandas')
+
+MAX_FIGURES = 256
+MAX_BARS = 60
+
+
+@st.cache_resource
+def _store():
+    """Serialized figures shared by every session, most recently used last"""
+    return {'figures': OrderedDict(), 'lock': threading.Lock(), 'hits': 0, 'misses': 0}
+
+
+def fingerprint(*parts) -> str:
+    """
+        Content hash of the data a chart is drawn from. DataFrames and Series hash their values,
+        index and column names, anything else is hashed through its JSON form.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        if isinstance(part, (pd.DataFrame, pd.Series)):
+            digest.update(pd.util.hash_pandas_object(part, index=True).values.tobytes())
+            names = list(part.columns) if isinstance(part, pd.DataFrame) else [part.name]
+            digest.update(json.dumps(names, default=str).encode())
+        else:
+            digest.update(json.dumps(part, sort_keys=True, default=str).encode())
+        digest.update(b'|')
+    return digest.hexdigest()
+
+
+def cached_figure(name, data, build):
+    """
+        Figure for `name` drawn from `data`, built with `build()` only when that data has not been
+        charted before. Figures are kept as plotly JSON and handed back as dicts, which
+        st.plotly_chart accepts directly.
+    """
+    store = _store()
+    key = (name, fingerprint(*(data if isinstance(data, tuple) else (data,))))
+    with store['lock']:
+        figure_json = store['figures'].get(key)
+        if figure_json is not None:
+            store['figures'].move_to_end(key)
+            store['hits'] += 1
+            return json.loads(figure_json)
+        store['misses'] += 1
+
+    figure_json = build().to_json()
+    with store['lock']:
+        store['figures'][key] = figure_json
+        while len(store['figures']) > MAX_FIGURES:
+            store['figures'].popitem(last=False)
+    return json.loads(figure_json)
+
+
+def downsample_bars(frame, value_column, label_column, max_bars=MAX_BARS):
+    """
+        Keeps bar charts readable and small for large classes: rows are sorted by `value_column`,
+        the lowest `max_bars - 1` are kept as they are and the rest collapse into one bar holding
+        their mean, labelled with how many rows it stands for.
+    """
+    frame = frame.sort_values(value_column, ascending=True)
+    if len(frame) <= max_bars:
+        return frame
+    shown = frame.iloc[:max_bars - 1]
+    rest = frame.iloc[max_bars - 1:]
+    summary = pd.DataFrame({
+        label_column: [f"{len(rest)} others (avg)"],
+        value_column: [rest[value_column].mean()]
+    })
+    return pd.concat([shown[[label_column, value_column]], summary], ignore_index=True)
@@ -0,0 +1,161 @@
+"""
+toolkits/frames.py
+
+Column-wise data prep for the dashboard views. Status labels, percentages, URLs and display
+strings are computed once per frame with numpy/pandas vector operations, and widgets loop over
+the resulting records instead of calling iterrows()/apply(axis=1).
+
+    python -m toolkits.frames [rows]     # micro-benchmark against the row-wise versions
+"""
+
+import sys
+import time
+from typing import Dict, List
+from toolkits.catalog import QUESTION_URL
+from toolkits.lazy import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+STATUS_COMPLETE = '✅ Complete'
+STATUS_IN_PROGRESS = '🟡 In Progress'
+STATUS_NOT_STARTED = '⚪ Not Started'
+STATUS_CLASSES = {
+    STATUS_COMPLETE: 'status-complete',
+    STATUS_IN_PROGRESS: 'status-progress',
+    STATUS_NOT_STARTED: 'status-notstarted'
+}
+STATUS_TEXT = {status: status.split(' ', 1)[1] for status in STATUS_CLASSES}
+DIFFICULTY_NAMES = {1: 'Easy', 2: 'Medium', 3: 'Hard'}
+
+
+def add_progress_columns(progress_data: 'pd.DataFrame') -> 'pd.DataFrame':
+    """
+        Adds progress_pct, status, status_class, status_text and display_name to per-student
+        progress rows (completed_questions, total_questions, student_name, email).
+    """
+    pct = (progress_data['completed_questions'] / progress_data['total_questions'] * 100).fillna(0)
+    status = np.select([pct == 100, pct > 0], [STATUS_COMPLETE, STATUS_IN_PROGRESS], default=STATUS_NOT_STARTED)
+
+    progress_data['progress_pct'] = pct
+    progress_data['status'] = status
+    progress_data['status_class'] = progress_data['status'].map(STATUS_CLASSES)
+    progress_data['status_text'] = progress_data['status'].map(STATUS_TEXT)
+    if 'student_name' in progress_data:
+        names = progress_data['student_name'].fillna('').astype(str).str.strip()
+        progress_data['display_name'] = names.where(names != '', progress_data['email'])
+    return progress_data
+
+
+def options(frame: 'pd.DataFrame', label_column, value_column) -> Dict:
+    """Selectbox label -> id mapping"""
+    return dict(zip(frame[label_column], frame[value_column]))
+
+
+def records(frame: 'pd.DataFrame', columns: List[str] = None) -> List[Dict]:
+    if columns is not None:
+        frame = frame[columns]
+    return frame.to_dict('records')
+
+
+def question_links(assignment_questions: 'pd.DataFrame', selected_urls: Dict, catalog: Dict) -> List[Dict]:
+    """
+        Email-ready question records (id, title, points, url, difficulty). The URL comes from the
+        search hit the instructor picked, then the catalog slug, else None.
+    """
+    ids = assignment_questions['id'].astype(int)
+    url = ids.map(selected_urls)
+    url = url.where(url.map(lambda u: isinstance(u, str) and u != ''))
+    catalog_urls = ids.map({qid: entry['url'] for qid, entry in catalog.items()})
+    url = url.fillna(catalog_urls)
+
+    prepared = pd.DataFrame({
+        'id': ids,
+        'title': assignment_questions['title'],
+        'points': assignment_questions['points'],
+        'url': url.astype(object).where(url.notna(), None),
+        'difficulty': assignment_questions['level'].map(DIFFICULTY_NAMES).fillna('Medium')
+    })
+    return prepared.to_dict('records')
+
+
+def _rowwise_progress(progress_data: 'pd.DataFrame') -> 'pd.DataFrame':
+    progress_data['progress_pct'] = (progress_data['completed_questions'] / progress_data['total_questions'] * 100).fillna(0)
+    progress_data['status'] = progress_data.apply(
+        lambda x: STATUS_COMPLETE if x['progress_pct'] == 100
+        else STATUS_IN_PROGRESS if x['progress_pct'] > 0
+        else STATUS_NOT_STARTED, axis=1
+    )
+    return progress_data
+
+
+def _rowwise_question_links(assignment_questions: 'pd.DataFrame', selected_urls: Dict, catalog: Dict) -> List[Dict]:
+    for idx, row in assignment_questions.iterrows():
+        if row['id'] in selected_urls:
+            assignment_questions.at[idx, 'url'] = selected_urls[row['id']]
+    question_list = []
+    for _, q in assignment_questions.iterrows():
+        question_url = q.get('url', '')
+        if not isinstance(question_url, str) or not question_url:
+            entry = catalog.get(int(q['id']))
+            question_url = entry['url'] if entry else None
+        question_list.append({
+            'id': q['id'],
+            'title': q['title'],
+            'points': q['points'],
+            'url': question_url,
+            'difficulty': DIFFICULTY_NAMES.get(q['level'], 'Medium')
+        })
+    return question_list
+
+
+def _timed(fn, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        fresh = [a.copy() if isinstance(a, pd.DataFrame) else a for a in args]
+        start = time.perf_counter()
+        fn(*fresh)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    n = int(argv[0]) if argv else 10000
+    rng = np.random.default_rng(0)
+
+    total = rng.integers(1, 20, n)
+    progress = pd.DataFrame({
+        'email': [f"student{i}@university.edu" for i in range(n)],
+        'student_name': np.where(rng.random(n) < 0.2, ' ', 'Ada Lovelace'),
+        'completed_questions': np.minimum(rng.integers(0, 20, n), total),
+        'total_questions': total
+    })
+    questions = pd.DataFrame({
+        'id': np.arange(n),
+        'title': [f"Question {i}" for i in range(n)],
+        'type': 'sql',
+        'level': rng.integers(1, 4, n),
+        'points': 10
+    })
+    selected_urls = {i: QUESTION_URL.format(f"q-{i}") for i in range(0, n, 2)}
+    catalog = {i: {'url': QUESTION_URL.format(f"slug-{i}")} for i in range(n)}
+
+    cases = [
+        ('status + progress_pct', _rowwise_progress, add_progress_columns, (progress,)),
+        ('class options', lambda f: {r['email']: r['total_questions'] for _, r in f.iterrows()},
+         lambda f: options(f, 'email', 'total_questions'), (progress,)),
+        ('question records', lambda f: [{c: r[c] for c in f.columns} for _, r in f.iterrows()],
+         records, (questions,)),
+        ('question urls', _rowwise_question_links, question_links, (questions, selected_urls, catalog)),
+    ]
+    print(f"{'case':<24}{'row-wise':>12}{'vectorized':>12}{'speedup':>10}   ({n} rows)")
+    for name, slow, fast, args in cases:
+        slow_ms = _timed(slow, *args)
+        fast_ms = _timed(fast, *args)
+        print(f"{name:<24}{slow_ms:>10.1f}ms{fast_ms:>10.1f}ms{slow_ms / fast_ms:>9.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+toolkits/importtime.py
+
+Import-time report for the app entry points, from `python -X importtime` in a fresh interpreter.
+Run it before and after touching top-level imports to catch cold-start regressions.
+
+    python -m toolkits.importtime                      # main, both portals
+    python -m toolkits.importtime main --top 15
+    python -m toolkits.importtime main --budget 800    # exit 1 if main takes over 800ms
+"""
+
+import os
+import re
+import subprocess
+import sys
+
+DEFAULT_MODULES = ['main', 'homework_instructor_portal_live', 'homework_instructor_portal_final']
+HEAVY_PACKAGES = ['pandas', 'numpy', 'plotly', 'openai', 'requests', 'sqlalchemy', 'pyarrow']
+
+_LINE_RE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(module):
+    """
+        Import `module` in a fresh interpreter. Returns (total_us, {package: cumulative_us}) for every
+        top-level package the import pulled in. A package appears once in the trace (the first
+        import does the work), so its cumulative time is what it costs this entry point.
+    """
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+        capture_output=True, text=True, env=env
+    )
+    total = None
+    packages = {}
+    subtree = {}
+    for line in result.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if not match:
+            continue
+        cumulative, indent, name = int(match.group(2)), match.group(3), match.group(4)
+        # Children are printed before their parent, so the module's subtree is everything
+        # since the previous top-level entry (interpreter startup like `site` is excluded)
+        if '.' not in name and name != module:
+            subtree[name] = cumulative
+        if len(indent) <= 1:
+            if name == module:
+                total, packages = cumulative, subtree
+            subtree = {}
+    if total is None:
+        lines = result.stderr.strip().splitlines()
+        raise RuntimeError(lines[-1] if lines else f"import {module} failed")
+    return total, packages
+
+
+def report(module, top=10):
+    total, packages = measure(module)
+    loaded = [p for p in HEAVY_PACKAGES if p in packages]
+    print(f"{module}: {total / 1000:.0f}ms")
+    print(f"  heavy packages loaded at import: {', '.join(loaded) if loaded else 'none'}")
+    for name, us in sorted(packages.items(), key=lambda x: -x[1])[:top]:
+        print(f"  {us / 1000:8.1f}ms  {name}")
+    return total
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    top = int(argv[argv.index('--top') + 1]) if '--top' in argv else 10
+    budget = float(argv[argv.index('--budget') + 1]) if '--budget' in argv else None
+    flags = {'--top', '--budget'}
+    modules = [a for i, a in enumerate(argv) if not a.startswith('--') and (i == 0 or argv[i - 1] not in flags)]
+
+    over_budget = False
+    for module in modules or DEFAULT_MODULES:
+        try:
+            total = report(module, top)
+        except RuntimeError as e:
+            print(f"{module}: import failed ({e})")
+            over_budget = True
+            continue
+        if budget is not None and total / 1000 > budget:
+            print(f"  over budget: {total / 1000:.0f}ms > {budget:.0f}ms")
+            over_budget = True
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
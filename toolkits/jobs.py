@@ -0,0 +1,202 @@
+"""
+toolkits/jobs.py
+
+Local background jobs for long instructor actions (roster invites, assignment emails, progress
+report blasts, report files). Jobs run in a process pool, so they keep going when the instructor
+navigates away or the script rerun is interrupted, and their state lives in a SQLite table
+(IQ_JOBS_DB, default ./jobs.sqlite) that any rerun, session or worker can read:
+
+    job_id = jobs.submit(tasks.invite_students, class_id, ..., owner=user.id, kind='roster')
+    jobs.status(job_id)     # {'status': 'running', 'done': 40, 'total': 120, ...}
+    jobs.result(job_id)     # the function's (JSON) return value once finished
+
+Job functions must be module-level functions outside the Streamlit pages (see toolkits.tasks)
+and report progress with `jobs.report(done, total, message)`. Finished jobs older than
+IQ_JOB_TTL seconds (default a week) are purged from the table on submit, at most once an hour.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+import multiprocessing
+
+JOBS_DB = os.getenv("IQ_JOBS_DB", "jobs.sqlite")
+WORKERS = int(os.getenv("IQ_JOB_WORKERS", "2"))
+REPORT_INTERVAL = 0.5
+JOB_TTL = int(os.getenv("IQ_JOB_TTL", str(7 * 24 * 3600)))
+PURGE_INTERVAL = 3600
+ACTIVE = ('queued', 'running')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT,
+    owner TEXT,
+    status TEXT NOT NULL,
+    done INTEGER NOT NULL DEFAULT 0,
+    total INTEGER,
+    message TEXT,
+    result TEXT,
+    error TEXT,
+    submitter_pid INTEGER,
+    worker_pid INTEGER,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS ix_jobs_owner ON jobs (owner, created_at);
+"""
+
+_pool = None
+_pool_lock = threading.Lock()
+_schema_ready = False
+_current = {'id': None, 'reported_at': 0.0}
+_purged_at = 0.0
+
+
+class JobFailed(Exception):
+    pass
+
+
+@contextmanager
+def _connect():
+    global _schema_ready
+    connection = sqlite3.connect(JOBS_DB, timeout=30, isolation_level=None)
+    connection.row_factory = sqlite3.Row
+    try:
+        if not _schema_ready:
+            # WAL lets pages read job state while a worker writes progress
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+            _schema_ready = True
+        yield connection
+    finally:
+        connection.close()
+
+
+def _update(job_id, **fields):
+    assignments = ', '.join(f"{name} = ?" for name in fields)
+    with _connect() as connection:
+        connection.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the Streamlit server process runs many threads
+            _pool = ProcessPoolExecutor(max_workers=WORKERS, mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+def _alive(pid):
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _run(job_id, fn, args, kwargs):
+    """Worker side: runs `fn` and records the outcome in the job table"""
+    _current['id'] = job_id
+    _current['reported_at'] = 0.0
+    _update(job_id, status='running', worker_pid=os.getpid(), started_at=time.time())
+    try:
+        result = fn(*args, **kwargs)
+        _update(job_id, status='done', result=json.dumps(result, default=str), finished_at=time.time())
+    except Exception as e:
+        _update(job_id, status='failed', error=f"{e}\n\n{traceback.format_exc()}", finished_at=time.time())
+    finally:
+        _current['id'] = None
+
+
+def submit(fn, *args, owner=None, kind=None, **kwargs) -> str:
+    """Queue `fn(*args, **kwargs)` on the process pool. Returns the job id."""
+    global _purged_at
+    if time.time() - _purged_at > PURGE_INTERVAL:
+        _purged_at = time.time()
+        purge()
+    job_id = uuid.uuid4().hex
+    with _connect() as connection:
+        connection.execute(
+            "INSERT INTO jobs (id, kind, owner, status, submitter_pid, created_at) VALUES (?, ?, ?, 'queued', ?, ?)",
+            (job_id, kind or fn.__name__, None if owner is None else str(owner), os.getpid(), time.time())
+        )
+    _get_pool().submit(_run, job_id, fn, args, kwargs)
+    return job_id
+
+
+def report(done, total=None, message=None, force=False):
+    """
+        Progress from inside a job function, written at most every REPORT_INTERVAL seconds (and
+        always for the last item). Does nothing when the function is called outside a job.
+    """
+    job_id = _current['id']
+    if job_id is None:
+        return
+    now = time.time()
+    if not force and now - _current['reported_at'] < REPORT_INTERVAL and done != total:
+        return
+    _current['reported_at'] = now
+    fields = {'done': done, 'message': message}
+    if total is not None:
+        fields['total'] = total
+    _update(job_id, **fields)
+
+
+def _row(row):
+    job = dict(row)
+    # Queued or running jobs whose process is gone were cut off by a restart
+    if job['status'] == 'running' and not _alive(job['worker_pid']) or \
+            job['status'] == 'queued' and not _alive(job['submitter_pid']):
+        job['status'] = 'failed'
+        job['error'] = 'Interrupted: the worker process exited before the job finished'
+        _update(job['id'], status='failed', error=job['error'], finished_at=time.time())
+    job['result'] = json.loads(job['result']) if job['result'] else None
+    return job
+
+
+def status(job_id):
+    """The job's row as a dict (result decoded), or None for an unknown id"""
+    with _connect() as connection:
+        row = connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return _row(row) if row else None
+
+
+def result(job_id):
+    """The return value of a finished job, None while it is still running. Raises JobFailed."""
+    job = status(job_id)
+    if job is None:
+        raise KeyError(job_id)
+    if job['status'] == 'failed':
+        raise JobFailed(job['error'])
+    return job['result']
+
+
+def recent(owner, limit=20):
+    """The owner's latest jobs, newest first"""
+    with _connect() as connection:
+        rows = connection.execute(
+            "SELECT * FROM jobs WHERE owner = ? ORDER BY created_at DESC LIMIT ?", (str(owner), limit)
+        ).fetchall()
+    return [_row(row) for row in rows]
+
+
+def purge(max_age=JOB_TTL):
+    """Deletes finished jobs older than `max_age` seconds"""
+    with _connect() as connection:
+        return connection.execute(
+            f"DELETE FROM jobs WHERE status NOT IN {ACTIVE} AND finished_at < ?",
+            (time.time() - max_age,)
+        ).rowcount
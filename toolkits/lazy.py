@@ -0,0 +1,45 @@
+import importlib
+import sys
+import threading
+import types
+
+_lock = threading.RLock()
+
+
+class LazyModule(types.ModuleType):
+    """
+        Stand-in for a module that is imported on first attribute access. After loading, the real
+        module's namespace is copied in so later lookups are ordinary attribute reads.
+    """
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__['_lazy_target'] = name
+
+    def _load(self):
+        with _lock:
+            module = importlib.import_module(self.__dict__['_lazy_target'])
+            self.__dict__.update(module.__dict__)
+            return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        loaded = '__file__' in self.__dict__
+        return f"<lazy module '{self.__dict__['_lazy_target']}'{'' if loaded else ' (not loaded)'}>"
+
+
+def lazy_import(name):
+    """
+        `pd = lazy_import('pandas')` in place of `import pandas as pd`: the import runs when the
+        module is first used, so pages that never draw a chart never load plotly. Returns the real
+        module if something already imported it.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
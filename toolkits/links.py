@@ -0,0 +1,154 @@
+import hashlib
+import hmac
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Optional
+import dotenv
+dotenv.load_dotenv()
+
+SIGNATURE_LENGTH = 16
+LINK_MAX_AGE = int(os.getenv("IQ_LINK_MAX_AGE", str(90 * 24 * 3600)))
+
+logger = logging.getLogger(__name__)
+
+
+def _link(url: str, assignment_id, timestamp: int, signature: str) -> str:
+    # Append parameters correctly based on whether URL already has query params
+    separator = '&' if '?' in url else '?'
+    return f"{url}{separator}hw={assignment_id}&t={timestamp}&u={signature}"
+
+
+class LinkSigner:
+    """
+        HMAC-SHA256 signer for homework links. The message is
+        `assignment_id:timestamp:question_id:email`, and the keyed state is reused with
+        hmac.copy() at every level so a student's link only hashes their email.
+    """
+
+    def __init__(self, secret: bytes):
+        self._base = hmac.new(secret, digestmod=hashlib.sha256)
+
+    def _prefixed(self, assignment_id, timestamp: int):
+        mac = self._base.copy()
+        mac.update(f"{assignment_id}:{timestamp}:".encode())
+        return mac
+
+    def signature(self, question_id, assignment_id, user_email: str, timestamp: int) -> str:
+        mac = self._prefixed(assignment_id, timestamp)
+        mac.update(f"{question_id}:{user_email}".encode())
+        return mac.hexdigest()[:SIGNATURE_LENGTH]
+
+    def sign_link(self, question_url: str, question_id, assignment_id, user_email: str,
+                  timestamp: Optional[int] = None) -> str:
+        timestamp = int(time.time()) if timestamp is None else timestamp
+        return _link(question_url, assignment_id, timestamp,
+                     self.signature(question_id, assignment_id, user_email, timestamp))
+
+    def sign_matrix(self, assignment_id, questions: List[Dict], emails: List[str],
+                    timestamp: Optional[int] = None) -> Dict[str, Dict]:
+        """
+            Links for every student x question in one pass with a single timestamp.
+            `questions` are dicts with 'id' and 'url'. Returns {email: {question_id: link}}.
+        """
+        timestamp = int(time.time()) if timestamp is None else timestamp
+        assignment_mac = self._prefixed(assignment_id, timestamp)
+
+        question_macs = []
+        for q in questions:
+            mac = assignment_mac.copy()
+            mac.update(f"{q['id']}:".encode())
+            question_macs.append((q['id'], q['url'], mac))
+
+        matrix = {}
+        for email in emails:
+            encoded = email.encode()
+            row = {}
+            for question_id, url, question_mac in question_macs:
+                mac = question_mac.copy()
+                mac.update(encoded)
+                row[question_id] = _link(url, assignment_id, timestamp, mac.hexdigest()[:SIGNATURE_LENGTH])
+            matrix[email] = row
+        return matrix
+
+
+class LinkVerifier:
+    """
+        Checks link signatures against a LinkSigner's key, remembering recent results in an LRU
+        so repeat clicks skip the HMAC. Links older than `max_age` seconds are rejected.
+    """
+
+    def __init__(self, signer: LinkSigner, max_age: int = LINK_MAX_AGE, cache_size=4096):
+        self.signer = signer
+        self.max_age = max_age
+        self.cache_size = cache_size
+        self._recent = OrderedDict()
+        self._lock = threading.Lock()
+
+    def verify(self, question_id, assignment_id, user_email: str, timestamp, signature: str) -> bool:
+        try:
+            timestamp = int(timestamp)
+        except (TypeError, ValueError):
+            return False
+        if time.time() - timestamp > self.max_age:
+            return False
+        key = (str(question_id), str(assignment_id), user_email, timestamp, signature)
+        with self._lock:
+            cached = self._recent.get(key)
+            if cached is not None:
+                self._recent.move_to_end(key)
+                return cached
+        expected = self.signer.signature(question_id, assignment_id, user_email, timestamp)
+        valid = hmac.compare_digest(expected, str(signature))
+        with self._lock:
+            self._recent[key] = valid
+            while len(self._recent) > self.cache_size:
+                self._recent.popitem(last=False)
+        return valid
+
+
+class UnsignedLinks:
+    """
+        Stand-in for LinkSigner when IQ_LINK_SECRET is not configured: the same interface, links
+        carry the assignment id but no signature, as they did before signing was added.
+    """
+
+    def sign_link(self, question_url: str, question_id, assignment_id, user_email: str,
+                  timestamp: Optional[int] = None) -> str:
+        separator = '&' if '?' in question_url else '?'
+        return f"{question_url}{separator}hw={assignment_id}"
+
+    def sign_matrix(self, assignment_id, questions: List[Dict], emails: List[str],
+                    timestamp: Optional[int] = None) -> Dict[str, Dict]:
+        row = {q['id']: self.sign_link(q['url'], q['id'], assignment_id, None) for q in questions}
+        return {email: dict(row) for email in emails}
+
+
+_signer = None
+
+
+def get_signer():
+    """LinkSigner keyed by IQ_LINK_SECRET, or UnsignedLinks (with a warning) when it is not set"""
+    global _signer
+    if _signer is None:
+        secret = os.getenv("IQ_LINK_SECRET")
+        if secret:
+            _signer = LinkSigner(secret.encode())
+        else:
+            logger.warning("IQ_LINK_SECRET is not set, homework links are sent unsigned")
+            _signer = UnsignedLinks()
+    return _signer
+
+
+_verifier = None
+
+
+def get_verifier() -> Optional[LinkVerifier]:
+    """LinkVerifier for get_signer()'s key, None when links are sent unsigned"""
+    global _verifier
+    signer = get_signer()
+    if _verifier is None and isinstance(signer, LinkSigner):
+        _verifier = LinkVerifier(signer)
+    return _verifier
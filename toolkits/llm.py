@@ -1,9 +1,11 @@
 from pyexpat.errors import messages
 from typing import Any
-from openai import OpenAI
 import dotenv
+from toolkits.lazy import lazy_import
 dotenv.load_dotenv()
 
+openai = lazy_import('openai')
+
 class Template:
     """
         For templates, we need to define
@@ -37,7 +39,7 @@ class Call:
     def __init__(self, template: Template):
         self.template = template
         self.history = template.history.copy()
-        self.llm = OpenAI()
+        self.llm = openai.OpenAI()
 
 
 
@@ -53,15 +55,8 @@ class Call:
         ).choices[0].message.content
 
 
-
-
-
-
-
-
-
-
-
-
-
-
+def embed(texts, model='text-embedding-3-small', timeout=None):
+    """Embed a batch of texts, returns one vector (list of floats) per text. `timeout` also disables retries."""
+    client = openai.OpenAI(timeout=timeout, max_retries=0) if timeout else openai.OpenAI()
+    response = client.embeddings.create(model=model, input=texts)
+    return [item.embedding for item in response.data]
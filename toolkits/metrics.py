@@ -0,0 +1,210 @@
+"""
+toolkits/metrics.py
+
+Process-wide counters, histograms and gauges in the Prometheus text format. Streamlit replicas
+serve them on a side port, the completion cron writes them to a textfile for node_exporter:
+
+    IQ_METRICS_PORT=9101 streamlit run main.py       # GET http://host:9101/metrics
+    IQ_METRICS_TEXTFILE=/var/lib/node_exporter/iq_completion.prom python update_completion_status.py
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels) + '}'
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(labels)} {value:g}")
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """A value that is set, or read from `function` every time the metrics are rendered"""
+    kind = 'gauge'
+
+    def __init__(self, name, help_text, function=None):
+        super().__init__(name, help_text)
+        self.function = function
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[tuple(sorted(labels.items()))] = value
+
+    def render(self):
+        if self.function is not None:
+            try:
+                values = self.function()
+            except Exception:
+                values = {}
+            with self._lock:
+                # The function returns a number, or {labels tuple: number}
+                self._values = dict(values) if isinstance(values, dict) else {(): values}
+        return super().render()
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry['counts'][i] += 1
+            entry['sum'] += value
+            entry['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, entry in sorted(self._values.items()):
+                for bound, count in zip(self.buckets, entry['counts']):
+                    lines.append(f"{self.name}_bucket{_labels(labels + (('le', f'{bound:g}'),))} {count}")
+                lines.append(f"{self.name}_bucket{_labels(labels + (('le', '+Inf'),))} {entry['count']}")
+                lines.append(f"{self.name}_sum{_labels(labels)} {entry['sum']:g}")
+                lines.append(f"{self.name}_count{_labels(labels)} {entry['count']}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            return metric
+
+    def counter(self, name, help_text) -> Counter:
+        return self._get(Counter, name, help_text)
+
+    def gauge(self, name, help_text, function=None) -> Gauge:
+        return self._get(Gauge, name, help_text, function)
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help_text, buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+counter = registry.counter
+gauge = registry.gauge
+histogram = registry.histogram
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = registry.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+_serve_attempted = False
+
+
+def serve(port, host='0.0.0.0'):
+    """Serve /metrics on a side port from a daemon thread, once per process"""
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _Handler)
+            threading.Thread(target=_server.serve_forever, daemon=True, name='metrics').start()
+    return _server
+
+
+def serve_from_env():
+    """serve() on IQ_METRICS_PORT if it is set. Safe to call on every Streamlit rerun."""
+    global _serve_attempted
+    port = os.getenv("IQ_METRICS_PORT")
+    if not port or _serve_attempted:
+        return _server
+    _serve_attempted = True
+    try:
+        return serve(int(port))
+    except OSError as e:
+        # Another replica on this host already has the port
+        print(f"metrics: cannot listen on {port}: {e}")
+        return None
+
+
+def write_textfile(path=None):
+    """Atomically write the metrics for node_exporter's textfile collector"""
+    path = path or os.getenv("IQ_METRICS_TEXTFILE")
+    if not path:
+        return None
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        f.write(registry.render())
+    os.replace(tmp, path)
+    return path
@@ -0,0 +1,177 @@
+"""
+toolkits/profiling.py
+
+Opt-in sampling profiler for page reruns. Turn it on with IQ_PROFILE=1, or, where
+IQ_PROFILE_QUERY_PARAM=1 allows it (off by default, since profiles are written to disk), by opening
+the app with ?profile=1. Every rerun of a @profiled page then:
+
+  - samples the page's Python stack every IQ_PROFILE_INTERVAL ms (default 5) from a side thread,
+  - splits the wall time into db / email / http / rendering / dataframe / python,
+  - writes the stacks in collapsed format (flamegraph.pl, speedscope, inferno) to
+    IQ_PROFILE_DIR (default ./profiles) and appends the breakdown to summary.jsonl there,
+  - shows the breakdown in a sidebar expander.
+
+Nested @profiled calls (show_dashboard -> show_progress_page) run under the outer profile.
+"""
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+import streamlit as st
+
+PROFILE_DIR = os.getenv("IQ_PROFILE_DIR", "profiles")
+INTERVAL = float(os.getenv("IQ_PROFILE_INTERVAL", "5")) / 1000
+
+# The first frame (outermost first, below the page function) from one of these decides the category
+CATEGORIES = [
+    ('db', ('toolkits.db', 'sqlalchemy', 'pymysql', 'MySQLdb', 'sqlite3')),
+    ('email', ('toolkits.email', 'smtplib', 'email')),
+    ('http', ('requests', 'urllib3', 'http', 'httpx', 'openai', 'ssl', 'socket')),
+    ('rendering', ('streamlit', 'plotly')),
+    ('dataframe', ('pandas', 'numpy', 'pyarrow')),
+]
+
+# Streamlit's fragment and cache wrappers sit between the page and the panel code they run, so
+# they never decide the category
+PASSTHROUGH = ('streamlit.runtime',)
+
+_local = threading.local()
+
+
+def enabled() -> bool:
+    if os.getenv("IQ_PROFILE") == "1":
+        return True
+    if os.getenv("IQ_PROFILE_QUERY_PARAM") != "1":
+        return False
+    try:
+        return st.query_params.get("profile") == "1"
+    except Exception:
+        return False
+
+
+def _category(module):
+    if any(module == prefix or module.startswith(prefix + '.') for prefix in PASSTHROUGH):
+        return None
+    for category, prefixes in CATEGORIES:
+        for prefix in prefixes:
+            if module == prefix or module.startswith(prefix + '.'):
+                return category
+    return None
+
+
+class Sampler:
+    """
+        Samples one thread's stack from a daemon thread. Only frames above `root` (the profiled
+        function's code object) are kept, so Streamlit's script runner does not show up in
+        every stack.
+    """
+
+    def __init__(self, thread_id, root, interval=INTERVAL):
+        self.thread_id = thread_id
+        self.root = root
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _sample(self):
+        frame = sys._current_frames().get(self.thread_id)
+        stack = []
+        while frame is not None:
+            stack.append(frame)
+            if frame.f_code is self.root:
+                break
+            frame = frame.f_back
+        else:
+            return
+        self.stacks[tuple(
+            (f.f_globals.get('__name__', '?'), f.f_code.co_name) for f in reversed(stack)
+        )] += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def breakdown(self, wall_ms):
+        """Wall time per category, apportioned by sample counts"""
+        counts = Counter()
+        for stack, n in self.stacks.items():
+            category = next((c for c in (_category(module) for module, _ in stack) if c), 'python')
+            counts[category] += n
+        total = sum(counts.values())
+        return {c: round(wall_ms * n / total, 1) for c, n in counts.most_common()} if total else {}
+
+    def collapsed(self):
+        """One `frame;frame;frame count` line per distinct stack"""
+        return '\n'.join(
+            f"{';'.join(f'{module}.{func}' for module, func in stack)} {n}"
+            for stack, n in self.stacks.most_common()
+        )
+
+
+def _write(name, started, wall_ms, sampler, breakdown):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stamp = started.strftime('%Y%m%d-%H%M%S-%f')
+    path = os.path.join(PROFILE_DIR, f"{stamp}-{name}.folded")
+    with open(path, 'w') as f:
+        f.write(sampler.collapsed() + '\n')
+    with open(os.path.join(PROFILE_DIR, 'summary.jsonl'), 'a') as f:
+        f.write(json.dumps({
+            'page': name,
+            'started_at': started.isoformat(timespec='milliseconds'),
+            'wall_ms': round(wall_ms, 1),
+            'samples': sum(sampler.stacks.values()),
+            'breakdown_ms': breakdown,
+            'stacks': path
+        }) + '\n')
+    return path
+
+
+def _show(name, wall_ms, breakdown, path):
+    with st.sidebar.expander(f"Profile: {name} ({wall_ms:.0f}ms)"):
+        for category, ms in breakdown.items():
+            st.caption(f"{category}: {ms:.0f}ms ({ms * 100 / wall_ms:.0f}%)")
+        st.caption(f"Stacks: {path}")
+
+
+def profiled(fn):
+    """Profile each call of a page function when profiling is enabled, otherwise just call it"""
+    name = fn.__name__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if getattr(_local, 'active', False) or not enabled():
+            return fn(*args, **kwargs)
+
+        _local.active = True
+        sampler = Sampler(threading.get_ident(), fn.__code__)
+        started = datetime.now()
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            sampler.stop()
+            _local.active = False
+            wall_ms = (time.perf_counter() - start) * 1000
+            breakdown = sampler.breakdown(wall_ms)
+            try:
+                path = _write(name, started, wall_ms, sampler, breakdown)
+                _show(name, wall_ms, breakdown, path)
+            except Exception as e:
+                # A profile that cannot be written must not break the page
+                print(f"profiling: could not record {name}: {e}")
+
+    return wrapper
@@ -0,0 +1,154 @@
+"""
+toolkits/roster.py
+
+Bulk roster import. A CSV upload or pasted text is parsed as a stream, emails are normalized and
+deduplicated in memory, existing members and registered users are resolved with one batched IN
+query each, the new members go in with multi-row INSERTs in a single transaction (together with
+the class's summary counters), and the invitations are queued as one background job. Every input
+email gets an outcome:
+
+    added            new member (user_id set when the email already has an account)
+    already_member   an active member of the class with this email exists
+    duplicate        the email appeared earlier in the same input
+    invalid          not an email address
+"""
+
+import csv
+import io
+import re
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Tuple
+from toolkits import jobs, tasks, summaries
+from toolkits.db import run_query, execute_transaction
+
+EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+IN_BATCH = 1000
+INSERT_BATCH = 500
+OUTCOMES = ('added', 'already_member', 'duplicate', 'invalid')
+_SPLIT_RE = re.compile(r'[\s,;]+')
+
+
+def normalize_email(raw: str) -> str:
+    """'  "Jane Doe" <Jane.Doe@Uni.EDU>' -> 'jane.doe@uni.edu'"""
+    value = raw.strip()
+    if '<' in value and value.endswith('>'):
+        value = value[value.rindex('<') + 1:-1]
+    return value.strip().strip('"\'').lower()
+
+
+def _csv_rows(file) -> Iterator[Tuple[int, str]]:
+    """(line, raw email) from an uploaded CSV, read row by row: the column named like 'email', else the first"""
+    if file.seekable():
+        file.seek(0)
+    wrapped = not isinstance(file, io.TextIOBase)
+    text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='') if wrapped else file
+    try:
+        reader = csv.reader(text)
+        header = next(reader, None)
+        if header is None:
+            return
+        column = next((i for i, name in enumerate(header) if 'email' in name.lower()), None)
+        if column is None:
+            column = 0
+            # A file without a header row starts with an email
+            if header and EMAIL_RE.match(normalize_email(header[0])):
+                yield reader.line_num, header[0]
+        for row in reader:
+            if len(row) > column and row[column].strip():
+                yield reader.line_num, row[column]
+    finally:
+        if wrapped:
+            # Leave the upload open for the next rerun
+            text.detach()
+
+
+def _text_rows(text: str) -> Iterator[Tuple[int, str]]:
+    """(line, raw email) from pasted text: one or more emails per line, separated by commas, semicolons or spaces"""
+    for line_number, line in enumerate(text.splitlines(), 1):
+        for value in _SPLIT_RE.split(line):
+            if value:
+                yield line_number, value
+
+
+def read_emails(source) -> Iterator[Tuple[int, str]]:
+    """Pasted text (str) or an uploaded CSV file (binary or text file object)"""
+    return _text_rows(source) if isinstance(source, str) else _csv_rows(source)
+
+
+def _batches(values: List, size: int) -> Iterator[List]:
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _in_list(values: Iterable[str]) -> str:
+    # Only addresses matching EMAIL_RE get here, they cannot contain quotes
+    return ', '.join(f"'{v}'" for v in values)
+
+
+def active_members(class_id, emails: List[str]) -> set:
+    found = set()
+    for batch in _batches(emails, IN_BATCH):
+        result = run_query(f"""
+        SELECT email FROM hackathon_2025_class_members
+        WHERE class_id = {class_id} AND is_active = 1 AND email IN ({_in_list(batch)})
+        """)
+        if len(result) > 0:
+            found.update(email.lower() for email in result['email'])
+    return found
+
+
+def user_ids(emails: List[str]) -> Dict[str, int]:
+    found = {}
+    for batch in _batches(emails, IN_BATCH):
+        result = run_query(f"SELECT id, email FROM users WHERE email IN ({_in_list(batch)})")
+        if len(result) > 0:
+            for user_id, email in zip(result['id'], result['email']):
+                found.setdefault(email.lower(), int(user_id))
+    return found
+
+
+def import_roster(class_id, source, invite=None, owner=None) -> Dict:
+    """
+        Adds every new email in `source` to the class. `invite` = (class_name, instructor_email)
+        queues the invitation emails for the added students as one background job.
+        Returns {'counts': {outcome: n}, 'rows': [{'line', 'email', 'outcome', 'user_id'}], 'invite_job'}.
+    """
+    rows = []
+    seen = set()
+    new_emails = []
+    for line, raw in read_emails(source):
+        email = normalize_email(raw)
+        row = {'line': line, 'email': email or raw.strip(), 'outcome': None, 'user_id': None}
+        if not EMAIL_RE.match(email):
+            row['outcome'] = 'invalid'
+        elif email in seen:
+            row['outcome'] = 'duplicate'
+        else:
+            seen.add(email)
+            new_emails.append(email)
+        rows.append(row)
+
+    members = active_members(class_id, new_emails) if new_emails else set()
+    to_add = [e for e in new_emails if e not in members]
+    users = user_ids(to_add) if to_add else {}
+
+    if to_add:
+        execute_transaction([
+            "INSERT INTO hackathon_2025_class_members (class_id, email, user_id) VALUES " + ', '.join(
+                f"({class_id}, '{email}', {users.get(email, 'NULL')})" for email in batch)
+            for batch in _batches(to_add, INSERT_BATCH)
+        ] + summaries.refresh_sql(class_id))
+
+    for row in rows:
+        if row['outcome'] is None:
+            row['outcome'] = 'already_member' if row['email'] in members else 'added'
+            row['user_id'] = users.get(row['email']) if row['outcome'] == 'added' else None
+
+    invite_job = None
+    if to_add and invite:
+        class_name, instructor_email = invite
+        invite_job = jobs.submit(tasks.send_invitations, class_name, instructor_email, to_add,
+                                 owner=owner, kind='roster invitations')
+
+    counts = Counter(row['outcome'] for row in rows)
+    return {'counts': {outcome: counts.get(outcome, 0) for outcome in OUTCOMES}, 'rows': rows, 'invite_job': invite_job}
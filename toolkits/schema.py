@@ -0,0 +1,210 @@
+"""
+toolkits/schema.py
+
+Process-wide registry of the database schema. The database is reflected once (SQLAlchemy
+MetaData, the same reflection introspect_schema.py prints) and page code asks the registry
+which tables and columns exist instead of running SHOW TABLES / SHOW COLUMNS per request.
+The reflection is redone every IQ_SCHEMA_TTL seconds (default 300) so a migration run from another
+process is picked up. DDL never runs on the request path; missing tables are created from the CLI.
+
+    python -m toolkits.schema show       # tables and columns
+    python -m toolkits.schema version    # schema hash, changes whenever a table or column does
+    python -m toolkits.schema migrate    # create missing instructor portal and summary tables
+"""
+
+import hashlib
+import os
+import sys
+import threading
+import time
+from typing import Dict, List
+from toolkits.db import execute_query, get_engine
+from toolkits.lazy import lazy_import
+
+sqlalchemy = lazy_import('sqlalchemy')
+
+SCHEMA_TTL = float(os.getenv("IQ_SCHEMA_TTL", "300"))
+
+# (table, DDL) in dependency order
+MIGRATIONS = [
+    ('hackathon_2025_instructor_classes', """
+    CREATE TABLE IF NOT EXISTS hackathon_2025_instructor_classes (
+        id BIGINT AUTO_INCREMENT PRIMARY KEY,
+        user_id INT NOT NULL,
+        class_name VARCHAR(256) NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users(id)
+    )
+    """),
+    ('hackathon_2025_class_members', """
+    CREATE TABLE IF NOT EXISTS hackathon_2025_class_members (
+        id BIGINT AUTO_INCREMENT PRIMARY KEY,
+        class_id BIGINT NOT NULL,
+        email VARCHAR(255) NOT NULL,
+        user_id INT NULL,
+        invited_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        joined_at DATETIME NULL,
+        is_active TINYINT(1) DEFAULT 1,
+        FOREIGN KEY (class_id) REFERENCES hackathon_2025_instructor_classes(id)
+    )
+    """),
+    ('hackathon_2025_assignments', """
+    CREATE TABLE IF NOT EXISTS hackathon_2025_assignments (
+        id BIGINT AUTO_INCREMENT PRIMARY KEY,
+        class_id BIGINT NOT NULL,
+        name VARCHAR(255) NOT NULL,
+        due_date DATETIME NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        is_active TINYINT(1) DEFAULT 1,
+        FOREIGN KEY (class_id) REFERENCES hackathon_2025_instructor_classes(id)
+    )
+    """),
+    ('hackathon_2025_assignment_questions', """
+    CREATE TABLE IF NOT EXISTS hackathon_2025_assignment_questions (
+        id BIGINT AUTO_INCREMENT PRIMARY KEY,
+        assignment_id BIGINT NOT NULL,
+        question_id INT NOT NULL,
+        points INT DEFAULT 0,
+        FOREIGN KEY (assignment_id) REFERENCES hackathon_2025_assignments(id),
+        FOREIGN KEY (question_id) REFERENCES questions(id)
+    )
+    """),
+    # Counters maintained by toolkits.summaries on the write paths
+    ('hackathon_2025_class_summary', """
+    CREATE TABLE IF NOT EXISTS hackathon_2025_class_summary (
+        class_id BIGINT PRIMARY KEY,
+        active_students INT NOT NULL DEFAULT 0,
+        assignments INT NOT NULL DEFAULT 0,
+        questions INT NOT NULL DEFAULT 0,
+        updated_at DATETIME NOT NULL
+    )
+    """),
+    ('hackathon_2025_assignment_summary', """
+    CREATE TABLE IF NOT EXISTS hackathon_2025_assignment_summary (
+        assignment_id BIGINT PRIMARY KEY,
+        class_id BIGINT NOT NULL,
+        questions INT NOT NULL DEFAULT 0,
+        updated_at DATETIME NOT NULL
+    )
+    """),
+    ('hackathon_2025_instructor_summary', """
+    CREATE TABLE IF NOT EXISTS hackathon_2025_instructor_summary (
+        instructor_id INT PRIMARY KEY,
+        classes INT NOT NULL DEFAULT 0,
+        students INT NOT NULL DEFAULT 0,
+        active_assignments INT NOT NULL DEFAULT 0,
+        updated_at DATETIME NOT NULL
+    )
+    """),
+]
+
+
+def reflect_schema(db_url=None):
+    """SQLAlchemy MetaData reflected from `db_url` (IQ_DB_AUTH by default)"""
+    if not (db_url or os.getenv("IQ_DB_AUTH")):
+        raise RuntimeError("IQ_DB_AUTH is not set in the environment")
+    engine = sqlalchemy.create_engine(db_url) if db_url else get_engine()
+    metadata = sqlalchemy.MetaData()
+    metadata.reflect(bind=engine)
+    return metadata
+
+
+class SchemaRegistry:
+    """
+        Table -> {column: type} for the whole database, reflected on first use and again once
+        it is `ttl` seconds old. refresh() drops it right away, e.g. after a migration.
+    """
+
+    def __init__(self, ttl=SCHEMA_TTL):
+        self.ttl = ttl
+        self._tables = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Dict[str, str]]:
+        with self._lock:
+            if self._tables is None or time.monotonic() - self._loaded_at > self.ttl:
+                metadata = reflect_schema()
+                self._tables = {
+                    name: {col.name: str(col.type) for col in table.columns}
+                    for name, table in metadata.tables.items()
+                }
+                self._loaded_at = time.monotonic()
+            return self._tables
+
+    def tables(self) -> List[str]:
+        return sorted(self._load())
+
+    def has_table(self, table: str) -> bool:
+        return table in self._load()
+
+    def columns(self, table: str) -> List[str]:
+        return list(self._load().get(table, {}))
+
+    def column_types(self, table: str) -> Dict[str, str]:
+        return dict(self._load().get(table, {}))
+
+    def has_column(self, table: str, column: str) -> bool:
+        return column in self._load().get(table, {})
+
+    def missing_tables(self) -> List[str]:
+        return [table for table, _ in MIGRATIONS if not self.has_table(table)]
+
+    @property
+    def version(self) -> str:
+        """Short hash over every table, column and type"""
+        digest = hashlib.sha1()
+        for table, columns in sorted(self._load().items()):
+            digest.update(table.encode())
+            for column, type_ in sorted(columns.items()):
+                digest.update(f"|{column}:{type_}".encode())
+            digest.update(b'\n')
+        return digest.hexdigest()[:12]
+
+    def refresh(self):
+        with self._lock:
+            self._tables = None
+
+
+schema_registry = SchemaRegistry()
+
+
+def migrate(registry: SchemaRegistry = schema_registry) -> List[str]:
+    """Creates the instructor tables that are missing. Returns the names created."""
+    created = []
+    for table, ddl in MIGRATIONS:
+        if not registry.has_table(table):
+            execute_query(ddl)
+            created.append(table)
+    registry.refresh()
+    if any(table.endswith('_summary') for table in created):
+        # Backfill the new counters from the existing rows
+        from toolkits import summaries
+        summaries.rebuild()
+    return created
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv else 'show'
+
+    if command == 'show':
+        for table in schema_registry.tables():
+            print(f"Table: {table}")
+            for column, type_ in schema_registry.column_types(table).items():
+                print(f"  - {column:<20} {type_}")
+            print()
+    elif command == 'version':
+        print(schema_registry.version)
+    elif command == 'migrate':
+        created = migrate()
+        print(f"created: {', '.join(created)}" if created else "schema is up to date")
+        print(f"version: {schema_registry.version}")
+    else:
+        print(f"unknown command {command!r}, expected show, version or migrate")
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,233 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Dict, Optional, Tuple
+import dotenv
+from toolkits import metrics
+from toolkits.db import run_query
+from toolkits.catalog import question_catalog, QUESTION_URL
+from toolkits.search_index import index_search
+from toolkits.lazy import lazy_import
+
+requests = lazy_import('requests')
+dotenv.load_dotenv()
+
+MAGUS_SEARCH_URL = "https://magus.interviewquery.com/search"
+
+# Separate pools: hung magus calls filling the remote pool must not queue the local hedge behind them
+_remote_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="question-search-remote")
+_local_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="question-search-local")
+
+searches = metrics.counter('iq_search_requests_total', 'Question searches by the engine that answered')
+remote_seconds = metrics.histogram('iq_search_remote_seconds', 'Magus search latency')
+remote_failures = metrics.counter('iq_search_remote_failures_total', 'Magus searches that raised')
+
+
+class CircuitBreaker:
+    """
+        Closed -> open after `failure_threshold` consecutive failures (slow calls count as failures).
+        Open -> half-open after `reset_timeout` seconds, where a single trial call decides the next state.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=3, latency_threshold=2.0, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.latency_threshold = latency_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self) -> bool:
+        """Whether a remote call may be attempted right now"""
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record(self, elapsed: float, ok: bool):
+        with self._lock:
+            self._trial_in_flight = False
+            if ok and elapsed <= self.latency_threshold:
+                self.failures = 0
+                self.opened_at = None
+                return
+            self.failures += 1
+            if self.failures >= self.failure_threshold or self.opened_at is not None:
+                self.opened_at = time.monotonic()
+
+
+def magus_search(query: str, limit: int = 20, timeout: float = 10) -> List[Dict]:
+    """Semantic search against magus, returns the raw result list"""
+    payload = {
+        "query": query,
+        "content_types": ["questions"],
+        "companies": [],
+        "positions": [],
+        "limit": limit
+    }
+    response = requests.post(MAGUS_SEARCH_URL, json=payload, timeout=timeout)
+    response.raise_for_status()
+    return response.json().get('results', [])
+
+
+def database_search(query: str, limit: int = 20) -> List[Dict]:
+    """LIKE search over published questions, shaped like magus results"""
+    escaped = query.replace("'", "''")
+    search_sql = f"""
+    SELECT id, title, type, level, slug
+    FROM questions
+    WHERE (title LIKE '%{escaped}%' OR body_markdown LIKE '%{escaped}%')
+    AND is_published = 1
+    LIMIT {int(limit)}
+    """
+    results = run_query(search_sql)
+    return [_as_hit(row) for row in results.to_dict('records')]
+
+
+def _as_hit(row: Dict) -> Dict:
+    """Wrap a questions row so it can stand in for a magus result"""
+    slug = row.get('slug')
+    url = QUESTION_URL.format(slug) if isinstance(slug, str) and slug else ''
+    return {
+        'content_id': int(row['id']),
+        'url': url,
+        'data': {
+            'id': int(row['id']),
+            'title': row.get('title'),
+            'type': row.get('type'),
+            'level': row.get('level'),
+            'url': url
+        }
+    }
+
+
+def hydrate_questions(hits: List[Dict]) -> List[Dict]:
+    """Question details for search hits from the catalog cache, preserving hit order"""
+    question_urls = {}
+    for hit in hits:
+        content_id = hit.get('content_id')
+        if content_id:
+            question_urls.setdefault(int(content_id), hit.get('url', ''))
+    if not question_urls:
+        return []
+
+    catalog = question_catalog.get_many(question_urls)
+
+    questions = []
+    for qid, url in question_urls.items():
+        entry = catalog.get(qid)
+        if entry is None or not entry['is_published']:
+            continue
+        questions.append({
+            'id': qid,
+            'title': entry['title'],
+            'type': entry['type'],
+            'level': entry['level'],
+            'body_markdown': entry['body_markdown'],
+            'url': url
+        })
+    return questions
+
+
+class SearchClient:
+    """
+        Question search with magus as the primary engine and a local engine as fallback.
+        The breaker skips magus entirely while it is failing or slow. With `hedge_after` set,
+        the local search is started once magus has been silent for that many seconds and
+        whichever answers first wins.
+    """
+
+    def __init__(self, remote=magus_search, local=database_search, breaker: CircuitBreaker = None,
+                 hedge_after: Optional[float] = None, timeout: float = 10):
+        self.remote = remote
+        self.local = local
+        self.breaker = breaker or CircuitBreaker()
+        self.hedge_after = hedge_after
+        self.timeout = timeout
+
+    def _remote(self, query, limit):
+        start = time.monotonic()
+        try:
+            hits = self.remote(query, limit=limit, timeout=self.timeout)
+        except Exception:
+            self.breaker.record(time.monotonic() - start, ok=False)
+            remote_failures.inc()
+            raise
+        finally:
+            remote_seconds.observe(time.monotonic() - start)
+        self.breaker.record(time.monotonic() - start, ok=True)
+        return hits
+
+    def search(self, query: str, limit: int = 20) -> Tuple[List[Dict], str]:
+        """Returns (hits, source) where source is 'magus' or 'local'"""
+        hits, source = self._search(query, limit)
+        searches.inc(source=source)
+        return hits, source
+
+    def _search(self, query, limit):
+        if not self.breaker.allow():
+            return self.local(query, limit=limit), 'local'
+
+        if self.hedge_after is None:
+            try:
+                return self._remote(query, limit), 'magus'
+            except Exception:
+                return self.local(query, limit=limit), 'local'
+
+        remote = _remote_executor.submit(self._remote, query, limit)
+        done, _ = wait([remote], timeout=self.hedge_after)
+        if remote in done:
+            if remote.exception() is None:
+                return remote.result(), 'magus'
+            return self.local(query, limit=limit), 'local'
+
+        local = _local_executor.submit(self.local, query, limit=limit)
+        pending = {remote, local}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result(), 'magus' if future is remote else 'local'
+        # Both failed, surface the local error since that is the last resort
+        return local.result(), 'local'
+
+
+def local_search(query: str, limit: int = 20) -> List[Dict]:
+    """Local engine picked by IQ_SEARCH_LOCAL_ENGINE: 'bm25' (default) or 'vector'"""
+    if os.getenv("IQ_SEARCH_LOCAL_ENGINE", "bm25") == "vector":
+        from toolkits.vector_index import vector_search
+        return vector_search(query, limit=limit)
+    return index_search(query, limit=limit)
+
+
+def _hedge_from_env():
+    value = os.getenv("IQ_SEARCH_HEDGE_AFTER")
+    return float(value) if value else None
+
+
+# Process-wide client so the breaker state is shared by every session
+question_search = SearchClient(local=local_search, hedge_after=_hedge_from_env())
+metrics.gauge('iq_search_breaker_open', 'Whether the magus circuit breaker is skipping remote calls',
+              lambda: 0 if question_search.breaker.state == CircuitBreaker.CLOSED else 1)
@@ -0,0 +1,310 @@
+"""
+toolkits/search_index.py
+
+Local BM25 index over published questions, used by the search fallback so it never
+has to LIKE-scan `questions.body_markdown`. A process that finds no index file builds one in the
+background on first use (searches use the LIKE query until it is ready) and saves it to
+IQ_SEARCH_INDEX_PATH; `build` does the same ahead of time.
+
+    python -m toolkits.search_index build
+    python -m toolkits.search_index refresh
+    python -m toolkits.search_index query "sql joins"
+"""
+
+import bisect
+import gzip
+import json
+import logging
+import math
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import List, Dict, Optional
+from toolkits.db import run_query
+
+INDEX_PATH = os.getenv("IQ_SEARCH_INDEX_PATH", os.path.join(".cache", "question_index.json.gz"))
+REFRESH_INTERVAL = 300
+
+# BM25 parameters, title tokens count TITLE_WEIGHT times towards term frequency
+K1 = 1.2
+B = 0.75
+TITLE_WEIGHT = 3
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from how in is it of on or that the this to was what when where which with you your".split()
+)
+
+logger = logging.getLogger(__name__)
+
+_QUESTION_COLUMNS = "id, title, type, level, summary, body_markdown, slug, is_published, created_at, updated_at"
+
+
+def tokenize(text) -> List[str]:
+    if not isinstance(text, str):
+        return []
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+def _timestamp(value) -> Optional[str]:
+    if value is None or value != value:  # None or NaT
+        return None
+    return str(value)[:19]
+
+
+class QuestionIndex:
+    """In-memory inverted index: term -> {question_id: weighted term frequency}"""
+
+    def __init__(self):
+        self.docs = {}
+        self.postings = {}
+        self.total_length = 0
+        # Newest (change time, id) applied, refresh pulls strictly later rows
+        self.watermark = None
+        self.watermark_id = None
+        self._vocabulary = None
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.docs)
+
+    def _remove(self, qid: int):
+        doc = self.docs.pop(qid, None)
+        if doc is None:
+            return
+        self.total_length -= doc['length']
+        for term in doc['terms']:
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(qid, None)
+                if not postings:
+                    del self.postings[term]
+
+    def _add(self, row: Dict):
+        qid = int(row['id'])
+        counts = Counter()
+        for token in tokenize(row.get('title')):
+            counts[token] += TITLE_WEIGHT
+        for field in ('summary', 'body_markdown', 'type'):
+            counts.update(tokenize(row.get(field)))
+        length = sum(counts.values())
+
+        slug = row.get('slug')
+        level = row.get('level')
+        self.docs[qid] = {
+            'title': row.get('title'),
+            'type': row.get('type'),
+            'level': int(level) if level == level and level is not None else None,
+            'slug': slug if isinstance(slug, str) else None,
+            'length': length,
+            'terms': dict(counts)
+        }
+        self.total_length += length
+        for term, tf in counts.items():
+            self.postings.setdefault(term, {})[qid] = tf
+
+    def apply(self, rows: List[Dict]):
+        """Upsert rows from `questions`, dropping ones that are no longer published"""
+        with self._lock:
+            for row in rows:
+                qid = int(row['id'])
+                self._remove(qid)
+                if row.get('is_published', 1):
+                    self._add(row)
+                stamps = [s for s in (_timestamp(row.get(c)) for c in ('created_at', 'updated_at')) if s]
+                if stamps and (self.watermark is None or (max(stamps), qid) > (self.watermark, self.watermark_id or 0)):
+                    self.watermark, self.watermark_id = max(stamps), qid
+            self._vocabulary = None
+
+    def _expand(self, term: str) -> List[str]:
+        """Exact term if indexed, otherwise every indexed term it prefixes (search-as-you-type)"""
+        if term in self.postings:
+            return [term]
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        start = bisect.bisect_left(self._vocabulary, term)
+        expanded = []
+        for candidate in self._vocabulary[start:start + 50]:
+            if not candidate.startswith(term):
+                break
+            expanded.append(candidate)
+        return expanded
+
+    def search(self, query: str, limit: int = 20) -> List[Dict]:
+        """BM25-ranked hits in the same shape as magus results"""
+        from toolkits.search import QUESTION_URL
+
+        with self._lock:
+            n = len(self.docs)
+            if n == 0:
+                return []
+            avg_length = self.total_length / n or 1
+            scores = Counter()
+            tokens = tokenize(query)
+            for position, token in enumerate(tokens):
+                terms = self._expand(token) if position == len(tokens) - 1 else [token]
+                for term in terms:
+                    postings = self.postings.get(term)
+                    if not postings:
+                        continue
+                    idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for qid, tf in postings.items():
+                        norm = K1 * (1 - B + B * self.docs[qid]['length'] / avg_length)
+                        scores[qid] += idf * tf * (K1 + 1) / (tf + norm)
+
+            hits = []
+            for qid, score in scores.most_common(limit):
+                doc = self.docs[qid]
+                url = QUESTION_URL.format(doc['slug']) if doc['slug'] else ''
+                hits.append({
+                    'content_id': qid,
+                    'url': url,
+                    'score': score,
+                    'data': {
+                        'id': qid,
+                        'title': doc['title'],
+                        'type': doc['type'],
+                        'level': doc['level'],
+                        'url': url
+                    }
+                })
+            return hits
+
+    def save(self, path: str = INDEX_PATH):
+        with self._lock:
+            payload = {'watermark': self.watermark, 'watermark_id': self.watermark_id, 'docs': {str(k): v for k, v in self.docs.items()}}
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = INDEX_PATH) -> 'QuestionIndex':
+        """Postings are rebuilt from the per-document term counts, so only docs are persisted"""
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            payload = json.load(f)
+        index = cls()
+        index.watermark = payload['watermark']
+        index.watermark_id = payload.get('watermark_id')
+        for key, doc in payload['docs'].items():
+            qid = int(key)
+            index.docs[qid] = doc
+            index.total_length += doc['length']
+            for term, tf in doc['terms'].items():
+                index.postings.setdefault(term, {})[qid] = tf
+        return index
+
+
+def build_index() -> QuestionIndex:
+    """Full build from every published question"""
+    rows = run_query(f"SELECT {_QUESTION_COLUMNS} FROM questions WHERE is_published = 1")
+    index = QuestionIndex()
+    index.apply(rows.to_dict('records'))
+    return index
+
+
+def refresh_index(index: QuestionIndex) -> int:
+    """Pull questions created or edited after the index watermark, returns the number applied"""
+    if index.watermark is None:
+        rows = run_query(f"SELECT {_QUESTION_COLUMNS} FROM questions WHERE is_published = 1")
+    else:
+        # Rows changed in the watermark's second count only past its id, so nothing is applied twice
+        watermark, after_id = index.watermark, index.watermark_id or 0
+        rows = run_query(f"""
+        SELECT {_QUESTION_COLUMNS}
+        FROM questions
+        WHERE created_at > '{watermark}' OR updated_at > '{watermark}'
+           OR ((created_at = '{watermark}' OR updated_at = '{watermark}') AND id > {int(after_id)})
+        ORDER BY id
+        """)
+    records = rows.to_dict('records')
+    if records:
+        index.apply(records)
+    return len(records)
+
+
+_index = None
+_index_lock = threading.Lock()
+_refreshed_at = 0.0
+_refreshing = False
+
+
+def _background_refresh():
+    global _refreshed_at, _refreshing
+    try:
+        if refresh_index(_index):
+            _index.save()
+    except Exception as e:
+        print(f"Error refreshing question index: {e}")
+    finally:
+        _refreshed_at = time.monotonic()
+        _refreshing = False
+
+
+def get_index() -> Optional[QuestionIndex]:
+    """
+        Process-wide index loaded from disk, refreshed in the background every REFRESH_INTERVAL.
+        Without an index file it starts empty and the first refresh builds (and saves) it.
+    """
+    global _index, _refreshed_at, _refreshing
+    with _index_lock:
+        if _index is None:
+            if os.path.exists(INDEX_PATH):
+                _index = QuestionIndex.load(INDEX_PATH)
+            else:
+                logger.warning("No question index at %s, building it in the background. "
+                               "Run `python -m toolkits.search_index build` at deploy time to skip this.", INDEX_PATH)
+                _index = QuestionIndex()
+            _refreshed_at = 0.0
+        if not _refreshing and time.monotonic() - _refreshed_at > REFRESH_INTERVAL:
+            _refreshing = True
+            threading.Thread(target=_background_refresh, daemon=True).start()
+        return _index
+
+
+def index_search(query: str, limit: int = 20) -> List[Dict]:
+    """Search the local index, or fall back to the LIKE query while the index is still being built"""
+    from toolkits.search import database_search
+
+    index = get_index()
+    if index is None or len(index) == 0:
+        return database_search(query, limit=limit)
+    return index.search(query, limit=limit)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv else 'build'
+
+    if command == 'build':
+        start = time.perf_counter()
+        index = build_index()
+        index.save()
+        print(f"Indexed {len(index)} questions in {time.perf_counter() - start:.2f}s -> {INDEX_PATH}")
+    elif command == 'refresh':
+        exists = os.path.exists(INDEX_PATH)
+        index = QuestionIndex.load() if exists else QuestionIndex()
+        applied = refresh_index(index)
+        if applied or not exists:
+            index.save()
+        print(f"Applied {applied} changed questions, {len(index)} indexed")
+    elif command == 'query':
+        index = QuestionIndex.load()
+        start = time.perf_counter()
+        hits = index.search(' '.join(argv[1:]))
+        elapsed = (time.perf_counter() - start) * 1000
+        for hit in hits:
+            print(f"{hit['score']:7.3f}  {hit['content_id']:>6}  {hit['data']['title']}")
+        print(f"{len(hits)} hits in {elapsed:.2f}ms")
+    else:
+        print("usage: python -m toolkits.search_index [build|refresh|query <text>]")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
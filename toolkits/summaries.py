@@ -0,0 +1,207 @@
+"""
+toolkits/summaries.py
+
+Maintained counters, so landing pages read one row instead of joining members, assignments and
+questions on every view:
+
+    hackathon_2025_class_summary        per class: active students, assignments, distinct questions
+    hackathon_2025_assignment_summary   per assignment: distinct questions
+    hackathon_2025_instructor_summary   per instructor: classes, distinct active students, active assignments
+
+Write paths run their statements through `write` (or append `refresh_sql` to their own
+transaction), which recomputes the affected class's and instructor's rows in the same
+transaction. A write that bypasses them leaves the counters stale until the next write to that
+class or a rebuild. Reads never write: an instructor without a row yet is counted live. Until the
+summary tables exist (`python -m toolkits.schema migrate`) reads fall back to counting live and
+writes skip the refresh.
+
+    python -m toolkits.summaries rebuild     # recompute every row, e.g. after the migration
+"""
+
+import sys
+from typing import Dict, List
+from toolkits.db import run_query, execute_transaction
+from toolkits.schema import schema_registry
+
+CLASSES = 'hackathon_2025_instructor_classes'
+MEMBERS = 'hackathon_2025_class_members'
+ASSIGNMENTS = 'hackathon_2025_assignments'
+ASSIGNMENT_QUESTIONS = 'hackathon_2025_assignment_questions'
+CLASS_SUMMARY = 'hackathon_2025_class_summary'
+ASSIGNMENT_SUMMARY = 'hackathon_2025_assignment_summary'
+INSTRUCTOR_SUMMARY = 'hackathon_2025_instructor_summary'
+
+
+def enabled() -> bool:
+    return all(schema_registry.has_table(t) for t in (CLASS_SUMMARY, ASSIGNMENT_SUMMARY, INSTRUCTOR_SUMMARY))
+
+
+def _owner_column() -> str:
+    # The portals own classes by users.id, homework_app.py by hackathon_2025_instructors.id
+    return 'user_id' if schema_registry.has_column(CLASSES, 'user_id') else 'instructor_id'
+
+
+def _active(table, alias) -> str:
+    return f" AND {alias}.is_active = 1" if schema_registry.has_column(table, 'is_active') else ""
+
+
+def _class_counts(class_id) -> str:
+    return f"""
+        (SELECT COUNT(*) FROM {MEMBERS} m WHERE m.class_id = {class_id} AND m.is_active = 1) AS active_students,
+        (SELECT COUNT(*) FROM {ASSIGNMENTS} a WHERE a.class_id = {class_id}{_active(ASSIGNMENTS, 'a')}) AS assignments,
+        (SELECT COUNT(DISTINCT aq.question_id) FROM {ASSIGNMENT_QUESTIONS} aq
+         JOIN {ASSIGNMENTS} a ON aq.assignment_id = a.id
+         WHERE a.class_id = {class_id}{_active(ASSIGNMENTS, 'a')}) AS questions"""
+
+
+def _instructor_counts(owner_id) -> str:
+    owner = _owner_column()
+    active_class = _active(CLASSES, 'c')
+    return f"""
+        (SELECT COUNT(*) FROM {CLASSES} c WHERE c.{owner} = {owner_id}{active_class}) AS classes,
+        (SELECT COUNT(DISTINCT m.email) FROM {MEMBERS} m JOIN {CLASSES} c ON m.class_id = c.id
+         WHERE c.{owner} = {owner_id} AND m.is_active = 1{active_class}) AS students,
+        (SELECT COUNT(*) FROM {ASSIGNMENTS} a JOIN {CLASSES} c ON a.class_id = c.id
+         WHERE c.{owner} = {owner_id}{_active(ASSIGNMENTS, 'a')}{active_class}) AS active_assignments"""
+
+
+def _refresh_class_sql(class_id) -> List[str]:
+    return [
+        f"""
+        REPLACE INTO {CLASS_SUMMARY} (class_id, active_students, assignments, questions, updated_at)
+        SELECT {class_id}, {_class_counts(class_id)}, NOW()
+        """,
+        f"""
+        REPLACE INTO {ASSIGNMENT_SUMMARY} (assignment_id, class_id, questions, updated_at)
+        SELECT a.id, a.class_id, COUNT(DISTINCT aq.question_id), NOW()
+        FROM {ASSIGNMENTS} a
+        LEFT JOIN {ASSIGNMENT_QUESTIONS} aq ON aq.assignment_id = a.id
+        WHERE a.class_id = {class_id}
+        GROUP BY a.id, a.class_id
+        """,
+    ]
+
+
+def _new_classes_sql(owner_expr) -> str:
+    # Classes created since the last refresh have no members or assignments yet
+    return f"""
+    INSERT INTO {CLASS_SUMMARY} (class_id, active_students, assignments, questions, updated_at)
+    SELECT c.id, 0, 0, 0, NOW()
+    FROM {CLASSES} c
+    LEFT JOIN {CLASS_SUMMARY} s ON s.class_id = c.id
+    WHERE c.{_owner_column()} = {owner_expr} AND s.class_id IS NULL
+    """
+
+
+def _refresh_instructor_sql(owner_expr) -> str:
+    """`owner_expr` is an instructor id or a scalar subquery giving one"""
+    return f"""
+    REPLACE INTO {INSTRUCTOR_SUMMARY} (instructor_id, classes, students, active_assignments, updated_at)
+    SELECT o.owner_id, {_instructor_counts('o.owner_id')}, NOW()
+    FROM (SELECT {owner_expr} AS owner_id) o
+    WHERE o.owner_id IS NOT NULL
+    """
+
+
+def refresh_sql(class_id=None, owner_id=None) -> List[str]:
+    """
+        Statements recomputing the rows of `class_id` and of its instructor (or of `owner_id`).
+        Append them to the write's own transaction. Empty until the summary tables exist.
+    """
+    if not enabled():
+        return []
+    statements = []
+    if class_id is not None:
+        statements += _refresh_class_sql(int(class_id))
+        if owner_id is None:
+            owner_id = f"(SELECT {_owner_column()} FROM {CLASSES} WHERE id = {int(class_id)})"
+    if owner_id is not None:
+        statements += [_new_classes_sql(owner_id), _refresh_instructor_sql(owner_id)]
+    return statements
+
+
+def forget_class_sql(class_id) -> List[str]:
+    """Statements removing a deleted class's rows, to run with the DELETE"""
+    if not enabled():
+        return []
+    return [f"DELETE FROM {CLASS_SUMMARY} WHERE class_id = {int(class_id)}",
+            f"DELETE FROM {ASSIGNMENT_SUMMARY} WHERE class_id = {int(class_id)}"]
+
+
+def write(statements, class_id=None, owner_id=None):
+    """Runs the write `statements` and the summary refresh for the class/instructor in one transaction"""
+    execute_transaction(list(statements) + refresh_sql(class_id, owner_id))
+
+
+def assignment_sql(class_id, name, due_date, points) -> List[str]:
+    """
+        Statements creating an assignment and its questions (`points` is question id -> points),
+        for `write`. The question rows find the new assignment by class and name, so the
+        assignment, its questions and the counters commit together.
+    """
+    if not points:
+        raise ValueError("an assignment needs at least one question")
+    name = str(name).replace("'", "''")
+    assignment_id = f"(SELECT MAX(id) FROM {ASSIGNMENTS} WHERE class_id = {int(class_id)} AND name = '{name}')"
+    return [
+        f"INSERT INTO {ASSIGNMENTS} (class_id, name, due_date) VALUES ({int(class_id)}, '{name}', '{due_date}')",
+        f"INSERT INTO {ASSIGNMENT_QUESTIONS} (assignment_id, question_id, points) " +
+        " UNION ALL ".join(f"SELECT {assignment_id}, {int(question_id)}, {int(p)}" for question_id, p in points.items()),
+    ]
+
+
+def student_count_sql(class_alias='c') -> str:
+    """Scalar subquery for the active student count of `class_alias`.id, for a SELECT list"""
+    if enabled():
+        return f"COALESCE((SELECT s.active_students FROM {CLASS_SUMMARY} s WHERE s.class_id = {class_alias}.id), 0)"
+    return f"(SELECT COUNT(*) FROM {MEMBERS} m WHERE m.class_id = {class_alias}.id AND m.is_active = 1)"
+
+
+def question_count_sql(assignment_alias='a') -> str:
+    """Scalar subquery for the distinct question count of `assignment_alias`.id, for a SELECT list"""
+    if enabled():
+        return f"COALESCE((SELECT s.questions FROM {ASSIGNMENT_SUMMARY} s WHERE s.assignment_id = {assignment_alias}.id), 0)"
+    return f"(SELECT COUNT(DISTINCT aq.question_id) FROM {ASSIGNMENT_QUESTIONS} aq WHERE aq.assignment_id = {assignment_alias}.id)"
+
+
+def instructor_summary(owner_id) -> Dict[str, int]:
+    """{'classes', 'students', 'active_assignments'} for the instructor, from their summary row"""
+    result = None
+    if enabled():
+        result = run_query(f"SELECT classes, students, active_assignments FROM {INSTRUCTOR_SUMMARY} "
+                           f"WHERE instructor_id = {int(owner_id)}")
+    if result is None or len(result) == 0:
+        # No row until the instructor's first class write or a rebuild, count live (usually zeros)
+        result = run_query(f"SELECT {_instructor_counts(int(owner_id))}")
+    row = result.iloc[0].to_dict() if len(result) > 0 else {}
+    return {key: int(row.get(key) or 0) for key in ('classes', 'students', 'active_assignments')}
+
+
+def rebuild() -> int:
+    """Recomputes every summary row. Returns the number of classes."""
+    owner = _owner_column()
+    classes = run_query(f"SELECT id, {owner} AS owner_id FROM {CLASSES}")
+    statements = [f"DELETE FROM {CLASS_SUMMARY}", f"DELETE FROM {ASSIGNMENT_SUMMARY}", f"DELETE FROM {INSTRUCTOR_SUMMARY}"]
+    for class_id in classes['id']:
+        statements += _refresh_class_sql(int(class_id))
+    for owner_id in classes['owner_id'].dropna().unique():
+        statements.append(_refresh_instructor_sql(int(owner_id)))
+    execute_transaction(statements)
+    return len(classes)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv else 'rebuild'
+    if command != 'rebuild':
+        print(f"unknown command {command!r}, expected rebuild")
+        return 2
+    if not enabled():
+        print("summary tables are missing, run `python -m toolkits.schema migrate` first")
+        return 1
+    print(f"rebuilt summaries for {rebuild()} classes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
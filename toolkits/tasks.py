@@ -0,0 +1,164 @@
+"""
+toolkits/tasks.py
+
+The long instructor actions as background job functions (see toolkits.jobs). They run in a
+worker process, so they only take plain arguments, never touch Streamlit, and report progress
+through jobs.report. Their return values are JSON summaries the page shows when the job is done.
+"""
+
+from collections import defaultdict
+from toolkits import jobs
+from toolkits.db import run_query
+from toolkits.email.mail import send_email
+from toolkits.email.templates import get_class_invitation_template, get_assignment_notification_template, \
+    get_progress_report_template
+from toolkits.catalog import question_catalog
+from toolkits.links import get_signer
+from toolkits.frames import add_progress_columns, question_links, records
+from toolkits.analytics import student_progress_sql, progress_export_sql, gradebook_sql
+from toolkits.exports import temp_path
+from toolkits.lazy import lazy_import
+
+pd = lazy_import('pandas')
+
+SENDER = "noreply@interviewquery.com"
+QUESTION_URL_FALLBACK = "https://www.interviewquery.com/questions/{}"
+REPORT_STATUS = {'Completed': '✅', 'Attempted': '❌', 'Text Submitted': '⚠️', 'Not Started': '⏳'}
+
+
+def send_invitations(class_name, instructor_email, emails):
+    """Sends the class invitation to each email. Returns sent count and failures."""
+    sent = 0
+    failed = {}
+    subject = f"🎓 Welcome to {class_name} - Interview Query"
+    for i, email in enumerate(emails):
+        try:
+            html_body = get_class_invitation_template(
+                class_name=class_name,
+                student_email=email,
+                instructor_email=instructor_email
+            )
+            send_email(SENDER, email, subject, html_body)
+            sent += 1
+        except Exception as e:
+            failed[email] = str(e)
+        jobs.report(i + 1, len(emails), f"Sent {sent}/{len(emails)} invitations...")
+    return {'sent': sent, 'failed': failed}
+
+
+def notify_assignment(assignment_id, class_id, assignment_name, class_name, due_date, selected_urls):
+    """Emails every active student of the class their signed links to the assignment's questions"""
+    assignment_questions = run_query(f"""
+    SELECT q.id, q.title, q.type, q.level, aq.points
+    FROM hackathon_2025_assignment_questions aq
+    JOIN questions q ON aq.question_id = q.id
+    WHERE aq.assignment_id = {assignment_id}
+    """)
+    students = run_query(f"""
+    SELECT email FROM hackathon_2025_class_members
+    WHERE class_id = {class_id} AND is_active = 1
+    """)
+    if len(students) == 0:
+        return {'sent': 0, 'failed': {}}
+
+    # Resolve each question's URL once: search URL first, then the catalog slug
+    catalog = question_catalog.get_many(assignment_questions['id'].tolist())
+    question_list = question_links(assignment_questions, selected_urls, catalog)
+
+    # Signed links for every student x question in one pass
+    link_matrix = get_signer().sign_matrix(
+        assignment_id,
+        [q for q in question_list if q['url']],
+        students['email'].tolist()
+    )
+
+    sent = 0
+    failed = {}
+    for idx, student in enumerate(records(students)):
+        try:
+            student_links = link_matrix[student['email']]
+            student_questions = [{
+                'title': q['title'],
+                'points': q['points'],
+                # Final fallback for questions without a URL - use question ID
+                'link': student_links.get(q['id'], QUESTION_URL_FALLBACK.format(q['id'])),
+                'difficulty': q['difficulty']
+            } for q in question_list]
+
+            subject = f"📚 New Assignment: {assignment_name}"
+            html_body = get_assignment_notification_template(
+                assignment_name=assignment_name,
+                class_name=class_name,
+                due_date=str(due_date),
+                question_count=len(question_list),
+                student_email=student['email'],
+                questions=student_questions
+            )
+            send_email(SENDER, student['email'], subject, html_body)
+            sent += 1
+        except Exception as e:
+            failed[student['email']] = str(e)
+        jobs.report(idx + 1, len(students), f"Sent {sent}/{len(students)} emails...")
+    return {'sent': sent, 'failed': failed}
+
+
+def send_progress_reports(assignment, class_id, class_name):
+    """Emails every active student their progress and per-question status for the assignment"""
+    progress = add_progress_columns(run_query(student_progress_sql(assignment['id'], assignment['created_at'])))
+
+    # Every student's question statuses in one query instead of one per student
+    questions = defaultdict(list)
+    for row in records(run_query(progress_export_sql(assignment['id'], class_id, assignment['created_at']))):
+        questions[row['email']].append(row)
+
+    sent = 0
+    failed = {}
+    for i, student in enumerate(records(progress)):
+        try:
+            subject = f"Progress Report: {assignment['name']} - {class_name}"
+            html_body = get_progress_report_template(
+                assignment_name=assignment['name'],
+                class_name=class_name,
+                student_name=student['display_name'],
+                progress_pct=student['progress_pct'],
+                completed_questions=student['completed_questions'],
+                total_questions=student['total_questions'],
+                due_date=assignment['due_date'],
+                questions=questions[student['email']]
+            )
+            send_email(SENDER, student['email'], subject, html_body)
+            sent += 1
+        except Exception as e:
+            failed[student['email']] = str(e)
+        jobs.report(i + 1, len(progress), f"Sent {sent}/{len(progress)} progress reports...")
+    return {'sent': sent, 'failed': failed}
+
+
+def excel_report(class_id, assignment_id):
+    """
+        The report page's per-student workbook (totals, then status/score/attempts per question)
+        written to an export temp file. Returns its path and row count.
+    """
+    jobs.report(0, None, "Loading gradebook...", force=True)
+    cells = run_query(gradebook_sql(class_id, assignment_id))
+    rows = []
+    for email, student in cells.groupby('email', sort=True):
+        total_score = float(student['score'].sum())
+        total_possible = float(student['points'].sum())
+        row = {
+            'Student Email': email,
+            'Total Score': total_score,
+            'Total Possible': total_possible,
+            'Percentage': round(total_score / total_possible * 100, 1) if total_possible > 0 else 0
+        }
+        for i, q in enumerate(records(student.sort_values('question_id'))):
+            row[f"Q{i+1} Status"] = REPORT_STATUS.get(q['status'], q['status'])
+            row[f"Q{i+1} Score"] = q['score']
+            row[f"Q{i+1} Attempts"] = q['attempts']
+        rows.append(row)
+
+    jobs.report(0, None, "Writing workbook...", force=True)
+    path = temp_path('.xlsx')
+    with pd.ExcelWriter(path, engine='xlsxwriter') as writer:
+        pd.DataFrame(rows).to_excel(writer, sheet_name='Student Progress', index=False)
+    return {'path': path, 'rows': len(rows)}
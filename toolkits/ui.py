@@ -0,0 +1,192 @@
+import functools
+import time
+import streamlit as st
+from toolkits import jobs
+from toolkits.lazy import lazy_import
+
+pd = lazy_import('pandas')
+
+TIMINGS_KEY = '_fragment_timings'
+PAGE_SIZES = [25, 50, 100, 200]
+JOB_POLL_SECONDS = 1.0
+
+
+def timed_fragment(name, run_every=None):
+    """
+        Run a panel as an st.fragment so widgets inside it only rerun that panel, and record
+        how long each render took in session state for `show_render_timings`.
+    """
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = (time.perf_counter() - start) * 1000
+                timings = st.session_state.setdefault(TIMINGS_KEY, {})
+                entry = timings.setdefault(name, {'renders': 0, 'last_ms': 0.0, 'total_ms': 0.0})
+                entry['renders'] += 1
+                entry['last_ms'] = elapsed
+                entry['total_ms'] += elapsed
+
+        return st.fragment(timed, run_every=run_every)
+
+    return decorator
+
+
+def lazy_tabs(labels, key):
+    """
+        Tab strip whose bodies are built only when selected, unlike st.tabs which runs every tab.
+        Returns the selected label; the selection is kept in session state under `key`.
+    """
+    selected = st.segmented_control("Section", labels, default=labels[0], key=key,
+                                    label_visibility="collapsed")
+    return selected or labels[0]
+
+
+def lazy_expander(label, key):
+    """Toggle standing in for st.expander, so the caller only builds the body once it is opened"""
+    return st.toggle(label, key=key)
+
+
+def page_size_control(key, label="Rows per page"):
+    return st.selectbox(label, PAGE_SIZES, index=1, key=key)
+
+
+class KeysetPager:
+    """
+        Prev/Next paging state for keyset queries. Session state keeps a stack of the last sort key
+        of every page before the current one, so the loader only needs `WHERE key > after LIMIT n`.
+        Loaders should fetch `page_size + 1` rows so the pager can tell whether a next page exists.
+        The stack starts over when `page_size` or `reset_on` (e.g. active filters) change.
+    """
+
+    def __init__(self, key, page_size, reset_on=None):
+        self.key = key
+        self.page_size = page_size
+        state = st.session_state.setdefault(f"_pager_{key}", {'cursors': [None], 'reset_on': None})
+        if state['reset_on'] != (page_size, reset_on):
+            state['cursors'] = [None]
+            state['reset_on'] = (page_size, reset_on)
+        self._cursors = state['cursors']
+
+    @property
+    def after(self):
+        return self._cursors[-1]
+
+    @property
+    def page(self):
+        return len(self._cursors)
+
+    def paginate(self, rows: 'pd.DataFrame', key_column):
+        """Render the Prev/Next controls and return at most `page_size` rows"""
+        has_next = len(rows) > self.page_size
+        rows = rows.iloc[:self.page_size]
+
+        col1, col2, col3 = st.columns([1, 1, 4])
+        with col1:
+            st.button("← Prev", key=f"{self.key}_prev", disabled=self.page == 1,
+                      on_click=self._cursors.pop)
+        with col2:
+            st.button("Next →", key=f"{self.key}_next", disabled=not has_next,
+                      on_click=self._cursors.append,
+                      args=(_plain(rows[key_column].iloc[-1]),) if has_next else None)
+        with col3:
+            st.caption(f"Page {self.page}")
+        return rows
+
+
+def _plain(value):
+    return value.item() if hasattr(value, 'item') else value
+
+
+def render_timings() -> 'pd.DataFrame':
+    rows = []
+    for name, entry in st.session_state.get(TIMINGS_KEY, {}).items():
+        rows.append({
+            'panel': name,
+            'renders': entry['renders'],
+            'last_ms': round(entry['last_ms'], 1),
+            'avg_ms': round(entry['total_ms'] / entry['renders'], 1)
+        })
+    return pd.DataFrame(rows)
+
+
+def show_render_timings():
+    """Sidebar readout of per-panel render times for this session"""
+    with st.sidebar.expander("Render timings"):
+        timings = render_timings()
+        if timings.empty:
+            st.caption("No panels rendered yet")
+        else:
+            st.dataframe(timings, hide_index=True, use_container_width=True)
+
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def _poll_job(job_id):
+    job = jobs.status(job_id)
+    if job is None or job['status'] not in jobs.ACTIVE:
+        # Finished: rerun the page once so the caller renders the outcome and polling stops
+        st.rerun()
+    if job['total']:
+        st.progress(job['done'] / job['total'], text=job['message'] or f"{job['done']}/{job['total']}")
+    else:
+        st.progress(0.0, text=job['message'] or ('Queued...' if job['status'] == 'queued' else 'Working...'))
+
+
+def show_job(key, describe, on_finish=None):
+    """
+        Live progress of the background job whose id is in session state under `key`, polled from
+        the job table while it runs. Once it is done `on_finish(result)` runs once (e.g. to
+        invalidate caches) and `describe(result)` renders the outcome (a failure shows the error)
+        until the instructor dismisses it. Returns the job's state.
+    """
+    job_id = st.session_state.get(key)
+    if not job_id:
+        return None
+    job = jobs.status(job_id)
+    if job is None:
+        del st.session_state[key]
+        return None
+
+    if job['status'] in jobs.ACTIVE:
+        _poll_job(job_id)
+        return job
+
+    if job['status'] == 'failed':
+        st.error(f"❌ Error: {job['error'].splitlines()[0]}")
+    else:
+        finished = st.session_state.setdefault('_finished_jobs', set())
+        if on_finish is not None and job_id not in finished:
+            on_finish(job['result'])
+        finished.add(job_id)
+        describe(job['result'])
+    if st.button("Dismiss", key=f"dismiss_{key}"):
+        del st.session_state[key]
+        st.rerun()
+    return job
+
+
+def show_recent_jobs(owner):
+    """Sidebar list of the instructor's latest background jobs"""
+    recent = jobs.recent(owner, limit=10)
+    if not recent:
+        return
+    with st.sidebar.expander(f"Background jobs ({sum(j['status'] in jobs.ACTIVE for j in recent)} running)"):
+        for job in recent:
+            progress = f" {job['done']}/{job['total']}" if job['total'] else ""
+            st.caption(f"{job['kind']}: {job['status']}{progress}")
+
+
+def show_roster_report(report):
+    """Outcome counts of a roster import (toolkits.roster) and the per-email outcomes"""
+    counts = report['counts']
+    st.success(f"✅ Added {counts['added']} new students")
+    skipped = counts['already_member'] + counts['duplicate'] + counts['invalid']
+    if skipped:
+        st.info(f"Skipped {counts['already_member']} existing members, {counts['duplicate']} duplicates "
+                f"and {counts['invalid']} invalid addresses.")
+    with st.expander(f"Import report ({len(report['rows'])} rows)"):
+        st.dataframe(pd.DataFrame(report['rows']), hide_index=True, use_container_width=True)
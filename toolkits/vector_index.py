@@ -0,0 +1,330 @@
+"""
+toolkits/vector_index.py
+
+Offline semantic search over published questions. Embeddings live in a memory-mapped
+float32 matrix (one L2-normalised row per question) next to a JSON sidecar holding the
+question ids and display fields, so a query is one matrix-vector product. Query embeddings are
+cached, and a query whose embedding fails or times out falls back to the BM25 index. Running
+processes pick up a rebuilt or refreshed index on their next search.
+
+    python -m toolkits.vector_index build [--embedder openai|hashing]
+    python -m toolkits.vector_index refresh
+    python -m toolkits.vector_index query "window functions"
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Optional
+import numpy as np
+from toolkits import metrics
+from toolkits.db import run_query
+from toolkits.search_index import tokenize
+
+VECTORS_PATH = os.getenv("IQ_VECTOR_INDEX_PATH", os.path.join(".cache", "question_vectors.f32"))
+META_PATH = f"{VECTORS_PATH}.json"
+
+OPENAI_MODEL = 'text-embedding-3-small'
+BATCH_SIZE = 100
+MAX_CHARS = 8000
+QUERY_TIMEOUT = float(os.getenv("IQ_VECTOR_QUERY_TIMEOUT", "1.0"))
+QUERY_CACHE_SIZE = 2048
+
+_QUESTION_COLUMNS = "id, title, type, level, summary, body_markdown, slug, is_published, created_at, updated_at"
+
+query_failures = metrics.counter('iq_vector_query_failures_total', 'Vector searches that fell back to BM25')
+
+
+class HashingEmbedder:
+    """Deterministic feature-hashing embedder, no network. Good enough for tests and offline fallback."""
+
+    def __init__(self, dim=256):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in tokenize(text):
+                digest = hashlib.blake2b(token.encode(), digest_size=8).digest()
+                bucket = int.from_bytes(digest[:4], 'little') % self.dim
+                sign = 1.0 if digest[4] & 1 else -1.0
+                vectors[row, bucket] += sign
+        return vectors
+
+
+class OpenAIEmbedder:
+    """Embeddings through toolkits.llm's OpenAI client"""
+
+    def __init__(self, model=OPENAI_MODEL, timeout=None):
+        self.model = model
+        self.name = model
+        self.timeout = timeout
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        from toolkits.llm import embed
+        return np.asarray(embed(texts, model=self.model, timeout=self.timeout), dtype=np.float32)
+
+
+def get_embedder(name: str, timeout=None):
+    """`timeout` bounds each network call, used for query-time embeddings"""
+    if name.startswith('hashing'):
+        dim = int(name.split('-')[1]) if '-' in name else 256
+        return HashingEmbedder(dim)
+    if name == 'openai':
+        return OpenAIEmbedder(timeout=timeout)
+    return OpenAIEmbedder(model=name, timeout=timeout)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return (vectors / norms).astype(np.float32)
+
+
+def _document_text(row: Dict) -> str:
+    parts = [row.get(field) for field in ('title', 'summary', 'body_markdown')]
+    return '\n\n'.join(p for p in parts if isinstance(p, str))[:MAX_CHARS]
+
+
+def _display_fields(row: Dict) -> Dict:
+    slug = row.get('slug')
+    level = row.get('level')
+    return {
+        'id': int(row['id']),
+        'title': row.get('title'),
+        'type': row.get('type'),
+        'level': int(level) if level == level and level is not None else None,
+        'slug': slug if isinstance(slug, str) else None
+    }
+
+
+def embed_rows(rows: List[Dict], embedder) -> np.ndarray:
+    """Embed question rows in batches, returns an (n, dim) normalised float32 matrix"""
+    batches = []
+    for start in range(0, len(rows), BATCH_SIZE):
+        batch = rows[start:start + BATCH_SIZE]
+        batches.append(embedder([_document_text(row) for row in batch]))
+    if not batches:
+        return np.zeros((0, getattr(embedder, 'dim', 0)), dtype=np.float32)
+    return _normalize(np.vstack(batches))
+
+
+class VectorIndex:
+
+    def __init__(self, vectors: np.ndarray, questions: List[Dict], embedder_name: str, watermark: Optional[str] = None):
+        self.vectors = vectors
+        self.questions = questions
+        self.ids = np.array([q['id'] for q in questions], dtype=np.int64)
+        self.embedder_name = embedder_name
+        self.watermark = watermark
+        self._embedder = None
+        self._query_embedder = None
+        self._query_cache = OrderedDict()
+        self._query_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.questions)
+
+    @property
+    def embedder(self):
+        if self._embedder is None:
+            self._embedder = get_embedder(self.embedder_name)
+        return self._embedder
+
+    def query_embedding(self, query: str) -> np.ndarray:
+        """Normalised query vector, from an LRU cache so repeated searches skip the embedding call"""
+        key = query.strip().lower()
+        with self._query_lock:
+            if key in self._query_cache:
+                self._query_cache.move_to_end(key)
+                return self._query_cache[key]
+            if self._query_embedder is None:
+                self._query_embedder = get_embedder(self.embedder_name, timeout=QUERY_TIMEOUT)
+        vector = _normalize(self._query_embedder([query]))[0]
+        with self._query_lock:
+            self._query_cache[key] = vector
+            while len(self._query_cache) > QUERY_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
+        return vector
+
+    def save(self, vectors_path: str = VECTORS_PATH):
+        os.makedirs(os.path.dirname(vectors_path) or '.', exist_ok=True)
+        tmp_path = f"{vectors_path}.tmp"
+        if len(self.vectors):
+            matrix = np.memmap(tmp_path, dtype=np.float32, mode='w+', shape=self.vectors.shape)
+            matrix[:] = self.vectors
+            matrix.flush()
+            del matrix
+        else:
+            # numpy cannot map a zero-length file, load() reads count 0 without opening it
+            open(tmp_path, 'wb').close()
+        meta = {
+            'embedder': self.embedder_name,
+            'dim': int(self.vectors.shape[1]),
+            'count': int(self.vectors.shape[0]),
+            'watermark': self.watermark,
+            'questions': self.questions
+        }
+        with open(f"{tmp_path}.json", 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, vectors_path)
+        os.replace(f"{tmp_path}.json", f"{vectors_path}.json")
+
+    @classmethod
+    def load(cls, vectors_path: str = VECTORS_PATH) -> 'VectorIndex':
+        with open(f"{vectors_path}.json") as f:
+            meta = json.load(f)
+        shape = (meta['count'], meta['dim'])
+        if meta['count']:
+            vectors = np.memmap(vectors_path, dtype=np.float32, mode='r', shape=shape)
+        else:
+            vectors = np.zeros(shape, dtype=np.float32)
+        return cls(vectors, meta['questions'], meta['embedder'], meta.get('watermark'))
+
+    def query_vector(self, vector: np.ndarray, limit: int = 20):
+        """Top-k (row, cosine score) pairs for an already-normalised query vector"""
+        if len(self) == 0:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.float32)
+        scores = self.vectors @ vector
+        k = min(limit, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return top, scores[top]
+
+    def search(self, query: str, limit: int = 20) -> List[Dict]:
+        """Cosine-ranked hits in the same shape as magus results"""
+        from toolkits.search import _as_hit
+
+        vector = self.query_embedding(query)
+        rows, scores = self.query_vector(vector, limit)
+        hits = []
+        for row, score in zip(rows, scores):
+            if score <= 0:
+                break
+            hit = _as_hit(self.questions[row])
+            hit['score'] = float(score)
+            hits.append(hit)
+        return hits
+
+    def upsert(self, rows: List[Dict]):
+        """Replace or append embeddings for changed questions, dropping unpublished ones"""
+        published = [row for row in rows if row.get('is_published', 1)]
+        changed = {int(row['id']) for row in rows}
+        keep = ~np.isin(self.ids, list(changed))
+
+        new_vectors = embed_rows(published, self.embedder)
+        vectors = np.asarray(self.vectors)[keep]
+        if len(new_vectors):
+            vectors = np.vstack([vectors, new_vectors]) if len(vectors) else new_vectors
+        questions = [q for q, k in zip(self.questions, keep) if k]
+        questions += [_display_fields(row) for row in published]
+
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.questions = questions
+        self.ids = np.array([q['id'] for q in questions], dtype=np.int64)
+        for row in rows:
+            for column in ('created_at', 'updated_at'):
+                value = row.get(column)
+                stamp = str(value)[:19] if value is not None and value == value else None
+                if stamp and (self.watermark is None or stamp > self.watermark):
+                    self.watermark = stamp
+
+
+def build_index(embedder) -> VectorIndex:
+    """Full build from every published question"""
+    rows = run_query(f"SELECT {_QUESTION_COLUMNS} FROM questions WHERE is_published = 1").to_dict('records')
+    dim = getattr(embedder, 'dim', 0)
+    index = VectorIndex(np.zeros((0, dim), dtype=np.float32), [], embedder.name)
+    index.upsert(rows)
+    return index
+
+
+def refresh_index(index: VectorIndex) -> int:
+    """Re-embed questions created or edited since the index watermark, returns the number applied"""
+    if index.watermark is None:
+        rows = run_query(f"SELECT {_QUESTION_COLUMNS} FROM questions WHERE is_published = 1").to_dict('records')
+        index.upsert(rows)
+        return len(rows)
+    rows = run_query(f"""
+    SELECT {_QUESTION_COLUMNS}
+    FROM questions
+    WHERE created_at >= '{index.watermark}' OR updated_at >= '{index.watermark}'
+    """).to_dict('records')
+    if rows:
+        index.upsert(rows)
+    return len(rows)
+
+
+_index = None
+_index_mtime = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> Optional[VectorIndex]:
+    """
+        Process-wide index, memory-mapped on first use and reloaded when the files change (a
+        `refresh` run replaces the JSON sidecar last, so its mtime marks a complete write)
+    """
+    global _index, _index_mtime
+    with _index_lock:
+        try:
+            mtime = os.stat(META_PATH).st_mtime_ns
+        except FileNotFoundError:
+            return _index
+        if _index is None or mtime != _index_mtime:
+            _index = VectorIndex.load()
+            _index_mtime = mtime
+        return _index
+
+
+def vector_search(query: str, limit: int = 20) -> List[Dict]:
+    """Semantic search on the local vectors, or the BM25 index if none are built or the query embedding fails"""
+    from toolkits.search_index import index_search
+
+    index = get_index()
+    if index is None or len(index) == 0:
+        return index_search(query, limit=limit)
+    try:
+        return index.search(query, limit=limit)
+    except Exception:
+        query_failures.inc()
+        return index_search(query, limit=limit)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    command = argv[0] if argv else 'build'
+
+    if command == 'build':
+        name = argv[argv.index('--embedder') + 1] if '--embedder' in argv else 'openai'
+        start = time.perf_counter()
+        index = build_index(get_embedder(name))
+        index.save()
+        print(f"Embedded {len(index)} questions with {index.embedder_name} in {time.perf_counter() - start:.1f}s -> {VECTORS_PATH}")
+    elif command == 'refresh':
+        index = VectorIndex.load()
+        applied = refresh_index(index)
+        if applied:
+            index.save()
+        print(f"Applied {applied} changed questions, {len(index)} embedded")
+    elif command == 'query':
+        index = VectorIndex.load()
+        start = time.perf_counter()
+        hits = index.search(' '.join(argv[1:]))
+        elapsed = (time.perf_counter() - start) * 1000
+        for hit in hits:
+            print(f"{hit['score']:6.3f}  {hit['content_id']:>6}  {hit['data']['title']}")
+        print(f"{len(hits)} hits in {elapsed:.2f}ms")
+    else:
+        print("usage: python -m toolkits.vector_index [build [--embedder openai|hashing]|refresh|query <text>]")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,13 @@
+import time
 import pandas as pd
-from toolkits.db import run_query
+from toolkits import metrics
+from toolkits.db import run_query, execute_query
+
+records_updated = metrics.counter('iq_completion_records_updated_total', 'Progress records written by the updater')
+record_errors = metrics.counter('iq_completion_record_errors_total', 'Progress records the updater failed to write')
+run_seconds = metrics.histogram('iq_completion_run_seconds', 'Duration of a full completion update',
+                                buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800))
+last_success = metrics.gauge('iq_completion_last_success_timestamp_seconds', 'Unix time of the last run without errors')
 
 def update_student_progress_completion(assignment_id=None, student_email=None, question_id=None):
     """
@@ -34,10 +42,12 @@ def update_student_progress_completion(assignment_id=None, student_email=None, q
     {where_clause}
     """
     
+    start = time.time()
     try:
         progress_records = run_query(progress_query)
         
         if progress_records.empty:
+            last_success.set(time.time())
             return {"updated": 0, "errors": 0}
         
         updated_count = 0
@@ -54,7 +64,10 @@ def update_student_progress_completion(assignment_id=None, student_email=None, q
                 score = 0
                 attempts = 0
                 
-                if question_type in ['coding', 'algorithm']:
+                if pd.isna(user_id):
+                    # Roster member without an account yet: nothing submitted
+                    pass
+                elif question_type in ['coding', 'algorithm']:
                     # Check coding submissions
                     code_query = f"""
                     SELECT COUNT(*) as attempts, MAX(is_accepted) as accepted
@@ -91,13 +104,17 @@ def update_student_progress_completion(assignment_id=None, student_email=None, q
                     last_updated = NOW()
                 WHERE id = {progress_id}
                 """
-                run_query(update_query)
+                execute_query(update_query)
                 updated_count += 1
                 
             except Exception as e:
                 print(f"Error updating progress record {record['id']}: {e}")
                 error_count += 1
                 
+        records_updated.inc(updated_count)
+        record_errors.inc(error_count)
+        if error_count == 0:
+            last_success.set(time.time())
         return {
             "updated": updated_count, 
             "errors": error_count,
@@ -106,7 +123,10 @@ def update_student_progress_completion(assignment_id=None, student_email=None, q
         
     except Exception as e:
         print(f"Error in update_student_progress_completion: {e}")
+        record_errors.inc()
         return {"updated": 0, "errors": 1, "error_message": str(e)}
+    finally:
+        run_seconds.observe(time.time() - start)
 
 
 def update_completion_on_submission(user_id, question_id, is_accepted=None, score=None):
@@ -147,7 +167,7 @@ def update_completion_on_submission(user_id, question_id, is_accepted=None, scor
     """
     
     try:
-        run_query(update_query)
+        execute_query(update_query)
         return {"success": True, "student_email": student_email, "question_id": question_id}
     except Exception as e:
         return {"error": str(e)}
@@ -156,4 +176,6 @@ def update_completion_on_submission(user_id, question_id, is_accepted=None, scor
 if __name__ == "__main__":
     # Example: Update all completion statuses
     result = update_student_progress_completion()
-    print(f"Updated {result['updated']} records with {result['errors']} errors")
\ No newline at end of file
+    print(f"Updated {result['updated']} records with {result['errors']} errors")
+    # For node_exporter's textfile collector when IQ_METRICS_TEXTFILE is set
+    metrics.write_textfile()
\ No newline at end of file